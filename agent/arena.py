@@ -1,57 +1,165 @@
+import os
 import time
-import shutil
+import ctypes
+import itertools
+import queue
+import hashlib
 import tempfile
+import threading
 from pathlib import Path
-from typing import Optional, List, Dict
-from multiprocessing import Pool, cpu_count
+from collections import OrderedDict
+from typing import Optional, List, Dict, Callable, Iterable, Iterator, Sequence, Tuple
+from multiprocessing import Pool, RawArray, Value, cpu_count
 
 import numpy as np
 from tqdm import tqdm
 from sb3_contrib import MaskablePPO
 
 from core.env import BuckshotRouletteEnv
+from core.records import GameRecorder, shard_prefix
+from core.search import SearchPolicy, is_search_spec, parse_search_spec
 from agent.config import TrainingConfig
+from agent.numpy_policy import (
+    ARTIFACT_SUFFIX,
+    NumpyPolicy,
+    PRECISIONS,
+    _fresh_artifact,
+    artifact_path,
+    ensure_artifact,
+)
+from agent.profiling import PROFILER
+from agent.resources import ResourcePlan, configure_process
+from agent.scenarios import ScenarioIndex, StratifiedEstimate
 
 # Global cache to prevent redundant model loading during evaluation
-_policy_cache: Dict[str, any] = {}  # type: ignore
+_policy_cache: Dict[tuple, any] = {}  # (path, file identity) -> policy  # type: ignore
+_policy_cache_lock = threading.Lock()  # Also filled from the checkpoint writer thread
+
+# Arena worker cache: (path, content hash) -> model, least recently used first
+_worker_models: "OrderedDict[tuple, NumpyPolicy]" = OrderedDict()
+_WORKER_MODEL_CACHE_SIZE = 8
+
+# tmpfs for short-lived model files shared with workers (None: system default)
+SHARED_MEMORY_DIR = "/dev/shm" if os.path.isdir("/dev/shm") else None
+
+# Arena worker game recorders: record directory -> this worker's shard
+_worker_recorders: Dict[str, GameRecorder] = {}
+
+# Cancellation flags of result streams (ArenaWorkerPool.imap_unordered), shared
+# with the workers, and the stream of the job a worker is running
+_STREAM_SLOTS = 1024
+_worker_cancelled = None
+_worker_stream: Optional[int] = None
+
+
+def file_hash(path: str) -> str:
+    """Content hash identifying a saved model independently of its path."""
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+
+def _file_identity(model_path: str) -> tuple:
+    """(inode, mtime) of the file NumpyPolicy.load reads for `model_path`."""
+    st = os.stat(_fresh_artifact(model_path) or model_path)
+    return st.st_ino, st.st_mtime_ns
+
+
+def _uncache_policy(model_path: str):
+    with _policy_cache_lock:
+        for key in [k for k in _policy_cache if k[0] == model_path]:
+            del _policy_cache[key]
+
+
+def cache_policy(model_path: str, policy: NumpyPolicy):
+    """Cache `policy` as the model now on disk at `model_path`, replacing older entries."""
+    identity = _file_identity(model_path)
+    _uncache_policy(model_path)
+    with _policy_cache_lock:
+        _policy_cache[(model_path, identity)] = policy
+
+
+def _load_numpy_policy(model_path: str, use_cache: bool = True) -> NumpyPolicy:
+    if not use_cache:
+        return NumpyPolicy.load(model_path)
+    # Keyed by file identity: a path rewritten since (champion.zip on promotion) reloads
+    with _policy_cache_lock:
+        policy = _policy_cache.get((model_path, _file_identity(model_path)))
+    if policy is None:
+        # Load onto CPU to avoid CUDA multiprocessing issues
+        policy = NumpyPolicy.load(model_path)
+        cache_policy(model_path, policy)
+    return policy
 
 
 def load_policy_for_env(
-    model_path: str, use_cache: bool = True, deterministic: bool = False
+    model_path: str,
+    use_cache: bool = True,
+    deterministic: bool = False,
+    rng: Optional[np.random.Generator] = None,
 ):
     """
     Load a policy to act as an opponent.
 
+    The actor weights are evaluated with NumPy (NumpyPolicy), bypassing
+    SB3's per-call tensor conversion and distribution setup.
+
     Args:
         model_path: Path to the saved model .zip file.
         use_cache: If True, reuses the loaded model from memory.
         deterministic: If True, the policy will not use stochastic sampling.
+        rng: Generator for stochastic moves (seed it for reproducible games);
+            this policy's own, so cached models can be shared.
     """
-    if use_cache and model_path in _policy_cache:
-        model = _policy_cache[model_path]
-    else:
-        # Load onto CPU to avoid CUDA multiprocessing issues
-        model = MaskablePPO.load(model_path, device="cpu")
-        if use_cache:
-            _policy_cache[model_path] = model
+    model = _load_numpy_policy(model_path, use_cache)
 
     def policy(obs, action_mask):
-        action, _ = model.predict(
-            obs, action_masks=action_mask, deterministic=deterministic
-        )
-        return int(action)
+        return int(model.act(obs[None], action_mask[None], deterministic, rng)[0])
+
+    return policy
+
+
+def load_batched_policy_for_env(
+    model_path: str,
+    use_cache: bool = True,
+    deterministic: bool = False,
+    rng: Optional[np.random.Generator] = None,
+):
+    """
+    Load a policy acting on batches of opponent observations (BuckshotVecEnv).
+
+    Returns a callable `policy(obs, action_masks) -> actions` over arrays of
+    shape (k, OBS_SIZE) and (k, n_actions). `rng` as in load_policy_for_env().
+    """
+    model = _load_numpy_policy(model_path, use_cache)
+
+    def policy(obs, action_masks):
+        return model.act(obs, action_masks, deterministic, rng)
 
     return policy
 
 
 class OpponentPool:
-    """Manages a historical pool of 'Champion' policies for training diversity."""
+    """
+    Manages a historical pool of 'Champion' policies for training diversity.
+
+    Each champion .zip has an inference-only artifact next to it (see
+    NumpyPolicy.save_artifact), which opponent loaders pick up instead of
+    running MaskablePPO.load.
+
+    The challenger's loss rate against each member is tracked across
+    generations (exponential moving average, see record_results()) to
+    weight training opponent mixtures.
+    """
 
     def __init__(self, pool_size: int, champions_dir: str):
         self.pool_size = pool_size
         self.champions_dir = Path(champions_dir)
         self.champions_dir.mkdir(parents=True, exist_ok=True)
         self.pool: List[Path] = []
+        self.loss_rates: Dict[str, float] = {}  # champion file name -> challenger loss rate
         self._load_existing_pool()
 
     def _load_existing_pool(self):
@@ -59,22 +167,45 @@ class OpponentPool:
         self.pool = [f for f in champion_files[-self.pool_size :] if f.exists()]
         print(f"Loaded {len(self.pool)} champions into opponent pool.")
 
-    def add_champion(self, model_path: Path, generation: int):
+        # Pools saved before artifacts existed: convert once
+        for path in self.pool:
+            if not artifact_path(path).exists():
+                NumpyPolicy.load(str(path)).save_artifact(artifact_path(path))
+                print(f"Wrote inference artifact for {path.name}")
+
+    def add_champion_snapshot(
+        self, snapshot, generation: int, writer, champion_path: Optional[Path] = None
+    ) -> Path:
+        """
+        Add an in-memory champion (agent.checkpoint.ModelSnapshot) to the pool.
+
+        `writer` (a CheckpointWriter) saves it once in the background as
+        champion_gen_<generation>.zip plus artifact and hardlinks both to
+        `champion_path`. Its actor is cached for in-process opponents once
+        the files are written, so no opponent reloads them; call
+        writer.wait() before anything checks for or loads the files.
+        """
         new_champion_path = self.champions_dir / f"champion_gen_{generation}.zip"
-        shutil.copy(model_path, new_champion_path)
+        links = [champion_path] if champion_path is not None else []
+        writer.submit(snapshot, new_champion_path, links)
+        for path in [new_champion_path, *links]:
+            writer.then(cache_policy, str(path), snapshot.actor)
+        self._append(new_champion_path, writer)
+        print(f"Added champion to pool: {new_champion_path.name} (writing in background)")
+        return new_champion_path
 
+    def _append(self, new_champion_path: Path, writer):
         self.pool.append(new_champion_path)
 
         # Maintain pool size
         if len(self.pool) > self.pool_size:
             oldest = self.pool.pop(0)
-            if oldest.exists():
-                oldest.unlink()
-                if str(oldest) in _policy_cache:
-                    del _policy_cache[str(oldest)]
-                print(f"Removed oldest champion: {oldest.name}")
-
-        print(f"Added champion to pool: {new_champion_path.name}")
+            files = [oldest] + [artifact_path(oldest, precision) for precision in PRECISIONS]
+            # The oldest may still be queued for writing
+            writer.remove(files)
+            _uncache_policy(str(oldest))
+            self.loss_rates.pop(oldest.name, None)
+            print(f"Removed oldest champion: {oldest.name}")
 
     def sample_opponent_policy(self, rng: Optional[np.random.Generator] = None):
         if not self.pool:
@@ -83,6 +214,41 @@ class OpponentPool:
         champion_path = rng.choice(self.pool) if rng else np.random.choice(self.pool)  # type: ignore
         return load_policy_for_env(str(champion_path))
 
+    def record_results(
+        self,
+        paths: Sequence,
+        episodes: np.ndarray,
+        losses: np.ndarray,
+        decay: float = 0.5,
+    ):
+        """Fold one generation's training results (per opponent path) into the loss rates."""
+        for path, n, lost in zip(paths, episodes, losses):
+            if path is None or n == 0:
+                continue
+            name = Path(path).name
+            rate = lost / n
+            previous = self.loss_rates.get(name)
+            self.loss_rates[name] = rate if previous is None else decay * previous + (1 - decay) * rate
+
+    def mixture_weights(self, paths: Sequence, mode: str = "uniform", floor: float = 0.05) -> np.ndarray:
+        """
+        Sampling weights over `paths` for a training opponent mixture.
+
+        "uniform" weights all equally; "loss_weighted" in proportion to the
+        challenger's recent loss rate against each (at least `floor`, so no
+        opponent is dropped). Members without results yet get the highest
+        known rate, so new champions are tried early.
+        """
+        if mode == "uniform" or not paths:
+            return np.full(len(paths), 1.0 / max(len(paths), 1))
+        if mode != "loss_weighted":
+            raise ValueError(f"Unknown opponent mixture: {mode}")
+        known = [self.loss_rates[Path(p).name] for p in paths if Path(p).name in self.loss_rates]
+        unseen = max(known, default=0.5)
+        rates = np.array([self.loss_rates.get(Path(p).name, unseen) for p in paths])
+        weights = np.maximum(rates, floor)
+        return weights / weights.sum()
+
     def get_latest_champion_path(self) -> Optional[Path]:
         return self.pool[-1] if self.pool else None
 
@@ -101,6 +267,9 @@ def evaluate_model(
     Supports Common Random Numbers (CRN) via `use_paired_games` to reduce variance
     by playing the same seed twice (swapping roles).
     """
+    if not isinstance(model, NumpyPolicy):
+        model = NumpyPolicy.from_model(model)
+
     wins = 0
     losses = 0
     draws = 0
@@ -201,59 +370,373 @@ def _run_eval_episode(env, obs, model, deterministic):
         step_count += 1
 
 
+def _load_worker_model(model_path: str, model_hash: str) -> NumpyPolicy:
+    """Load a model once per worker; keyed by content hash so reused paths reload."""
+    key = (model_path, model_hash)
+    model = _worker_models.get(key)
+    if model is None:
+        # Memory-mapped artifact (see _match_jobs): shared with the other workers
+        model = NumpyPolicy.load(model_path)
+        _worker_models[key] = model
+        if len(_worker_models) > _WORKER_MODEL_CACHE_SIZE:
+            _worker_models.popitem(last=False)
+    else:
+        _worker_models.move_to_end(key)
+    return model
+
+
+def _worker_recorder(record_dir: Optional[str]) -> Optional[GameRecorder]:
+    """This worker's shard in `record_dir` (one shard per worker process)."""
+    if record_dir is None:
+        return None
+    recorder = _worker_recorders.get(record_dir)
+    if recorder is None:
+        # Matches run one after another: close shards of earlier matches
+        for old in _worker_recorders.values():
+            old.close()
+        _worker_recorders.clear()
+        recorder = GameRecorder(shard_prefix(record_dir))
+        _worker_recorders[record_dir] = recorder
+    return recorder
+
+
 def _eval_batch(args):
     """Worker function for parallel evaluation."""
-    model_path, opponent_path, start_seed, batch_size, deterministic, use_paired = args
+    (
+        model_path,
+        model_hash,
+        opponent_path,
+        opponent_hash,
+        start_seed,
+        batch_size,
+        deterministic,
+        use_paired,
+        record_dir,
+        seeds,
+    ) = args
+    if seeds is None:
+        seeds = range(start_seed, start_seed + batch_size)
+
+    model = _load_worker_model(model_path, model_hash)
+    # Cached models are reseeded per batch: a batch replays identically on any worker
+    model_rng, opponent_rng = (
+        np.random.default_rng(s) for s in np.random.SeedSequence(start_seed).spawn(2)
+    )
+    model.rng = model_rng
+    opponent_policy = None
+    if is_search_spec(opponent_path):
+        # Seeded per batch so a match replays identically
+        opponent_policy = SearchPolicy(seed=start_seed, **parse_search_spec(opponent_path))
+    elif opponent_path:
+        opponent_model = _load_worker_model(opponent_path, opponent_hash)
+
+        def opponent_policy(obs, action_mask):
+            return int(opponent_model.act(obs[None], action_mask[None], False, opponent_rng)[0])
 
-    model = MaskablePPO.load(model_path, device="cpu")
-    opponent_policy = load_policy_for_env(opponent_path) if opponent_path else None
+    recorder = _worker_recorder(record_dir)
     wins, losses, draws = 0, 0, 0
+    # Per-unit win scores (unit = pair of games when paired) for sequential testing
+    scores = np.zeros(batch_size)
 
     if use_paired:
-        env_p = BuckshotRouletteEnv(opponent_policy=opponent_policy, force_agent_as_player=True)
-        env_d = BuckshotRouletteEnv(opponent_policy=opponent_policy, force_agent_as_player=False)
+        env_p = BuckshotRouletteEnv(
+            opponent_policy=opponent_policy, force_agent_as_player=True, recorder=recorder
+        )
+        env_d = BuckshotRouletteEnv(
+            opponent_policy=opponent_policy, force_agent_as_player=False, recorder=recorder
+        )
 
-        for i in range(batch_size):
-            pair_seed = start_seed + i
+        for i, pair_seed in enumerate(seeds):
+            if _stream_cancelled():
+                break
+            pair_wins = 0
             for env in [env_p, env_d]:
                 obs, _ = env.reset(seed=pair_seed)
                 _run_eval_episode(env, obs, model, deterministic)
                 if env.game.player.hp <= 0 and env.game.dealer.hp <= 0:
                     draws += 1
                 elif env._agent_is_player:
-                    wins += 1 if env.game.dealer.hp <= 0 else 0
+                    pair_wins += 1 if env.game.dealer.hp <= 0 else 0
                     losses += 1 if env.game.dealer.hp > 0 else 0
                 else:
-                    wins += 1 if env.game.player.hp <= 0 else 0
+                    pair_wins += 1 if env.game.player.hp <= 0 else 0
                     losses += 1 if env.game.player.hp > 0 else 0
+            wins += pair_wins
+            scores[i] = pair_wins / 2
     else:
-        env = BuckshotRouletteEnv(opponent_policy=opponent_policy)
-        for i in range(batch_size):
-            obs, _ = env.reset(seed=start_seed + i)
+        env = BuckshotRouletteEnv(opponent_policy=opponent_policy, recorder=recorder)
+        for i, seed in enumerate(seeds):
+            if _stream_cancelled():
+                break
+            obs, _ = env.reset(seed=seed)
             _run_eval_episode(env, obs, model, deterministic)
             if env.game.player.hp <= 0 and env.game.dealer.hp <= 0:
                 draws += 1
             elif env._agent_is_player:
-                wins += 1 if env.game.dealer.hp <= 0 else 0
-                losses += 1 if env.game.dealer.hp > 0 else 0
+                won = bool(env.game.dealer.hp <= 0)
+                wins += won
+                losses += not won
+                scores[i] = won
             else:
-                wins += 1 if env.game.player.hp <= 0 else 0
-                losses += 1 if env.game.player.hp > 0 else 0
+                won = bool(env.game.player.hp <= 0)
+                wins += won
+                losses += not won
+                scores[i] = won
 
-    return wins, losses, draws
+    if recorder is not None:
+        recorder.flush()
+    # Per-unit scores last: a stratified match attributes them to strata
+    return (
+        wins,
+        losses,
+        draws,
+        batch_size,
+        float(scores.sum()),
+        float(np.square(scores).sum()),
+        scores,
+    )
 
 
-def evaluate_model_parallel(
+def _stratified_batch(args):
+    """Arena worker function: one _eval_batch job tagged with its units' strata."""
+    strata, job = args
+    return strata, _eval_batch(job)
+
+
+class SequentialTest:
+    """
+    Generalized SPRT on the arena win rate (normal approximation).
+
+    Tests H0: p = threshold - delta against H1: p = threshold + delta using
+    per-unit scores streamed from _eval_batch. A unit is one game, or one
+    pair of games with paired (CRN) evaluation, whose score is the mean of
+    both results; the empirical variance of those scores accounts for the
+    pairing. Stops with "accept" (promote) or "reject" once the
+    log-likelihood ratio crosses the Wald bounds for the given error rates.
+    With a StratifiedEstimate in `strata` (kept up to date by the caller),
+    its mean and within-stratum variance replace the plain ones.
+    """
+
+    def __init__(
+        self,
+        threshold: float,
+        delta: float = 0.01,
+        alpha: float = 0.05,
+        beta: float = 0.05,
+        min_units: int = 200,
+    ):
+        self.p0 = threshold - delta
+        self.p1 = threshold + delta
+        self.lower = np.log(beta / (1 - alpha))
+        self.upper = np.log((1 - beta) / alpha)
+        self.min_units = min_units
+        self.n = 0
+        self.score_sum = 0.0
+        self.score_sq_sum = 0.0
+        self.strata: Optional[StratifiedEstimate] = None
+
+    def update(self, n_units: int, score_sum: float, score_sq_sum: float):
+        self.n += n_units
+        self.score_sum += score_sum
+        self.score_sq_sum += score_sq_sum
+
+    @property
+    def llr(self) -> float:
+        if self.n < self.min_units:
+            return 0.0
+        mean = self.score_sum / self.n
+        var = self.score_sq_sum / self.n - mean * mean
+        if self.strata is not None:
+            # Per-unit variance implied by the stratified estimate
+            mean, var = self.strata.mean, self.strata.variance * self.n
+        # Degenerate samples (all wins / all losses): fall back to the Bernoulli bound
+        var = max(var, 1.0 / (4 * self.n))
+        return (self.p1 - self.p0) * self.n * (mean - (self.p0 + self.p1) / 2) / var
+
+    @property
+    def decision(self) -> Optional[str]:
+        llr = self.llr
+        if llr >= self.upper:
+            return "accept"
+        if llr <= self.lower:
+            return "reject"
+        return None
+
+
+class _JobFailed:
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+class ArenaWorkerPool:
+    """
+    Long-lived evaluation workers shared across matches and generations.
+
+    Workers keep loaded models in a small cache keyed by (path, content hash),
+    so a match only pays model deserialization once per worker. Jobs are
+    submitted lazily with a bounded number in flight, which lets a consumer
+    stop a match early by closing the result stream: jobs of a closed
+    stream that have not started are skipped, running ones stop at their
+    next game, and close() returns once the workers are free again.
+
+    Workers run single-threaded (BLAS threads would only oversubscribe the
+    cores); with `cpu_sets`, worker i takes the i-th set, and is pinned to
+    it if `pin`.
+    """
+
+    def __init__(
+        self,
+        n_workers: Optional[int] = None,
+        cpu_sets: Optional[Sequence[Sequence[int]]] = None,
+        pin: bool = False,
+    ):
+        self.n_workers = n_workers or cpu_count()
+        self._cancelled = RawArray(ctypes.c_int8, _STREAM_SLOTS)
+        self._streams = itertools.count()
+        self._pool = Pool(
+            self.n_workers,
+            initializer=_init_arena_worker,
+            initargs=(cpu_sets, pin, Value("i", 0), self._cancelled),
+        )
+
+    def imap_unordered(
+        self,
+        fn: Callable,
+        jobs: Iterable,
+        max_in_flight: Optional[int] = None,
+    ) -> Iterator:
+        max_in_flight = max_in_flight or 2 * self.n_workers
+        results: queue.Queue = queue.Queue()
+        jobs = iter(jobs)
+        stream = next(self._streams) % _STREAM_SLOTS
+        self._cancelled[stream] = 0
+
+        def submit() -> bool:
+            job = next(jobs, None)
+            if job is None:
+                return False
+            self._pool.apply_async(
+                _run_stream_job,
+                ((stream, fn, job),),
+                callback=results.put,
+                error_callback=lambda e: results.put(_JobFailed(e)),
+            )
+            return True
+
+        in_flight = 0
+        try:
+            while in_flight < max_in_flight and submit():
+                in_flight += 1
+
+            while in_flight:
+                result = results.get()
+                in_flight -= 1
+                if isinstance(result, _JobFailed):
+                    raise result.error
+                if submit():
+                    in_flight += 1
+                yield result
+        finally:
+            if in_flight:
+                # Abandoned (early stop or error): cancel and wait until the workers are free
+                self._cancelled[stream] = 1
+                while in_flight:
+                    results.get()
+                    in_flight -= 1
+
+    def close(self):
+        self._pool.close()
+        self._pool.join()
+
+
+def _init_arena_worker(cpu_sets, pin: bool, counter, cancelled):
+    """Pool initializer: one thread per worker, on its own CPU set."""
+    global _worker_cancelled
+    _worker_cancelled = cancelled
+    with counter.get_lock():
+        index = counter.value
+        counter.value += 1
+    cpus = cpu_sets[index % len(cpu_sets)] if cpu_sets else None
+    configure_process(cpus, 1, pin)
+
+
+def _run_stream_job(args):
+    """Worker side of imap_unordered: run `fn(job)` unless its stream was cancelled."""
+    global _worker_stream
+    stream, fn, job = args
+    if _worker_cancelled[stream]:
+        return None
+    _worker_stream = stream
+    try:
+        return fn(job)
+    finally:
+        _worker_stream = None
+
+
+def _stream_cancelled() -> bool:
+    """True in an arena worker whose current job belongs to a closed stream."""
+    return _worker_stream is not None and bool(_worker_cancelled[_worker_stream])
+
+
+_arena_pool: Optional[ArenaWorkerPool] = None
+_resource_plan: Optional[ResourcePlan] = None
+
+
+def set_resource_plan(plan: Optional[ResourcePlan]):
+    """Size and place arena pools created from now on by `plan` (see agent/resources.py)."""
+    global _resource_plan
+    _resource_plan = plan
+
+
+def get_arena_pool(n_workers: Optional[int] = None) -> ArenaWorkerPool:
+    """Return the process-wide arena pool, creating it on first use."""
+    global _arena_pool
+    plan = _resource_plan
+    cpu_sets = plan.arena_cpus if plan is not None else None
+    n_workers = n_workers or (plan.n_arena_workers if plan is not None else cpu_count())
+    if _arena_pool is not None and _arena_pool.n_workers != n_workers:
+        close_arena_pool()
+    if _arena_pool is None:
+        _arena_pool = ArenaWorkerPool(n_workers, cpu_sets, pin=plan is not None and plan.pin)
+    return _arena_pool
+
+
+def close_arena_pool():
+    global _arena_pool
+    if _arena_pool is not None:
+        _arena_pool.close()
+        _arena_pool = None
+
+
+def _match_jobs(
     model_path: str,
-    opponent_path: Optional[str] = None,
-    n_episodes: int = 1000,
-    deterministic: bool = True,
-    seed: int = 0,
-    use_paired_games: bool = False,
-    n_workers: Optional[int] = None,
-) -> dict:
-    """Parallel evaluation using multiprocessing with live progress bar."""
-    n_workers = n_workers or cpu_count()
+    opponent_path: Optional[str],
+    n_episodes: int,
+    deterministic: bool,
+    seed: int,
+    use_paired_games: bool,
+    n_workers: int,
+    record_dir: Optional[str] = None,
+    seeds: Optional[np.ndarray] = None,
+):
+    """
+    Split a match into batch jobs for _eval_batch.
+
+    Units play consecutive seeds from `seed`, or the given `seeds` (one per
+    unit, e.g. a stratified sample) split in order across the batches.
+    """
+    model_hash = file_hash(model_path)
+    # Workers memory-map these instead of each loading its own copy
+    ensure_artifact(model_path)
+    opponent_hash = None
+    if is_search_spec(opponent_path):
+        opponent_hash = opponent_path
+    elif opponent_path:
+        opponent_hash = file_hash(opponent_path)
+        ensure_artifact(opponent_path)
+
+    if seeds is not None:
+        n_episodes = len(seeds)
 
     # Use smaller batches (100 games each) for smoother progress updates
     games_per_batch = 100
@@ -261,52 +744,225 @@ def evaluate_model_parallel(
     batch_size = n_episodes // n_batches
     remainder = n_episodes % n_batches
 
-    args = []
+    jobs = []
     current_seed = seed
+    start = 0
     for i in range(n_batches):
         size = batch_size + (1 if i < remainder else 0)
         if size > 0:
-            args.append((model_path, opponent_path, current_seed, size, deterministic, use_paired_games))
+            batch_seeds = None
+            if seeds is not None:
+                batch_seeds = seeds[start : start + size].tolist()  # env.reset wants ints
+                current_seed = batch_seeds[0]
+                start += size
+            jobs.append(
+                (
+                    model_path,
+                    model_hash,
+                    opponent_path,
+                    opponent_hash,
+                    current_seed,
+                    size,
+                    deterministic,
+                    use_paired_games,
+                    record_dir,
+                    batch_seeds,
+                )
+            )
             current_seed += size * (2 if use_paired_games else 1)
+    return jobs
+
+
+def evaluate_model_parallel(
+    model_path: str,
+    opponent_path: Optional[str] = None,
+    n_episodes: int = 1000,
+    deterministic: bool = True,
+    seed: int = 0,
+    use_paired_games: bool = False,
+    n_workers: Optional[int] = None,
+    pool: Optional[ArenaWorkerPool] = None,
+    stopping_rule: Optional[SequentialTest] = None,
+    record_dir: Optional[str] = None,
+    stratified: bool = False,
+) -> dict:
+    """
+    Parallel evaluation on the persistent arena pool with live progress bar.
+
+    Uses `pool` if given, otherwise the shared pool from get_arena_pool().
+    With a `stopping_rule`, batch results are fed to it as they arrive and
+    the match stops as soon as it reaches a decision.
+    `opponent_path` may also be a search opponent spec such as "search" or
+    "search:rollouts=512,time=0.01" (see core.search.SearchPolicy). With a
+    `record_dir`, every game is logged there (one shard per worker; read
+    with core.records.GameRecords).
+
+    With `stratified`, seeds from `seed` on are first indexed by the opening
+    scenario they deal (agent.scenarios.ScenarioIndex) and the units are a
+    proportionally stratified sample of them. The result then also holds the
+    stratified win rate ("win_rate_stratified", per unit, draws count as
+    losses), its 95% confidence interval and the variance reduction over
+    unstratified sampling; the stopping rule uses the stratified estimate.
+    """
+    pool = pool or get_arena_pool(n_workers)
+    seeds, strata, estimate = None, None, None
+    if stratified:
+        with PROFILER.timer("arena/scenario_index"):
+            index = ScenarioIndex(seed, use_paired_games, pool)
+            seeds, strata = index.allocate(n_episodes)
+        estimate = StratifiedEstimate(index.weights)
+        if stopping_rule is not None:
+            stopping_rule.strata = estimate
+    jobs = _match_jobs(
+        model_path,
+        opponent_path,
+        n_episodes,
+        deterministic,
+        seed,
+        use_paired_games,
+        pool.n_workers,
+        str(record_dir) if record_dir is not None else None,
+        seeds,
+    )
+
+    games_per_unit = 2 if use_paired_games else 1
+    planned = sum(job[5] for job in jobs) * games_per_unit
 
     wins, losses, draws = 0, 0, 0
-    with Pool(n_workers) as pool:
-        for result in tqdm(pool.imap_unordered(_eval_batch, args), total=len(args), desc="Evaluating", leave=False):
-            wins += result[0]
-            losses += result[1]
-            draws += result[2]
+    decision = None
+    if stratified:
+        # Jobs take the seeds in order: tag each with its slice of strata
+        ends = np.cumsum([job[5] for job in jobs])
+        tagged = [(strata[end - job[5] : end], job) for job, end in zip(jobs, ends)]
+        results = pool.imap_unordered(_stratified_batch, tagged)
+    else:
+        results = pool.imap_unordered(_eval_batch, jobs)
+    for result in tqdm(results, total=len(jobs), desc="Evaluating", leave=False):
+        if stratified:
+            job_strata, result = result
+        wins += result[0]
+        losses += result[1]
+        draws += result[2]
+        if stratified:
+            estimate.update(job_strata, result[6])
+
+        if stopping_rule is not None:
+            stopping_rule.update(*result[3:6])
+            decision = stopping_rule.decision
+            if decision is not None:
+                results.close()
+                break
 
     total = wins + losses + draws
-    return {
+    match = {
         "wins": wins,
         "losses": losses,
         "draws": draws,
         "win_rate": wins / total if total > 0 else 0.0,
         "total_episodes": total,
+        "decision": decision,
+        "games_saved": planned - total,
     }
+    if stratified:
+        match["win_rate_stratified"] = estimate.mean
+        match["ci95"] = estimate.interval()
+        match["variance_reduction"] = 1.0 - estimate.variance / max(
+            estimate.unstratified_variance(), 1e-12
+        )
+    return match
+
+
+def _make_stopping_rule(
+    config: TrainingConfig, threshold: float
+) -> Optional[SequentialTest]:
+    if not config.use_sequential_evaluation:
+        return None
+    return SequentialTest(
+        threshold,
+        delta=config.sprt_delta,
+        alpha=config.sprt_alpha,
+        beta=config.sprt_beta,
+    )
+
+
+def _passes(results: dict, threshold: float) -> bool:
+    """Sequential decision if one was reached, else the fixed-sample threshold."""
+    if results["decision"] is not None:
+        return results["decision"] == "accept"
+    return _compared_rate(results)[1] >= threshold
+
+
+def _compared_rate(results: dict) -> Tuple[str, float]:
+    """Label and value of the win rate _passes() compares with the threshold."""
+    if "win_rate_stratified" in results:
+        return "stratified win rate", results["win_rate_stratified"]
+    return "win rate", results["win_rate"]
+
+
+def _verdict(results: dict, threshold: float) -> str:
+    """What the pass/fail decision was based on, for the arena log."""
+    if results["decision"] is not None:
+        return f"sequential test: {results['decision']}"
+    label, rate = _compared_rate(results)
+    return f"{label} {rate:.2%} {'>=' if rate >= threshold else '<'} {threshold:.2%}"
+
+
+def _report_early_stop(results: dict):
+    if results["decision"] is not None:
+        print(
+            f"  Sequential test: {results['decision']} early, "
+            f"saved {results['games_saved']} games"
+        )
+
+
+def _report_stratified(results: dict):
+    if "win_rate_stratified" in results:
+        low, high = results["ci95"]
+        print(
+            f"  Stratified win rate: {results['win_rate_stratified']:.2%} "
+            f"(95% CI {low:.2%} - {high:.2%}, "
+            f"variance -{results['variance_reduction']:.0%})"
+        )
 
 
 def evaluate_challenger(
-    challenger: MaskablePPO,
+    challenger,
     champion_path: Optional[Path],
     config: TrainingConfig,
     generation: int,
 ) -> bool:
     """
     Orchestrates the 'Arena' logic: Challenger vs Random, then Challenger vs Champion.
+    `challenger` is a MaskablePPO or its actor (NumpyPolicy).
     Returns True if the challenger should be promoted.
     """
+    # Workers only need the actor: hand them its artifact (in RAM where
+    # available) instead of serializing the whole model to a .zip
+    with tempfile.TemporaryDirectory(dir=SHARED_MEMORY_DIR) as tmpdir:
+        challenger_path = f"{tmpdir}/challenger{ARTIFACT_SUFFIX}"
+        with PROFILER.timer("io/model_save"):
+            actor = challenger if isinstance(challenger, NumpyPolicy) else NumpyPolicy.from_model(challenger)
+            actor.save_artifact(challenger_path)
+        return evaluate_challenger_path(challenger_path, champion_path, config, generation)
+
+
+def evaluate_challenger_path(
+    challenger_path: str,
+    champion_path: Optional[Path],
+    config: TrainingConfig,
+    generation: int,
+) -> bool:
+    """evaluate_challenger() for a challenger saved as a .zip or a .policy artifact."""
     print(f"\n{'=' * 60}\nGENERATION {generation}: Evaluation Arena\n{'=' * 60}")
     eval_seed = config.seed + generation * 10000
+    record_dir = None
+    if config.record_arena_games:
+        record_dir = Path(config.records_dir) / f"gen_{generation}"
 
-    # Save challenger to temp file for parallel eval
-    with tempfile.TemporaryDirectory() as tmpdir:
-        challenger_path = f"{tmpdir}/challenger.zip"
-        challenger.save(challenger_path)
-
-        # Match 1: Baseline Verification
-        print("\n Match 1: Challenger vs Random Opponent")
-        t0 = time.time()
+    # Match 1: Baseline Verification
+    print("\n Match 1: Challenger vs Random Opponent")
+    t0 = time.time()
+    with PROFILER.timer("arena/match_random"):
         random_results = evaluate_model_parallel(
             challenger_path,
             opponent_path=None,
@@ -314,25 +970,32 @@ def evaluate_challenger(
             deterministic=True,
             seed=eval_seed,
             use_paired_games=config.use_paired_evaluation,
+            stopping_rule=_make_stopping_rule(config, config.random_win_threshold),
+            stratified=config.use_stratified_evaluation,
+            record_dir=record_dir / "random" if record_dir else None,
         )
+    label, rate = _compared_rate(random_results)
+    print(
+        f"  Wins: {random_results['wins']}/{random_results['total_episodes']} "
+        f"({label} {rate:.2%}) in {time.time() - t0:.2f}s"
+    )
+    _report_stratified(random_results)
+    _report_early_stop(random_results)
+
+    if not _passes(random_results, config.random_win_threshold):
         print(
-            f"  Wins: {random_results['wins']}/{random_results['total_episodes']} "
-            f"({random_results['win_rate']:.2%}) in {time.time() - t0:.2f}s"
+            f"  Failed baseline check ({_verdict(random_results, config.random_win_threshold)})."
         )
+        return False
 
-        if random_results["win_rate"] < config.random_win_threshold:
-            print(
-                f"  Failed baseline check (win rate < {config.random_win_threshold * 100}%)."
-            )
-            return False
-
-        # Match 2: Championship Fight
-        if champion_path is None:
-            print("\n  No existing champion - Challenger promoted by default!")
-            return True
+    # Match 2: Championship Fight
+    if champion_path is None:
+        print("\n  No existing champion - Challenger promoted by default!")
+        return True
 
-        print("\n Match 2: Challenger vs Champion")
-        t0 = time.time()
+    print("\n Match 2: Challenger vs Champion")
+    t0 = time.time()
+    with PROFILER.timer("arena/match_champion"):
         champion_results = evaluate_model_parallel(
             challenger_path,
             opponent_path=str(champion_path),
@@ -340,17 +1003,23 @@ def evaluate_challenger(
             deterministic=True,
             seed=eval_seed + 100000,
             use_paired_games=config.use_paired_evaluation,
+            stopping_rule=_make_stopping_rule(config, config.win_threshold),
+            stratified=config.use_stratified_evaluation,
+            record_dir=record_dir / "champion" if record_dir else None,
         )
+    label, rate = _compared_rate(champion_results)
+    print(
+        f"  Wins: {champion_results['wins']}/{champion_results['total_episodes']} "
+        f"({label} {rate:.2%}) in {time.time() - t0:.2f}s"
+    )
+    _report_stratified(champion_results)
+    _report_early_stop(champion_results)
+
+    if _passes(champion_results, config.win_threshold):
         print(
-            f"  Wins: {champion_results['wins']}/{champion_results['total_episodes']} "
-            f"({champion_results['win_rate']:.2%}) in {time.time() - t0:.2f}s"
+            f" Down with the king type shit. Challenger wins! ({_verdict(champion_results, config.win_threshold)})"
         )
-
-        if champion_results["win_rate"] >= config.win_threshold:
-            print(
-                f" Down with the king type shit. Challenger wins! ({champion_results['win_rate']:.2%} >= {config.win_threshold:.2%})"
-            )
-            return True
-        else:
-            print("Challenger loses. What a bummer")
-            return False
+        return True
+    else:
+        print(f"Challenger loses ({_verdict(champion_results, config.win_threshold)}). What a bummer")
+        return False
@@ -0,0 +1,290 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from typing import Callable, Dict, Optional
+
+import numpy as np
+
+from core.game import BuckshotRouletteGame
+from core.batched import BatchedBuckshotGame
+from core.env import BuckshotRouletteEnv
+from core.constants import ACTION_MAP
+
+
+def _summarize(latencies_ns: np.ndarray, ops_per_call: int = 1) -> dict:
+    """Throughput and per-call latency percentiles (microseconds)."""
+    total_s = latencies_ns.sum() / 1e9
+    p50, p90, p99 = np.percentile(latencies_ns, [50, 90, 99]) / 1e3
+    return {
+        "calls": int(len(latencies_ns)),
+        "ops_per_sec": float(len(latencies_ns) * ops_per_call / total_s) if total_s > 0 else 0.0,
+        "p50_us": float(p50),
+        "p90_us": float(p90),
+        "p99_us": float(p99),
+    }
+
+
+def _time_calls(fn: Callable[[], None], n_calls: int) -> np.ndarray:
+    latencies = np.empty(n_calls, dtype=np.int64)
+    clock = time.perf_counter_ns
+    for i in range(n_calls):
+        t0 = clock()
+        fn()
+        latencies[i] = clock() - t0
+    return latencies
+
+
+def _random_valid(mask: np.ndarray, rng: np.random.Generator) -> int:
+    return int((rng.random(mask.shape) * mask).argmax())
+
+
+def bench_game_step(n_calls: int) -> dict:
+    rng = np.random.default_rng(0)
+    state = {"game": None, "seed": 0}
+
+    def new_game():
+        state["seed"] += 1
+        state["game"] = BuckshotRouletteGame(rng_seed=state["seed"])
+        state["game"].start_new_round()
+
+    new_game()
+
+    def step():
+        game = state["game"]
+        game.step(ACTION_MAP[_random_valid(game.get_valid_actions_mask(), rng)])
+        if game.player.hp <= 0 or game.dealer.hp <= 0:
+            new_game()
+
+    return _summarize(_time_calls(step, n_calls))
+
+
+def bench_batched_game_step(n_calls: int, n_games: int) -> dict:
+    rng = np.random.default_rng(0)
+    game = BatchedBuckshotGame(n_games, rng_seed=0)
+
+    def step():
+        masks = game.get_valid_actions_mask()
+        game.step((rng.random(masks.shape) * masks).argmax(axis=1))
+        done = game.is_terminal()
+        if done.any():
+            game.reset(done)
+
+    return _summarize(_time_calls(step, n_calls), ops_per_call=n_games)
+
+
+def bench_env(n_calls: int, opponent_policy=None) -> Dict[str, dict]:
+    rng = np.random.default_rng(0)
+    env = BuckshotRouletteEnv(opponent_policy=opponent_policy)
+    state = {"seed": 0}
+
+    def reset():
+        state["seed"] += 1
+        env.reset(seed=state["seed"])
+
+    results = {"reset": _summarize(_time_calls(reset, max(1, n_calls // 10)))}
+
+    reset()
+
+    def step():
+        _, _, terminated, truncated, _ = env.step(_random_valid(env.action_masks(), rng))
+        if terminated or truncated:
+            reset()
+
+    results["step"] = _summarize(_time_calls(step, n_calls))
+    results["get_obs"] = _summarize(_time_calls(env._get_obs, n_calls))
+    results["action_masks"] = _summarize(_time_calls(env.action_masks, n_calls))
+    return results
+
+
+def bench_vec_env(n_calls: int, n_envs: int, backend: str, opponent_model_path=None) -> dict:
+    from agent.train import create_vec_env
+
+    rng = np.random.default_rng(0)
+    env = create_vec_env(
+        n_envs,
+        opponent_model_path,
+        seed=0,
+        backend=backend,
+        inference_server=opponent_model_path is not None,
+    )
+    env.reset()
+
+    def step():
+        masks = np.stack(env.env_method("action_masks"))
+        env.step((rng.random(masks.shape) * masks).argmax(axis=1))
+
+    try:
+        return _summarize(_time_calls(step, n_calls), ops_per_call=n_envs)
+    finally:
+        env.close()
+
+
+def bench_search(n_moves: int, time_budget: float) -> dict:
+    """Rollouts per second of SearchPolicy with a per-move latency budget."""
+    from core.search import SearchPolicy
+    from agent.quantization import sample_states
+
+    obs, masks = sample_states(n_moves, seed=0, n_games=n_moves)
+    search = SearchPolicy(n_rollouts=1 << 20, time_budget=time_budget, seed=0)
+    state = {"i": 0}
+
+    def move():
+        i = state["i"] % n_moves
+        search(obs[i], masks[i])
+        state["i"] += 1
+
+    result = _summarize(_time_calls(move, n_moves))
+    result["ops_per_sec"] = search.rollouts_per_second
+    result["rollouts_per_move"] = search.rollouts / max(search.moves, 1)
+    return result
+
+
+def bench_policy(model_path: str, n_calls: int, precision: str, batch: int) -> dict:
+    """NumpyPolicy.act latency at a storage precision (quantized weights run as stored)."""
+    from agent.numpy_policy import NumpyPolicy
+    from agent.quantization import sample_states
+
+    policy = NumpyPolicy.load(model_path, precision=precision, deterministic=True)
+    obs, masks = sample_states(batch, seed=0)
+
+    def act():
+        policy.act(obs, masks)
+
+    result = _summarize(_time_calls(act, n_calls), ops_per_call=batch)
+    result["weight_bytes"] = policy.nbytes
+    return result
+
+
+def bench_arena(model_path: str, n_episodes: int, n_workers: Optional[int]) -> dict:
+    from agent.arena import evaluate_model_parallel, get_arena_pool
+
+    pool = get_arena_pool(n_workers)
+    # Warm-up: fork cost and model loads are paid once per run in training
+    evaluate_model_parallel(model_path, n_episodes=pool.n_workers, pool=pool)
+
+    t0 = time.perf_counter()
+    results = evaluate_model_parallel(
+        model_path, opponent_path=model_path, n_episodes=n_episodes, pool=pool
+    )
+    elapsed = time.perf_counter() - t0
+    return {
+        "games": results["total_episodes"],
+        "ops_per_sec": results["total_episodes"] / elapsed,
+        "seconds": elapsed,
+        "workers": pool.n_workers,
+    }
+
+
+def run_benchmarks(args) -> dict:
+    n = args.calls
+    results: Dict[str, dict] = {}
+
+    print("Benchmarking BuckshotRouletteGame.step ...")
+    results["game.step"] = bench_game_step(n)
+    for n_games in (256, 4096):
+        print(f"Benchmarking BatchedBuckshotGame.step (n={n_games}) ...")
+        results[f"batched_game.step[{n_games}]"] = bench_batched_game_step(
+            max(1, n // 100), n_games
+        )
+
+    print("Benchmarking BuckshotRouletteEnv (random opponent) ...")
+    for name, r in bench_env(n).items():
+        results[f"env.{name}[random]"] = r
+
+    if args.model:
+        from agent.arena import load_policy_for_env
+
+        print("Benchmarking BuckshotRouletteEnv (model opponent) ...")
+        opponent = load_policy_for_env(args.model, deterministic=False)
+        for name, r in bench_env(max(1, n // 10), opponent).items():
+            results[f"env.{name}[model]"] = r
+
+    if args.model:
+        for precision in ("float32", "float16", "int8"):
+            for batch in (1, 64):
+                print(f"Benchmarking NumpyPolicy.act ({precision}, batch={batch}) ...")
+                results[f"policy.act[{precision},{batch}]"] = bench_policy(
+                    args.model, max(1, n // 10), precision, batch
+                )
+
+    for backend in args.backends:
+        for n_envs in args.n_envs:
+            print(f"Benchmarking vec env rollouts ({backend}, n_envs={n_envs}) ...")
+            results[f"vec_env.step[{backend},{n_envs}]"] = bench_vec_env(
+                max(1, n // 100), n_envs, backend, args.model
+            )
+
+    for budget_ms in args.search_budgets:
+        print(f"Benchmarking SearchPolicy ({budget_ms} ms/move) ...")
+        results[f"search.rollouts[{budget_ms}ms]"] = bench_search(
+            args.search_moves, budget_ms / 1000
+        )
+
+    if args.model:
+        print("Benchmarking evaluate_model_parallel ...")
+        results["arena.games"] = bench_arena(args.model, args.arena_episodes, args.workers)
+
+    return results
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> bool:
+    """Print throughput ratios against a baseline; False if any fell below 1 - tolerance."""
+    ok = True
+    print(f"\n{'benchmark':<40} {'baseline':>14} {'current':>14} {'ratio':>8}")
+    for name, current in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        ratio = current["ops_per_sec"] / base["ops_per_sec"] if base["ops_per_sec"] else float("inf")
+        flag = ""
+        if ratio < 1.0 - tolerance:
+            flag = "  REGRESSION"
+            ok = False
+        print(
+            f"{name:<40} {base['ops_per_sec']:>14.0f} {current['ops_per_sec']:>14.0f} "
+            f"{ratio:>8.2f}{flag}"
+        )
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput benchmarks for the engine, envs and arena.")
+    parser.add_argument("--out", default="benchmark.json", help="Where to write results (JSON)")
+    parser.add_argument("--compare", help="Baseline JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="Allowed throughput drop (fraction)")
+    parser.add_argument("--calls", type=int, default=20000, help="Timed calls for scalar benchmarks")
+    parser.add_argument("--model", help="Model .zip for opponent and arena benchmarks")
+    parser.add_argument("--n-envs", type=int, nargs="+", default=[16, 64, 256])
+    parser.add_argument("--backends", nargs="+", default=["batched", "subproc"])
+    parser.add_argument("--arena-episodes", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--search-budgets", type=float, nargs="*", default=[5, 20], help="ms per move")
+    parser.add_argument("--search-moves", type=int, default=100)
+    args = parser.parse_args()
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": sys.version.split()[0],
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "results": run_benchmarks(args),
+    }
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.out}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+        if not compare(report["results"], baseline, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,11 @@
+import time
+
+import numpy as np
 from stable_baselines3.common.callbacks import BaseCallback
 from tqdm import tqdm
 
+from core.episode_stats import EPISODE_STATS_DTYPE, summarize
+
 
 class GenerationCallback(BaseCallback):
     """Callback to log generation-specific metrics."""
@@ -13,6 +18,41 @@ class GenerationCallback(BaseCallback):
         return True
 
 
+class EpisodeStatsCallback(BaseCallback):
+    """
+    Live training metrics from the envs' episode ring buffers.
+
+    At every rollout end the episodes finished by all envs are drained with
+    one env_method call (one round trip to every worker) and their summary
+    is logged under "episodes/". `summary` covers the whole learn() call.
+    """
+
+    def __init__(self, verbose=0):
+        super().__init__(verbose)
+        self._episodes = []
+        self.summary = {"episodes": 0}
+
+    def _drain(self):
+        rows = self.training_env.env_method("drain_episode_stats")
+        rows = [r for r in rows if len(r)]
+        if rows:
+            rows = np.concatenate(rows)
+            self._episodes.append(rows)
+            for key, value in summarize(rows).items():
+                self.logger.record(f"episodes/{key}", value)
+
+    def _on_rollout_end(self) -> None:
+        self._drain()
+
+    def _on_training_end(self) -> None:
+        self._drain()
+        episodes = np.concatenate(self._episodes) if self._episodes else np.zeros(0, EPISODE_STATS_DTYPE)
+        self.summary = summarize(episodes)
+
+    def _on_step(self) -> bool:
+        return True
+
+
 class ProgressCallback(BaseCallback):
     """
     Callback to update a TQDM progress bar during training.
@@ -34,3 +74,61 @@ class ProgressCallback(BaseCallback):
             self.last_reported = current_progress
 
         return True
+
+
+class ProfilingCallback(BaseCallback):
+    """
+    Times rollout collection and PPO updates inside `learn()`.
+
+    Rollout time runs from rollout start to rollout end; update time from
+    rollout end to the next rollout start (or the end of training).
+    """
+
+    def __init__(self, profiler, verbose=0):
+        super().__init__(verbose)
+        self.profiler = profiler
+        self._rollout_start = None
+        self._update_start = None
+        self._rollout_timesteps = 0
+
+    def _on_rollout_start(self) -> None:
+        now = time.perf_counter()
+        self._finish_update(now)
+        self._rollout_start = now
+        self._rollout_timesteps = self.model.num_timesteps
+
+    def _on_rollout_end(self) -> None:
+        now = time.perf_counter()
+        if self._rollout_start is not None:
+            self.profiler.add_time("rollout/collect", now - self._rollout_start)
+            self.profiler.count(
+                "rollout/env_steps", self.model.num_timesteps - self._rollout_timesteps
+            )
+        self._update_start = now
+
+    def _on_training_end(self) -> None:
+        self._finish_update(time.perf_counter())
+
+    def _finish_update(self, now: float) -> None:
+        if self._update_start is not None:
+            self.profiler.add_time("train/update", now - self._update_start)
+            self._update_start = None
+
+    def _on_step(self) -> bool:
+        return True
+
+
+class StopCallback(BaseCallback):
+    """Ends `learn()` early once `should_stop()` returns True (checked every `check_freq` calls)."""
+
+    def __init__(self, should_stop, check_freq: int = 64, verbose=0):
+        super().__init__(verbose)
+        self.should_stop = should_stop
+        self.check_freq = check_freq
+        self.stopped = False
+
+    def _on_step(self) -> bool:
+        if self.n_calls % self.check_freq == 0 and self.should_stop():
+            self.stopped = True
+            return False
+        return True
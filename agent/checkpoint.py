@@ -0,0 +1,156 @@
+import copy
+import os
+import queue
+import shutil
+import threading
+from pathlib import Path
+from typing import Optional, Sequence
+
+from stable_baselines3.common.save_util import save_to_zip_file
+
+from agent.numpy_policy import NumpyPolicy, artifact_path
+
+
+class ModelSnapshot:
+    """
+    In-memory copy of a MaskablePPO at one point in training.
+
+    Holds everything `model.save()` would write (taken synchronously, so
+    the model can keep training), the actor as a NumpyPolicy for arena
+    workers and opponents, and the policy weights to start the next
+    challenger from without reloading a .zip.
+    """
+
+    def __init__(self, model):
+        # What BaseAlgorithm.save() serializes, copied instead of written
+        data = model.__dict__.copy()
+        exclude = set(model._excluded_save_params())
+        state_dicts_names, torch_variable_names = model._get_torch_save_params()
+        for name in state_dicts_names + torch_variable_names:
+            exclude.add(name.split(".")[0])
+        for name in exclude:
+            data.pop(name, None)
+        self._data = copy.deepcopy(data)
+        self._params = copy.deepcopy(model.get_parameters())
+        self._pytorch_variables = None
+        if torch_variable_names:
+            self._pytorch_variables = {
+                name: copy.deepcopy(_getattr_path(model, name)) for name in torch_variable_names
+            }
+
+        self.num_timesteps = model.num_timesteps
+        self.actor = NumpyPolicy.from_model(model)
+
+    @property
+    def policy_state(self) -> dict:
+        return self._params["policy"]
+
+    def load_into(self, model, learning_rate: float, seed: Optional[int] = None):
+        """
+        Reset `model` to this snapshot as a new challenger.
+
+        Same result as MaskablePPO.load of the saved snapshot followed by
+        an optimizer reset, without the round trip through a .zip.
+        """
+        model.policy.load_state_dict(self.policy_state)
+        model.policy.optimizer = model.policy.optimizer.__class__(
+            model.policy.parameters(),
+            lr=learning_rate,  # type: ignore
+        )
+        model.num_timesteps = self.num_timesteps
+        if seed is not None:
+            model.set_random_seed(seed)
+
+    def save(self, path):
+        """Write the .zip `model.save(path)` would have written."""
+        save_to_zip_file(
+            path, data=self._data, params=self._params, pytorch_variables=self._pytorch_variables
+        )
+
+
+def _getattr_path(obj, path: str):
+    for name in path.split("."):
+        obj = getattr(obj, name)
+    return obj
+
+
+def _link(source: Path, target: Path):
+    """Atomically point `target` at `source`'s file (hardlink; copy across filesystems)."""
+    tmp = target.with_name(target.name + ".tmp")
+    tmp.unlink(missing_ok=True)
+    try:
+        os.link(source, tmp)
+    except OSError:
+        shutil.copy2(source, tmp)
+    os.replace(tmp, target)
+
+
+class CheckpointWriter:
+    """
+    Background thread persisting ModelSnapshots.
+
+    Each checkpoint's .zip and .policy artifact are written once (to a
+    temporary name, then renamed) and hardlinked to any further paths,
+    such as agent/models/champion.zip, instead of being saved or copied
+    again. Deletions go through the same queue, so a file is never removed
+    before it has been written. wait() blocks until everything submitted is
+    on disk and re-raises a failed write; call it before other processes
+    need the files.
+    """
+
+    def __init__(self):
+        self._queue: "queue.Queue" = queue.Queue()
+        self._error: Optional[BaseException] = None
+        self._thread = threading.Thread(target=self._run, daemon=True, name="checkpoints")
+        self._thread.start()
+
+    def submit(self, snapshot: ModelSnapshot, path, links: Sequence = ()):
+        self._queue.put((self._write, (snapshot, Path(path), [Path(p) for p in links])))
+
+    def remove(self, paths: Sequence):
+        """Delete files once everything submitted before has been written."""
+        self._queue.put((self._remove, ([Path(p) for p in paths],)))
+
+    def then(self, fn, *args):
+        """Call fn(*args) on the writer thread once everything submitted before has been written."""
+        self._queue.put((fn, args))
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                fn, args = item
+                fn(*args)
+            except BaseException as e:  # re-raised by wait()
+                self._error = e
+            finally:
+                self._queue.task_done()
+
+    @staticmethod
+    def _write(snapshot: ModelSnapshot, path: Path, links: Sequence[Path]):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.stem}.tmp{path.suffix}")
+        snapshot.save(tmp)
+        os.replace(tmp, path)
+        # Written after the .zip so it is never older than it
+        snapshot.actor.save_artifact(artifact_path(path))
+        for link in links:
+            _link(path, link)
+            _link(artifact_path(path), artifact_path(link))
+
+    @staticmethod
+    def _remove(paths: Sequence[Path]):
+        for path in paths:
+            path.unlink(missing_ok=True)
+
+    def wait(self):
+        self._queue.join()
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
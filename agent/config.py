@@ -1,6 +1,7 @@
 import numpy as np
 import torch
 from dataclasses import dataclass
+from typing import Optional
 
 
 @dataclass
@@ -17,6 +18,8 @@ class TrainingConfig:
     vf_coef: float = 0.5
     max_grad_norm: float = 0.5
     n_envs: int = 16
+    vec_env_backend: str = "subproc"  # "subproc" or "batched" (single process)
+    use_opponent_inference_server: bool = False  # "subproc": batch opponent moves centrally
 
     # Evaluation Settings
     eval_random_episodes: int = 5000
@@ -24,14 +27,50 @@ class TrainingConfig:
     random_win_threshold = 0.925
     win_threshold: float = 0.503  # 50.35% required to become the new king.
     use_paired_evaluation: bool = True  # Use Common Random Numbers (CRN)
+    use_stratified_evaluation: bool = False  # Stratify seeds by opening scenario (agent/scenarios.py)
+    # Evaluate each generation in the background while the next one trains from the
+    # likelier outcome; a wrong guess costs a retrain of that generation
+    pipeline_evaluation: bool = False
+
+    # Sequential early stopping (SPRT) for both arena matches
+    use_sequential_evaluation: bool = False
+    sprt_delta: float = 0.01  # Indifference zone: threshold ± delta
+    sprt_alpha: float = 0.05  # P(promote) when win rate <= threshold - delta
+    sprt_beta: float = 0.05  # P(reject) when win rate >= threshold + delta
+
+    # Game records: log every arena game (see core/records.py), ~1 MB per 2,500 games
+    record_arena_games: bool = False
+    records_dir: str = "agent/models/records"
 
     # Opponent Pool Settings
     pool_size: int = 10
+    # Training opponents: "single" (one pool member per generation), or a per-episode
+    # mixture over the whole pool, "uniform" or "loss_weighted" (by the challenger's loss rate)
+    opponent_mixture: str = "single"
+    opponent_mixture_floor: float = 0.05  # Minimum loss rate weight of any member
+
+    # League: round-robin ratings over the pool, cached across generations
+    use_league: bool = False
+    league_games: int = 500  # Per pairing (pairs of games when paired)
+    league_seed: int = 7_000_000
+    league_store: str = "agent/models/league.jsonl"
 
     # Paths
     models_dir: str = "agent/models"
     champions_dir: str = "agent/models/champions"
 
+    # CPU placement (agent/resources.py)
+    plan_resources: bool = False  # Split cores between learner, env workers and arena
+    pin_cpus: bool = False  # Also pin each process to its cores (Linux)
+    learner_threads: Optional[int] = None  # Torch threads of the learner (None: auto)
+    arena_workers: Optional[int] = None  # Arena processes (None: one per planned core)
+
+    # Profiling
+    profile: bool = False  # Per-phase timers, exported once per generation
+    profile_log: str = "agent/models/profile.jsonl"
+    profile_tensorboard_dir: Optional[str] = None
+    profile_sampling: bool = False  # SIGPROF sampling profiler on the main process
+
     # Global Seed
     seed: int = 42
 
@@ -0,0 +1,166 @@
+import ctypes
+import threading
+import time
+import multiprocessing as mp
+from typing import Callable, Optional, Sequence
+
+import numpy as np
+
+from core.constants import GAME_ACTIONS, OBS_SIZE
+
+
+class OpponentClient:
+    """
+    Opponent policy handed to a worker env: `client(obs, action_mask) -> int`.
+
+    Writes the request into its shared-memory slot, signals the server and
+    blocks until the server has written the action back. select() picks
+    which of the server's opponents answers this slot.
+    """
+
+    def __init__(self, server: "OpponentInferenceServer", slot: int):
+        self.slot = slot
+        self._obs = server._obs[slot]
+        self._mask = server._masks[slot]
+        self._actions = server._actions
+        self._pending = server._pending
+        self._request = server._request
+        self._ready = server._ready[slot]
+        self._opponent_ids = server._opponent_ids
+
+    def select(self, opponent: int):
+        """Use the server's opponent `opponent` for the following requests."""
+        self._opponent_ids[self.slot] = opponent
+
+    def __call__(self, obs: np.ndarray, action_mask: np.ndarray) -> int:
+        self._obs[:] = obs
+        self._mask[:] = action_mask
+        self._pending[self.slot] = 1
+        self._request.release()
+        self._ready.acquire()
+        return int(self._actions[self.slot])
+
+
+class OpponentInferenceServer:
+    """
+    Batched opponent inference for SubprocVecEnv workers.
+
+    Each worker owns one slot in shared memory (observation, action mask,
+    action). A thread in the main process waits for requests, gathers every
+    pending slot (waiting up to `max_wait` seconds for stragglers), runs one
+    batched forward pass and wakes the requesting workers. Only the main
+    process holds a copy of the network.
+
+    Create the server before forking the workers so they inherit the shared
+    buffers and semaphores. Without a policy the server answers with uniformly
+    random valid moves; set_policy() swaps the opponent between generations.
+    set_policies() serves a mixture instead: each slot names its opponent
+    (OpponentClient.select) and a batch runs one forward pass per opponent.
+    """
+
+    def __init__(
+        self,
+        batched_policy: Optional[Callable],
+        n_slots: int,
+        max_wait: float = 0.0002,
+        seed: Optional[int] = None,
+    ):
+        self.policies = [batched_policy]
+        self.rng = np.random.default_rng(seed)  # Random valid moves
+        self.n_slots = n_slots
+        self.max_wait = max_wait
+
+        ctx = mp.get_context("fork")
+        n_actions = len(GAME_ACTIONS)
+        self._obs = np.frombuffer(
+            mp.RawArray(ctypes.c_float, n_slots * OBS_SIZE), dtype=np.float32
+        ).reshape(n_slots, OBS_SIZE)
+        self._masks = np.frombuffer(
+            mp.RawArray(ctypes.c_int8, n_slots * n_actions), dtype=np.int8
+        ).reshape(n_slots, n_actions)
+        self._actions = np.frombuffer(
+            mp.RawArray(ctypes.c_int64, n_slots), dtype=np.int64
+        )
+        self._pending = np.frombuffer(
+            mp.RawArray(ctypes.c_int8, n_slots), dtype=np.int8
+        )
+        self._opponent_ids = np.frombuffer(
+            mp.RawArray(ctypes.c_int16, n_slots), dtype=np.int16
+        )
+        self._request = ctx.Semaphore(0)
+        self._ready = [ctx.Semaphore(0) for _ in range(n_slots)]
+
+        self._stopping = False
+        self._thread = None
+        self.batches_served = 0
+        self.requests_served = 0
+
+    @property
+    def policy(self) -> Optional[Callable]:
+        return self.policies[0]
+
+    def set_policy(self, batched_policy: Optional[Callable]):
+        """Swap the opponent; call only while no rollout is in progress."""
+        self.set_policies([batched_policy])
+
+    def set_policies(self, batched_policies: Sequence[Optional[Callable]]):
+        """Serve a mixture of opponents; call only while no rollout is in progress."""
+        self.policies = list(batched_policies)
+        self._opponent_ids[self._opponent_ids >= len(self.policies)] = 0
+
+    def client(self, slot: int) -> OpponentClient:
+        return OpponentClient(self, slot)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._serve, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        if self._thread is not None:
+            self._stopping = True
+            self._request.release()
+            self._thread.join()
+            self._thread = None
+            self._stopping = False
+
+    def _serve(self):
+        while True:
+            self._request.acquire()
+            if self._stopping:
+                return
+
+            # Give the other workers a moment to submit so they share this batch.
+            received = 1
+            deadline = time.perf_counter() + self.max_wait
+            while received < self.n_slots:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0 or not self._request.acquire(timeout=remaining):
+                    break
+                received += 1
+
+            slots = np.flatnonzero(self._pending)
+            if len(slots) == 0:
+                # Requests already answered as part of an earlier batch.
+                continue
+
+            if len(self.policies) == 1:
+                self._actions[slots] = self._predict(self.policies[0], slots)
+            else:
+                ids = self._opponent_ids[slots]
+                for k in np.unique(ids):
+                    group = slots[ids == k]
+                    self._actions[group] = self._predict(self.policies[k], group)
+            self._pending[slots] = 0
+            for slot in slots:
+                self._ready[slot].release()
+
+            self.batches_served += 1
+            self.requests_served += len(slots)
+
+    def _predict(self, policy: Optional[Callable], slots: np.ndarray) -> np.ndarray:
+        masks = self._masks[slots]
+        if policy is None:
+            return (self.rng.random(masks.shape) * masks).argmax(axis=1)
+        return policy(self._obs[slots], masks)
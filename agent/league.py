@@ -0,0 +1,215 @@
+import json
+from itertools import combinations
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from tqdm import tqdm
+
+from agent.arena import ArenaWorkerPool, _eval_batch, _match_jobs, file_hash, get_arena_pool
+
+# (model hash, opponent hash, first seed, games (pairs if paired), paired)
+MatchKey = Tuple[str, str, int, int, bool]
+
+
+class MatchStore:
+    """
+    Persistent match results, one JSON line per finished match.
+
+    A match is identified by the content hashes of both models, the seed
+    range it was played on and whether games were paired, so a result stays
+    valid however the files are renamed or moved.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.results: Dict[MatchKey, dict] = {}
+        if self.path.exists():
+            with open(self.path) as f:
+                for line in f:
+                    if line.strip():
+                        record = json.loads(line)
+                        self.results[self._key(record)] = record
+
+    @staticmethod
+    def _key(record: dict) -> MatchKey:
+        return (
+            record["model_hash"],
+            record["opponent_hash"],
+            record["seed"],
+            record["n_games"],
+            record["paired"],
+        )
+
+    def get(self, key: MatchKey) -> Optional[dict]:
+        return self.results.get(key)
+
+    def put(self, key: MatchKey, wins: int, losses: int, draws: int, **extra):
+        model_hash, opponent_hash, seed, n_games, paired = key
+        record = {
+            "model_hash": model_hash,
+            "opponent_hash": opponent_hash,
+            "seed": seed,
+            "n_games": n_games,
+            "paired": paired,
+            "wins": wins,
+            "losses": losses,
+            "draws": draws,
+            **extra,
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a") as f:
+            f.write(json.dumps(record) + "\n")
+        self.results[key] = record
+
+    def __len__(self) -> int:
+        return len(self.results)
+
+
+def _league_batch(args):
+    """Arena worker function: one _eval_batch job tagged with its pairing."""
+    pairing, job = args
+    return pairing, _eval_batch(job)
+
+
+def bradley_terry(
+    wins: np.ndarray, prior: float = 0.5, iterations: int = 500, tol: float = 1e-9
+) -> np.ndarray:
+    """
+    Bradley-Terry strengths from a matrix of (draw-adjusted) wins.
+
+    wins[i, j] counts i's wins over j. `prior` virtual wins each way for every
+    pair that has played keep undefeated players finite. Returns strengths
+    normalized to a geometric mean of 1 (MM algorithm, Hunter 2004).
+    """
+    n = len(wins)
+    played = (wins + wins.T) > 0
+    w = wins + prior * played
+    games = w + w.T
+    total_wins = w.sum(axis=1)
+    p = np.ones(n)
+    for _ in range(iterations):
+        denom = (games / (p[:, None] + p[None, :])).sum(axis=1)
+        new_p = np.where(denom > 0, total_wins / np.maximum(denom, 1e-300), p)
+        new_p /= np.exp(np.log(new_p).mean())
+        if np.abs(new_p - p).max() < tol:
+            p = new_p
+            break
+        p = new_p
+    return p
+
+
+class League:
+    """
+    Round-robin ratings over the opponent pool, backed by a MatchStore.
+
+    Every pair of members plays the same `n_games` (seed range starting at
+    `seed`) once; run_gauntlet() only schedules pairings missing from the
+    store and runs all of their batches together on the arena workers.
+    Ratings are Bradley-Terry strengths on the Elo scale (1500 = average).
+    """
+
+    def __init__(
+        self,
+        store_path: str,
+        n_games: int = 500,
+        seed: int = 0,
+        use_paired_games: bool = True,
+        deterministic: bool = True,
+    ):
+        self.store = MatchStore(store_path)
+        self.n_games = n_games
+        self.seed = seed
+        self.use_paired_games = use_paired_games
+        self.deterministic = deterministic
+        self._hashes: Dict[str, Tuple[float, str]] = {}  # path -> (mtime, hash)
+
+    def _hash(self, path) -> str:
+        path = str(path)
+        mtime = Path(path).stat().st_mtime
+        cached = self._hashes.get(path)
+        if cached is None or cached[0] != mtime:
+            cached = (mtime, file_hash(path))
+            self._hashes[path] = cached
+        return cached[1]
+
+    def _key(self, model_hash: str, opponent_hash: str) -> MatchKey:
+        return (model_hash, opponent_hash, self.seed, self.n_games, self.use_paired_games)
+
+    def pairings(self, paths: Sequence) -> List[Tuple[str, str]]:
+        """Every pair of distinct models, ordered by content hash."""
+        by_hash = {self._hash(p): str(p) for p in paths}
+        return [(by_hash[a], by_hash[b]) for a, b in combinations(sorted(by_hash), 2)]
+
+    def missing_pairings(self, paths: Sequence) -> List[Tuple[str, str]]:
+        return [
+            (a, b)
+            for a, b in self.pairings(paths)
+            if self.store.get(self._key(self._hash(a), self._hash(b))) is None
+        ]
+
+    def run_gauntlet(
+        self,
+        paths: Sequence,
+        pool: Optional[ArenaWorkerPool] = None,
+        n_workers: Optional[int] = None,
+    ) -> int:
+        """Play every missing pairing among `paths`; returns the number played."""
+        missing = self.missing_pairings(paths)
+        if not missing:
+            return 0
+
+        pool = pool or get_arena_pool(n_workers)
+        jobs, remaining = [], []
+        for i, (model_path, opponent_path) in enumerate(missing):
+            pair_jobs = _match_jobs(
+                model_path,
+                opponent_path,
+                self.n_games,
+                self.deterministic,
+                self.seed,
+                self.use_paired_games,
+                pool.n_workers,
+            )
+            jobs += [(i, job) for job in pair_jobs]
+            remaining.append(len(pair_jobs))
+
+        totals = np.zeros((len(missing), 3), dtype=np.int64)
+        results = pool.imap_unordered(_league_batch, jobs)
+        for i, result in tqdm(results, total=len(jobs), desc="League", leave=False):
+            totals[i] += result[:3]
+            remaining[i] -= 1
+            if remaining[i] == 0:
+                model_path, opponent_path = missing[i]
+                self.store.put(
+                    self._key(self._hash(model_path), self._hash(opponent_path)),
+                    *(int(x) for x in totals[i]),
+                    model=Path(model_path).name,
+                    opponent=Path(opponent_path).name,
+                )
+        return len(missing)
+
+    def win_matrix(self, paths: Sequence) -> np.ndarray:
+        """wins[i, j]: games i won against j (draws count half) in stored matches."""
+        hashes = [self._hash(p) for p in paths]
+        wins = np.zeros((len(paths), len(paths)))
+        for i, j in combinations(range(len(paths)), 2):
+            for a, b in ((i, j), (j, i)):
+                record = self.store.get(self._key(hashes[a], hashes[b]))
+                if record is not None:
+                    wins[a, b] += record["wins"] + 0.5 * record["draws"]
+                    wins[b, a] += record["losses"] + 0.5 * record["draws"]
+        return wins
+
+    def ratings(self, paths: Sequence) -> Dict[str, float]:
+        """Elo-scale Bradley-Terry rating of each model (by file name)."""
+        if not paths:
+            return {}
+        strengths = bradley_terry(self.win_matrix(paths))
+        return {
+            Path(p).name: 1500.0 + 400.0 * np.log10(s) for p, s in zip(paths, strengths)
+        }
+
+    def report(self, paths: Sequence) -> str:
+        ratings = sorted(self.ratings(paths).items(), key=lambda kv: -kv[1])
+        return "\n".join(f"  {rating:7.1f}  {name}" for name, rating in ratings)
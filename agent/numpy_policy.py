@@ -0,0 +1,325 @@
+import json
+import os
+import struct
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+
+# Value used by SB3's MaskableCategorical for masked-out logits
+_MASKED_LOGIT = -1e8
+
+PRECISIONS = ("float32", "float16", "int8")
+
+# Inference-only artifact: magic, header length, JSON header, aligned arrays
+ARTIFACT_SUFFIX = ".policy"
+_ARTIFACT_MAGIC = b"BSPOLICY"
+_ARTIFACT_VERSION = 2  # 1: float32 only; 2: per-array dtypes (quantized weights)
+_ARTIFACT_ALIGN = 64
+
+
+def artifact_path(model_path, precision: str = "float32") -> Path:
+    """
+    Where the inference-only artifact of a saved model .zip lives.
+
+    model.zip -> model.policy, or model.int8.policy / model.float16.policy
+    for weights stored quantized.
+    """
+    model_path = Path(model_path)
+    if precision == "float32":
+        return model_path.with_suffix(ARTIFACT_SUFFIX)
+    return model_path.with_suffix(f".{precision}{ARTIFACT_SUFFIX}")
+
+
+def _fresh_artifact(model_path, precision: str = "float32") -> Optional[Path]:
+    """The model's artifact, if it exists and is not older than the .zip."""
+    model_path = Path(model_path)
+    if model_path.suffix == ARTIFACT_SUFFIX:
+        return model_path if precision == "float32" else None
+    path = artifact_path(model_path, precision)
+    try:
+        if path.stat().st_mtime >= model_path.stat().st_mtime:
+            return path
+    except FileNotFoundError:
+        pass
+    return None
+
+
+def ensure_artifact(model_path, precision: str = "float32") -> Path:
+    """
+    Make sure `model_path` has an up-to-date artifact at `precision`.
+
+    Call it in the parent process before handing a model to workers: each
+    worker then memory-maps the same file read-only (one copy of the
+    weights in the page cache, shared by every process) instead of loading
+    the .zip or quantizing its own copy.
+    """
+    path = _fresh_artifact(model_path, precision)
+    if path is None:
+        policy = NumpyPolicy.load(str(model_path))
+        if precision != "float32":
+            policy = policy.quantize(precision)
+        path = policy.save_artifact(artifact_path(model_path, precision))
+    return path
+
+_ACTIVATIONS = {
+    "Tanh": np.tanh,
+    "ReLU": lambda x: np.maximum(x, 0.0),
+    "Identity": lambda x: x,
+}
+
+
+class NumpyPolicy:
+    """
+    Torch-free actor of a MaskablePPO MlpPolicy.
+
+    Holds the `mlp_extractor.policy_net` and `action_net` weights (the path
+    converter.py exports) and evaluates them with NumPy matmuls. Works on a
+    single observation or a batch, with masked argmax or masked sampling.
+
+    predict() follows the SB3 signature so it can stand in for
+    `model.predict`; calling the object directly gives the opponent-policy
+    interface `policy(obs, action_mask) -> int`.
+
+    `precision` selects how the weights are stored:
+      - "float32": as trained.
+      - "float16": half-precision storage.
+      - "int8": symmetric per-output-channel int8 weights.
+    Every precision runs on its stored arrays (float16 weights promoted in
+    the matmul, int8 outputs rescaled per channel), with no float32 copy.
+    NumPy has no int8/float16 kernel faster than float32 BLAS, so quantized
+    policies are smaller but not faster: they serve parity checks and
+    compact artifacts, while training and arena opponents run float32.
+    """
+
+    def __init__(
+        self,
+        weights: List[np.ndarray],
+        biases: List[np.ndarray],
+        activations: List[str],
+        deterministic: bool = False,
+        rng: Optional[np.random.Generator] = None,
+        precision: str = "float32",
+        scales: Optional[List[np.ndarray]] = None,
+    ):
+        if precision not in PRECISIONS:
+            raise ValueError(f"Unknown precision: {precision} (expected one of {PRECISIONS})")
+
+        # weights[i] has shape (in_features, out_features); the last layer is action_net
+        self.precision = precision
+        self.biases = [np.asarray(b, dtype=np.float32) for b in biases]
+        self.activations = activations
+        self._activation_fns = [_ACTIVATIONS[name] for name in activations]
+        self.deterministic = deterministic
+        self.rng = rng or np.random.default_rng()
+
+        self.scales: Optional[List[np.ndarray]] = None
+        if precision == "int8" and scales is not None:
+            # Already quantized (e.g. a memory-mapped int8 artifact): used in place
+            self.weights = [np.asarray(w, dtype=np.int8) for w in weights]
+            self.scales = [np.asarray(s, dtype=np.float32) for s in scales]
+        elif precision == "int8":
+            self.weights, self.scales = [], []
+            for w in weights:
+                w = np.asarray(w, dtype=np.float32)
+                scale = np.abs(w).max(axis=0) / 127.0
+                scale[scale == 0] = 1.0
+                self.weights.append(np.round(w / scale).astype(np.int8))
+                self.scales.append(scale.astype(np.float32))
+        else:
+            self.weights = [np.asarray(w, dtype=precision) for w in weights]
+
+    @classmethod
+    def from_model(cls, model, **kwargs) -> "NumpyPolicy":
+        """Extract the actor MLP from a loaded MaskablePPO."""
+        import torch.nn as nn
+
+        policy = model.policy
+        weights, biases, activations = [], [], []
+        for module in policy.mlp_extractor.policy_net:
+            if isinstance(module, nn.Linear):
+                weights.append(module.weight.detach().cpu().numpy().T.copy())
+                biases.append(module.bias.detach().cpu().numpy().copy())
+                activations.append("Identity")
+            else:
+                name = type(module).__name__
+                if name not in _ACTIVATIONS:
+                    raise ValueError(f"Unsupported activation in policy_net: {name}")
+                activations[-1] = name
+
+        action_net = policy.action_net
+        weights.append(action_net.weight.detach().cpu().numpy().T.copy())
+        biases.append(action_net.bias.detach().cpu().numpy().copy())
+        activations.append("Identity")
+
+        return cls(weights, biases, activations, **kwargs)
+
+    @classmethod
+    def load(cls, model_path: str, precision: str = "float32", **kwargs) -> "NumpyPolicy":
+        """
+        Load the actor of a saved model at `precision`.
+
+        Uses the model's inference-only artifact when one is up to date
+        (milliseconds, no SB3 import): the one stored at `precision` if it
+        exists, else the float32 one, quantized here. Otherwise loads the
+        MaskablePPO .zip and keeps only its actor weights.
+        """
+        path = _fresh_artifact(model_path, precision)
+        if path is not None:
+            return cls.load_artifact(path, **kwargs)
+
+        path = _fresh_artifact(model_path)
+        if path is not None:
+            policy = cls.load_artifact(path, **kwargs)
+        else:
+            from sb3_contrib import MaskablePPO
+
+            policy = cls.from_model(MaskablePPO.load(model_path, device="cpu"), **kwargs)
+        return policy if precision == "float32" else policy.quantize(precision)
+
+    def save_artifact(self, path) -> Path:
+        """
+        Write the actor weights, at this policy's precision, as an inference-only artifact.
+
+        Layout: 8-byte magic, uint32 header length, JSON header (activations
+        and array names/dtypes/offsets/shapes), then the weight, bias (and
+        int8 scale) arrays, each 64-byte aligned so load_artifact() can
+        memory-map them in place. Written to a temporary file and renamed,
+        so readers never see a partial artifact.
+        """
+        path = Path(path)
+        arrays = []
+        for i, (w, b) in enumerate(zip(self.weights, self.biases)):
+            arrays += [(f"w{i}", w), (f"b{i}", b)]
+            if self.scales is not None:
+                arrays.append((f"s{i}", self.scales[i]))
+
+        entries, offset = [], 0
+        for name, a in arrays:
+            dtype = a.dtype.newbyteorder("<").str
+            entries.append({"name": name, "dtype": dtype, "shape": list(a.shape), "offset": offset})
+            offset += -(-a.nbytes // _ARTIFACT_ALIGN) * _ARTIFACT_ALIGN
+        header = json.dumps(
+            {
+                "version": _ARTIFACT_VERSION,
+                "precision": self.precision,
+                "activations": self.activations,
+                "arrays": entries,
+            }
+        ).encode()
+        prefix = len(_ARTIFACT_MAGIC) + 4 + len(header)
+        data_start = -(-prefix // _ARTIFACT_ALIGN) * _ARTIFACT_ALIGN
+        header += b" " * (data_start - prefix)
+
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(_ARTIFACT_MAGIC + struct.pack("<I", len(header)) + header)
+            for entry, (_, a) in zip(entries, arrays):
+                f.seek(data_start + entry["offset"])
+                f.write(np.ascontiguousarray(a, dtype=entry["dtype"]).tobytes())
+        os.replace(tmp_path, path)
+        return path
+
+    @classmethod
+    def load_artifact(cls, path, **kwargs) -> "NumpyPolicy":
+        """
+        Memory-map an artifact written by save_artifact().
+
+        The policy uses the mapped arrays in place (read-only), so every
+        process loading the same artifact shares one copy of the weights.
+        """
+        with open(path, "rb") as f:
+            magic = f.read(len(_ARTIFACT_MAGIC))
+            if magic != _ARTIFACT_MAGIC:
+                raise ValueError(f"{path} is not a policy artifact")
+            (header_len,) = struct.unpack("<I", f.read(4))
+            header = json.loads(f.read(header_len))
+        if header["version"] not in (1, _ARTIFACT_VERSION):
+            raise ValueError(f"Unsupported policy artifact version: {header['version']}")
+
+        data_start = len(_ARTIFACT_MAGIC) + 4 + header_len
+        data = np.memmap(path, dtype=np.uint8, mode="r", offset=data_start)
+        arrays = {}
+        for entry in header["arrays"]:
+            dtype = entry.get("dtype", header.get("dtype"))
+            arrays[entry["name"]] = np.ndarray(
+                entry["shape"], dtype=dtype, buffer=data, offset=entry["offset"]
+            )
+
+        n_layers = len(header["activations"])
+        weights = [arrays[f"w{i}"] for i in range(n_layers)]
+        biases = [arrays[f"b{i}"] for i in range(n_layers)]
+        precision = header.get("precision", "float32")
+        scales = [arrays[f"s{i}"] for i in range(n_layers)] if precision == "int8" else None
+        return cls(weights, biases, header["activations"], precision=precision, scales=scales, **kwargs)
+
+    def float_weights(self) -> List[np.ndarray]:
+        """Weights as float32 (dequantized for int8)."""
+        if self.precision == "int8":
+            return [w * s for w, s in zip(self.weights, self.scales)]
+        return [w.astype(np.float32, copy=False) for w in self.weights]
+
+    def quantize(self, precision: str) -> "NumpyPolicy":
+        """Copy of this policy stored at another precision ("float32", "float16", "int8")."""
+        return type(self)(
+            self.float_weights(),
+            self.biases,
+            self.activations,
+            deterministic=self.deterministic,
+            rng=self.rng,
+            precision=precision,
+        )
+
+    @property
+    def nbytes(self) -> int:
+        arrays = self.weights + self.biases + (self.scales or [])
+        return sum(a.nbytes for a in arrays)
+
+    def logits(self, obs: np.ndarray) -> np.ndarray:
+        x = np.asarray(obs, dtype=np.float32)
+        if self.scales is not None:
+            for w, s, b, act in zip(self.weights, self.scales, self.biases, self._activation_fns):
+                x = act((x @ w) * s + b)
+            return x
+        for w, b, act in zip(self.weights, self.biases, self._activation_fns):
+            x = act(x @ w + b)
+        return x
+
+    def act(
+        self,
+        obs: np.ndarray,
+        action_masks: Optional[np.ndarray] = None,
+        deterministic: Optional[bool] = None,
+        rng: Optional[np.random.Generator] = None,
+    ) -> np.ndarray:
+        """Actions for a batch of observations (k, obs_size) -> (k,); samples with `rng` or self.rng."""
+        if deterministic is None:
+            deterministic = self.deterministic
+        logits = self.logits(obs)
+        if action_masks is not None:
+            logits = np.where(np.asarray(action_masks, dtype=bool), logits, _MASKED_LOGIT)
+        if not deterministic:
+            # Gumbel-max: argmax(logits + Gumbel noise) samples softmax(logits)
+            rng = self.rng if rng is None else rng
+            logits = logits - np.log(-np.log(rng.random(logits.shape)))
+        return logits.argmax(axis=-1)
+
+    def predict(
+        self,
+        observation: np.ndarray,
+        state=None,
+        episode_start=None,
+        deterministic: bool = False,
+        action_masks: Optional[np.ndarray] = None,
+    ):
+        observation = np.asarray(observation, dtype=np.float32)
+        single = observation.ndim == 1
+        if single:
+            observation = observation[None]
+            if action_masks is not None:
+                action_masks = np.asarray(action_masks).reshape(1, -1)
+        actions = self.act(observation, action_masks, deterministic)
+        return (actions[0] if single else actions), None
+
+    def __call__(self, obs: np.ndarray, action_mask: np.ndarray) -> int:
+        return int(self.act(obs[None], action_mask[None])[0])
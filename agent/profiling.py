@@ -0,0 +1,154 @@
+import json
+import signal
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional
+
+
+class Profiler:
+    """
+    Named wall-clock timers and counters.
+
+    Cheap enough to leave on in env workers: each timed section adds one
+    dict update. snapshot() returns a plain picklable dict, so worker
+    profilers can be shipped to the main process and merged. Updates are
+    locked, so threads (the evaluation pipeline) can share one profiler.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.timers: Dict[str, list] = {}  # name -> [total seconds, calls]
+        self.counters: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def timer(self, name: str):
+        if not self.enabled:
+            yield
+            return
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - t0)
+
+    def add_time(self, name: str, seconds: float, calls: int = 1):
+        with self._lock:
+            entry = self.timers.get(name)
+            if entry is None:
+                self.timers[name] = [seconds, calls]
+            else:
+                entry[0] += seconds
+                entry[1] += calls
+
+    def count(self, name: str, n: int = 1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def snapshot(self, reset: bool = False) -> dict:
+        with self._lock:
+            snap = {
+                "timers": {k: {"seconds": v[0], "calls": v[1]} for k, v in self.timers.items()},
+                "counters": dict(self.counters),
+            }
+            if reset:
+                self.timers, self.counters = {}, {}
+        return snap
+
+    def merge(self, snapshot: dict, prefix: str = ""):
+        """Add another profiler's snapshot (e.g. from a worker) into this one."""
+        for name, t in snapshot["timers"].items():
+            self.add_time(prefix + name, t["seconds"], t["calls"])
+        for name, n in snapshot["counters"].items():
+            self.count(prefix + name, n)
+
+    def reset(self):
+        with self._lock:
+            self.timers = {}
+            self.counters = {}
+
+    def detach(self) -> "Profiler":
+        """Move the timings so far into a new Profiler and reset this one, atomically."""
+        detached = Profiler(self.enabled)
+        with self._lock:
+            detached.timers, detached.counters = self.timers, self.counters
+            self.timers, self.counters = {}, {}
+        return detached
+
+    def report(self) -> str:
+        lines = [f"{'section':<32} {'seconds':>10} {'calls':>10} {'us/call':>10}"]
+        for name, (seconds, calls) in sorted(self.timers.items()):
+            per_call = seconds / calls * 1e6 if calls else 0.0
+            lines.append(f"{name:<32} {seconds:>10.2f} {calls:>10} {per_call:>10.1f}")
+        for name, n in sorted(self.counters.items()):
+            lines.append(f"{name:<32} {n:>32}")
+        return "\n".join(lines)
+
+    def export_json(self, path: str, **extra):
+        """Append this profiler's snapshot as one JSON line (e.g. per generation)."""
+        with open(path, "a") as f:
+            f.write(json.dumps({**extra, **self.snapshot()}) + "\n")
+
+    def export_tensorboard(self, writer, step: int):
+        """Write timers and counters as scalars to a SummaryWriter-like object."""
+        for name, (seconds, calls) in self.timers.items():
+            writer.add_scalar(f"profile/{name}/seconds", seconds, step)
+            writer.add_scalar(f"profile/{name}/calls", calls, step)
+        for name, n in self.counters.items():
+            writer.add_scalar(f"profile/{name}", n, step)
+        writer.flush()
+
+
+# Process-global profiler: each worker process has its own (forked) copy.
+# Off until the training run enables it (config.profile) before forking workers.
+PROFILER = Profiler(enabled=False)
+
+
+def timed(profiler: Profiler, name: str, fn: Optional[Callable]) -> Optional[Callable]:
+    """Wrap a callable (e.g. an opponent policy) so every call is timed under `name`."""
+    if fn is None or not profiler.enabled:
+        return fn
+
+    def wrapper(*args, **kwargs):
+        t0 = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            profiler.add_time(name, time.perf_counter() - t0)
+
+    return wrapper
+
+
+class SamplingProfiler:
+    """
+    Statistical profiler for the main thread based on SIGPROF.
+
+    Every `interval` seconds of CPU time the innermost frame is recorded as
+    "file:function"; top() lists the hottest ones. Unix only.
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.samples: Counter = Counter()
+
+    def _handler(self, signum, frame):
+        if frame is not None:
+            code = frame.f_code
+            self.samples[f"{code.co_filename}:{code.co_name}"] += 1
+
+    def start(self):
+        signal.signal(signal.SIGPROF, self._handler)
+        signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+        return self
+
+    def stop(self):
+        signal.setitimer(signal.ITIMER_PROF, 0, 0)
+        signal.signal(signal.SIGPROF, signal.SIG_DFL)
+
+    def top(self, n: int = 20) -> Dict[str, int]:
+        return dict(self.samples.most_common(n))
+
+    def reset(self):
+        self.samples.clear()
@@ -0,0 +1,107 @@
+import argparse
+from typing import Tuple
+
+import numpy as np
+
+from core.batched import BatchedBuckshotGame
+from agent.numpy_policy import NumpyPolicy, PRECISIONS, _MASKED_LOGIT, ensure_artifact
+
+
+def sample_states(
+    n_states: int, seed: int = 0, n_games: int = 1024
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Observations and action masks of the side to move, from random self-play.
+
+    Returns (obs, masks) of shape (n_states, OBS_SIZE) and (n_states, n_actions).
+    """
+    game = BatchedBuckshotGame(n_games, rng_seed=seed)
+    rng = np.random.default_rng(seed)
+    obs, masks = [], []
+    collected = 0
+    while collected < n_states:
+        mask = game.get_valid_actions_mask()
+        obs.append(game.get_obs(game.turn))
+        masks.append(mask)
+        collected += n_games
+
+        game.step((rng.random(mask.shape) * mask).argmax(axis=1))
+        done = game.is_terminal()
+        if done.any():
+            game.reset(done)
+
+    return np.concatenate(obs)[:n_states], np.concatenate(masks)[:n_states]
+
+
+def _masked_probs(logits: np.ndarray, masks: np.ndarray) -> np.ndarray:
+    logits = np.where(masks.astype(bool), logits, _MASKED_LOGIT)
+    logits = logits - logits.max(axis=1, keepdims=True)
+    probs = np.exp(logits)
+    return probs / probs.sum(axis=1, keepdims=True)
+
+
+def parity_check(
+    reference: NumpyPolicy,
+    candidate: NumpyPolicy,
+    obs: np.ndarray,
+    masks: np.ndarray,
+) -> dict:
+    """
+    Compare a (quantized) policy against its float32 reference on the same states.
+
+    Reports the agreement of the greedy masked action, the total variation
+    distance between the masked action distributions (what a stochastic
+    opponent samples from) and the largest logit error.
+    """
+    ref_logits = reference.logits(obs)
+    cand_logits = candidate.logits(obs)
+    ref_actions = reference.act(obs, masks, deterministic=True)
+    cand_actions = candidate.act(obs, masks, deterministic=True)
+    tv = 0.5 * np.abs(_masked_probs(ref_logits, masks) - _masked_probs(cand_logits, masks)).sum(axis=1)
+    return {
+        "precision": candidate.precision,
+        "states": len(obs),
+        "action_agreement": float((ref_actions == cand_actions).mean()),
+        "mean_tv_distance": float(tv.mean()),
+        "max_tv_distance": float(tv.max()),
+        "max_logit_error": float(np.abs(ref_logits - cand_logits).max()),
+        "weight_bytes": candidate.nbytes,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Quantize a policy and check its parity with float32.")
+    parser.add_argument("--model", default="agent/models/champion.zip")
+    parser.add_argument("--precision", nargs="+", default=["float16", "int8"], choices=PRECISIONS)
+    parser.add_argument("--states", type=int, default=200_000, help="Game states to compare on")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--min-agreement", type=float, default=0.99, help="Exit with code 1 below this action agreement"
+    )
+    parser.add_argument(
+        "--save", action="store_true", help="Write the quantized artifacts next to the model"
+    )
+    args = parser.parse_args()
+
+    reference = NumpyPolicy.load(args.model)
+    obs, masks = sample_states(args.states, args.seed)
+    print(f"Comparing on {len(obs)} states (float32 weights: {reference.nbytes} bytes)")
+
+    ok = True
+    for precision in args.precision:
+        r = parity_check(reference, reference.quantize(precision), obs, masks)
+        print(
+            f"  {precision:<8} agreement {r['action_agreement']:.4%}  "
+            f"TV mean {r['mean_tv_distance']:.5f} max {r['max_tv_distance']:.4f}  "
+            f"max logit err {r['max_logit_error']:.4f}  {r['weight_bytes']} bytes"
+        )
+        ok &= r["action_agreement"] >= args.min_agreement
+        if args.save:
+            print(f"  {'':<8} written to {ensure_artifact(args.model, precision)}")
+
+    if not ok:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+import argparse
+import os
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+_THREAD_ENV_VARS = ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS")
+
+
+def available_cpus() -> List[int]:
+    """Logical CPUs this process may run on."""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def physical_cores(cpus: Optional[Sequence[int]] = None) -> List[List[int]]:
+    """
+    Group logical CPUs into physical cores (SMT siblings together).
+
+    Reads the Linux sysfs topology; elsewhere every CPU is its own core.
+    Cores are ordered by package, then core id, so consecutive cores share
+    a socket.
+    """
+    cpus = available_cpus() if cpus is None else list(cpus)
+    groups: Dict[tuple, List[int]] = {}
+    for cpu in cpus:
+        topology = Path(f"/sys/devices/system/cpu/cpu{cpu}/topology")
+        try:
+            key = (
+                int((topology / "physical_package_id").read_text()),
+                int((topology / "core_id").read_text()),
+            )
+        except (OSError, ValueError):
+            key = (0, cpu)
+        groups.setdefault(key, []).append(cpu)
+    return [groups[key] for key in sorted(groups)]
+
+
+def limit_threads(n_threads: int):
+    """Cap this process' torch and BLAS thread pools at `n_threads`."""
+    for var in _THREAD_ENV_VARS:
+        os.environ[var] = str(n_threads)  # libraries loaded from now on
+    if "torch" in sys.modules:
+        sys.modules["torch"].set_num_threads(n_threads)
+    try:
+        # BLAS already loaded by NumPy ignores the environment variables
+        from threadpoolctl import threadpool_limits
+
+        threadpool_limits(n_threads)
+    except ImportError:
+        pass
+
+
+def configure_process(cpus: Optional[Sequence[int]], n_threads: int, pin: bool = False):
+    """Thread limits for this process and, with `pin`, CPU affinity to `cpus`."""
+    limit_threads(n_threads)
+    if pin and cpus and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cpus)
+
+
+def _format_cpus(cpus: Sequence[int]) -> str:
+    """[0, 1, 2, 5] -> "0-2,5"."""
+    cpus = sorted(set(cpus))
+    if not cpus:
+        return "-"
+    ranges, start = [], cpus[0]
+    for prev, cpu in zip(cpus, cpus[1:] + [None]):
+        if cpu != prev + 1:
+            ranges.append(f"{start}-{prev}" if prev != start else f"{start}")
+            start = cpu
+    return ",".join(ranges)
+
+
+class ResourcePlan:
+    """
+    CPU sets and thread counts for the learner, env workers and arena workers.
+
+    Every worker process runs single-threaded on its own physical core
+    where possible; the learner gets one torch thread per physical core it
+    owns. Built by plan_resources(); applied by configure_process() in
+    each process (affinity only with `pin`).
+    """
+
+    def __init__(
+        self,
+        learner_cpus: List[int],
+        learner_threads: int,
+        env_cpus: List[List[int]],
+        arena_cpus: List[List[int]],
+        pin: bool = False,
+        n_cores: int = 0,
+        overlap_arena: bool = False,
+    ):
+        self.learner_cpus = learner_cpus
+        self.learner_threads = learner_threads
+        self.env_cpus = env_cpus  # One CPU set per env worker process (empty: in-process envs)
+        self.arena_cpus = arena_cpus  # One CPU set per arena worker
+        self.pin = pin
+        self.n_cores = n_cores
+        self.overlap_arena = overlap_arena  # Arena runs while training (pipelined evaluation)
+
+    @property
+    def n_arena_workers(self) -> int:
+        return len(self.arena_cpus)
+
+    def env_worker_cpus(self, rank: int) -> Optional[List[int]]:
+        return self.env_cpus[rank % len(self.env_cpus)] if self.env_cpus else None
+
+    def roles(self) -> Dict[str, List[int]]:
+        """Logical CPUs used by each role."""
+        return {
+            "learner": sorted(set(self.learner_cpus)),
+            "env workers": sorted({c for cpus in self.env_cpus for c in cpus}),
+            "arena": sorted({c for cpus in self.arena_cpus for c in cpus}),
+        }
+
+    def report(self) -> str:
+        n_cpus = len({c for cpus in self.roles().values() for c in cpus})
+        lines = [
+            f"Resource plan: {n_cpus} logical CPUs on {self.n_cores} physical cores, "
+            f"pinning {'on' if self.pin else 'off'}"
+        ]
+        rows = [
+            ("learner", 1, self.learner_threads, self.learner_cpus),
+            ("env workers", len(self.env_cpus), 1, self.roles()["env workers"]),
+            ("arena", len(self.arena_cpus), 1, self.roles()["arena"]),
+        ]
+        for name, processes, threads, cpus in rows:
+            if processes:
+                lines.append(
+                    f"  {name:<12} {processes:>4} x {threads} thread(s)  cpus {_format_cpus(cpus)}"
+                )
+        n_env_cores = len(physical_cores(self.roles()["env workers"])) if self.env_cpus else 0
+        if len(self.env_cpus) > n_env_cores > 0:
+            lines.append(
+                f"  note: {len(self.env_cpus)} env workers share {n_env_cores} cores "
+                f"({len(self.env_cpus) / n_env_cores:.1f} per core)"
+            )
+        if self.overlap_arena:
+            # The arena runs at the same time as training: shared CPUs are oversubscribed
+            roles = self.roles()
+            for name in ("learner", "env workers"):
+                shared = set(roles["arena"]).intersection(roles[name])
+                if shared:
+                    lines.append(
+                        f"  warning: arena shares cpus {_format_cpus(shared)} with the {name} "
+                        f"while both run"
+                    )
+        return "\n".join(lines)
+
+    def utilization(self, busy: Dict[int, float]) -> Dict[str, float]:
+        """Mean busy fraction of each role's CPUs, from CpuUsage.delta()."""
+        result = {}
+        for name, cpus in self.roles().items():
+            values = [busy[c] for c in cpus if c in busy]
+            if values:
+                result[name] = sum(values) / len(values)
+        if busy:
+            result["all"] = sum(busy.values()) / len(busy)
+        return result
+
+
+def plan_resources(
+    n_envs: int,
+    backend: str = "batched",
+    arena_workers: Optional[int] = None,
+    learner_threads: Optional[int] = None,
+    overlap_arena: bool = False,
+    pin: bool = False,
+    cpus: Optional[Sequence[int]] = None,
+) -> ResourcePlan:
+    """
+    Split the available cores between the learner, env workers and arena.
+
+    Args:
+        n_envs: Training envs; each is a worker process unless `backend`
+            is "batched" (envs step inside the learner process).
+        backend: The vec env backend (see create_vec_env).
+        arena_workers: Arena processes; default one per core available to them.
+        learner_threads: Torch threads (and physical cores) of the learner;
+            default a quarter of the cores, at most 4 (small MLPs do not
+            scale further).
+        overlap_arena: Evaluation runs while training (pipelined mode), so
+            the arena only gets cores training does not use; if the env
+            workers would take all of them, they get half and the arena the
+            other half. Otherwise the arena runs while the learner waits and
+            may use every core.
+        pin: Pin processes to their CPU sets.
+        cpus: Logical CPUs to plan over (default: this process' affinity).
+    """
+    cores = physical_cores(cpus)
+    n_cores = len(cores)
+    if learner_threads is None:
+        learner_threads = min(4, max(1, n_cores // 4))
+    learner_threads = max(1, min(learner_threads, n_cores))
+
+    learner_cores = cores[:learner_threads]
+    rest = cores[learner_threads:] or cores
+    learner_cpus = [c for core in learner_cores for c in core]
+
+    env_cores = rest
+    if overlap_arena and backend != "batched" and n_envs >= len(rest) > 1:
+        # Env workers would leave the arena no core of its own
+        env_cores = rest[: (len(rest) + 1) // 2]
+    env_cpus: List[List[int]] = []
+    if backend != "batched":
+        env_cpus = [env_cores[i % len(env_cores)] for i in range(n_envs)]
+
+    if overlap_arena:
+        used = {c for cpus in env_cpus for c in cpus}
+        arena_cores = [core for core in rest if not used.intersection(core)] or rest
+    else:
+        arena_cores = cores
+    n_arena = arena_workers or len(arena_cores)
+    arena_cpus = [arena_cores[i % len(arena_cores)] for i in range(n_arena)]
+
+    return ResourcePlan(
+        learner_cpus, learner_threads, env_cpus, arena_cpus, pin, n_cores, overlap_arena
+    )
+
+
+class CpuUsage:
+    """Per-CPU busy fraction between calls to delta(), from /proc/stat (Linux)."""
+
+    def __init__(self):
+        self._last = self._read()
+
+    @staticmethod
+    def _read() -> Dict[int, tuple]:
+        times = {}
+        try:
+            with open("/proc/stat") as f:
+                for line in f:
+                    if line.startswith("cpu") and line[3].isdigit():
+                        name, *fields = line.split()
+                        values = [int(v) for v in fields]
+                        idle = values[3] + (values[4] if len(values) > 4 else 0)  # idle + iowait
+                        times[int(name[3:])] = (sum(values) - idle, sum(values))
+        except OSError:
+            pass
+        return times
+
+    def delta(self) -> Dict[int, float]:
+        now = self._read()
+        busy = {}
+        for cpu, (b, t) in now.items():
+            if cpu in self._last:
+                b0, t0 = self._last[cpu]
+                busy[cpu] = (b - b0) / (t - t0) if t > t0 else 0.0
+        self._last = now
+        return busy
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show the CPU plan for training and the arena.")
+    parser.add_argument("--n-envs", type=int, default=16)
+    parser.add_argument("--backend", default="subproc", choices=["batched", "subproc"])
+    parser.add_argument("--arena-workers", type=int)
+    parser.add_argument("--learner-threads", type=int)
+    parser.add_argument("--overlap-arena", action="store_true", help="Pipelined evaluation")
+    args = parser.parse_args()
+
+    cores = physical_cores()
+    print(f"{len(available_cpus())} CPUs, {len(cores)} physical cores")
+    plan = plan_resources(
+        args.n_envs,
+        args.backend,
+        arena_workers=args.arena_workers,
+        learner_threads=args.learner_threads,
+        overlap_arena=args.overlap_arena,
+    )
+    print(plan.report())
+
+
+if __name__ == "__main__":
+    main()
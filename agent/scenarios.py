@@ -0,0 +1,227 @@
+import argparse
+from itertools import product
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from core.game import BuckshotRouletteGame
+from core.tablebase import MAX_HP, subround_distribution
+
+# Opening scenario dealt by BuckshotRouletteEnv.reset(seed=seed)
+SCENARIO_DTYPE = np.dtype(
+    [
+        ("seed", "<i8"),
+        ("starting_hp", "u1"),
+        ("lives", "u1"),  # First magazine
+        ("blanks", "u1"),
+        ("items", "u1"),  # Items dealt to each side
+        ("agent_is_player", "?"),  # Random role (unpaired games)
+        ("agent_went_first", "?"),  # Turn order with a random role
+        ("paired_agent_went_first", "?"),  # Turn order with a forced role (paired games)
+    ]
+)
+
+# Scenario fields a stratum is made of
+PAIRED_STRATUM_FIELDS = ("starting_hp", "lives", "blanks", "items", "paired_agent_went_first")
+STRATUM_FIELDS = ("starting_hp", "lives", "blanks", "items", "agent_is_player", "agent_went_first")
+
+_INDEX_CHUNK = 1000
+
+
+def index_seeds(start: int, n: int) -> np.ndarray:
+    """Scenarios of seeds start .. start + n - 1 (SCENARIO_DTYPE rows)."""
+    rows = np.zeros(n, dtype=SCENARIO_DTYPE)
+    for i in range(n):
+        seed = start + i
+        game = BuckshotRouletteGame(rng_seed=seed)
+        game.start_new_round()
+        # Same draws as BuckshotRouletteEnv.reset; with a forced role the
+        # first draw is the turn order
+        rng = np.random.default_rng(seed)
+        first_draw = rng.choice([True, False])
+        row = rows[i]
+        row["seed"] = seed
+        row["starting_hp"] = game.player.hp
+        row["lives"] = game.lives_left
+        row["blanks"] = game.blanks_left
+        row["items"] = game.player.num_items
+        row["agent_is_player"] = first_draw
+        row["agent_went_first"] = rng.choice([True, False])
+        row["paired_agent_went_first"] = first_draw
+    return rows
+
+
+def _index_chunk(args):
+    """Arena worker function: index_seeds() of one chunk."""
+    return index_seeds(*args)
+
+
+def stratum_weights(paired: bool) -> Dict[tuple, float]:
+    """
+    Exact probability of every stratum (keys ordered like the stratum fields).
+
+    Mirrors BuckshotRouletteGame.start_new_round: starting HP uniform in
+    [3, MAX_HP), then a first subround dealt per subround_distribution(1);
+    roles and turn order are fair coin flips.
+    """
+    hps = range(3, MAX_HP)
+    items, bullets = subround_distribution(1)
+    coins = [(True,), (False,)] if paired else list(product((True, False), repeat=2))
+    weights = {}
+    for hp, (lives, blanks), n_items, coin in product(hps, bullets, items, coins):
+        p = bullets[(lives, blanks)] * items[n_items] / (len(hps) * len(coins))
+        weights[(hp, lives, blanks, n_items, *coin)] = p
+    return weights
+
+
+class ScenarioIndex:
+    """
+    Seeds from `start` on, indexed by the opening scenario they deal.
+
+    allocate() draws a proportionally stratified sample of seeds: every
+    stratum (starting HP, first magazine, items dealt, turn order and, for
+    unpaired games, role) gets its share of the units, taken in seed order.
+    The units are interleaved so that every prefix of the sample is close
+    to proportional too, which keeps a match stopped early stratified.
+    Indexing runs on `pool` (an ArenaWorkerPool) when given.
+    """
+
+    def __init__(self, start: int, paired: bool, pool=None):
+        self.start = start
+        self.paired = paired
+        self.pool = pool
+        self.fields = PAIRED_STRATUM_FIELDS if paired else STRATUM_FIELDS
+        weights = stratum_weights(paired)
+        self.keys: List[tuple] = sorted(weights)
+        self.weights = np.array([weights[k] for k in self.keys])
+        self._ids = {k: i for i, k in enumerate(self.keys)}
+        self.rows = np.zeros(0, dtype=SCENARIO_DTYPE)
+        self.strata = np.zeros(0, dtype=np.int64)
+
+    def extend(self, n: int):
+        """Index the next `n` seeds."""
+        first = self.start + len(self.rows)
+        chunks = [
+            (first + i, min(_INDEX_CHUNK, n - i)) for i in range(0, n, _INDEX_CHUNK)
+        ]
+        if self.pool is not None:
+            parts = list(self.pool.imap_unordered(_index_chunk, chunks))
+        else:
+            parts = [index_seeds(*chunk) for chunk in chunks]
+        rows = np.sort(np.concatenate(parts), order="seed")
+        strata = np.array(
+            [self._ids[k] for k in zip(*(rows[f].tolist() for f in self.fields))],
+            dtype=np.int64,
+        )
+        self.rows = np.concatenate([self.rows, rows])
+        self.strata = np.concatenate([self.strata, strata])
+
+    def quotas(self, n_units: int) -> np.ndarray:
+        """Proportional allocation of `n_units` to strata (largest remainder)."""
+        exact = n_units * self.weights
+        quotas = np.floor(exact).astype(np.int64)
+        short = n_units - quotas.sum()
+        quotas[np.argsort(quotas - exact, kind="stable")[:short]] += 1
+        return quotas
+
+    def allocate(self, n_units: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(seeds, stratum ids) of a stratified sample of `n_units`, interleaved."""
+        quotas = self.quotas(n_units)
+        while True:
+            counts = np.bincount(self.strata, minlength=len(self.keys))
+            if np.all(counts >= quotas):
+                break
+            self.extend(max(_INDEX_CHUNK, n_units // 4))
+
+        # First `quota` seeds of every stratum
+        order = np.argsort(self.strata, kind="stable")
+        offsets = np.concatenate([[0], np.cumsum(counts)[:-1]])
+        take = np.concatenate([order[o : o + q] for o, q in zip(offsets, quotas)])
+        # The k-th unit of a stratum with quota q is due at fraction (k + 0.5) / q
+        due = np.concatenate([(np.arange(q) + 0.5) / q for q in quotas if q > 0])
+        take = take[np.argsort(due, kind="stable")]
+        return self.rows["seed"][take], self.strata[take]
+
+
+class StratifiedEstimate:
+    """
+    Stratified mean of per-unit scores with its variance.
+
+    Strata are weighted by their true probabilities rather than by how many
+    units they got, and only within-stratum variance enters the standard
+    error. Strata without units yet are left out (weights renormalized);
+    strata with fewer than `min_stratum_units` units use the pooled
+    variance, which keeps the standard error stable early in a match.
+    """
+
+    def __init__(self, weights: np.ndarray, min_stratum_units: int = 10):
+        self.weights = np.asarray(weights, dtype=np.float64)
+        self.min_stratum_units = min_stratum_units
+        self.counts = np.zeros(len(weights), dtype=np.int64)
+        self.sums = np.zeros(len(weights))
+        self.sq_sums = np.zeros(len(weights))
+
+    def update(self, strata: np.ndarray, scores: np.ndarray):
+        np.add.at(self.counts, strata, 1)
+        np.add.at(self.sums, strata, scores)
+        np.add.at(self.sq_sums, strata, np.square(scores))
+
+    @property
+    def n(self) -> int:
+        return int(self.counts.sum())
+
+    @property
+    def mean(self) -> float:
+        seen = self.counts > 0
+        if not seen.any():
+            return 0.0
+        w = self.weights[seen] / self.weights[seen].sum()
+        return float(w @ (self.sums[seen] / self.counts[seen]))
+
+    @property
+    def variance(self) -> float:
+        """Variance of the stratified mean."""
+        seen = self.counts > 0
+        if self.n < 2:
+            return 0.25
+        n = self.counts[seen]
+        means = self.sums[seen] / n
+        var = np.zeros(len(n))
+        many = n >= max(self.min_stratum_units, 2)
+        var[many] = (self.sq_sums[seen][many] - n[many] * means[many] ** 2) / (n[many] - 1)
+        pooled_mean = self.sums.sum() / self.n
+        pooled = (self.sq_sums.sum() - self.n * pooled_mean**2) / (self.n - 1)
+        var[~many] = pooled
+        w = self.weights[seen] / self.weights[seen].sum()
+        return float(np.sum(w**2 * np.maximum(var, 0.0) / n))
+
+    def interval(self, z: float = 1.96) -> Tuple[float, float]:
+        half = z * float(np.sqrt(self.variance))
+        return self.mean - half, self.mean + half
+
+    def unstratified_variance(self) -> float:
+        """Variance of the mean of as many unstratified units (estimated from these)."""
+        if self.n < 2:
+            return 0.25
+        mean = self.sums.sum() / self.n
+        return float((self.sq_sums.sum() - self.n * mean**2) / (self.n - 1) / self.n)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show the scenario strata of a seed range.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--units", type=int, default=2400)
+    parser.add_argument("--unpaired", action="store_true")
+    args = parser.parse_args()
+
+    index = ScenarioIndex(args.seed, paired=not args.unpaired)
+    seeds, strata = index.allocate(args.units)
+    counts = np.bincount(strata, minlength=len(index.keys))
+    print(f"{len(index.rows)} seeds indexed, {len(seeds)} allocated to {len(index.keys)} strata")
+    print("  " + "  ".join(f"{f:>8}" for f in index.fields) + "  weight  units")
+    for key, w, c in zip(index.keys, index.weights, counts):
+        print("  " + "  ".join(f"{int(v):>8}" for v in key) + f"  {w:.4f}  {c:5d}")
+
+
+if __name__ == "__main__":
+    main()
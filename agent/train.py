@@ -1,38 +1,193 @@
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional, Sequence, Tuple
+import gymnasium as gym
 import numpy as np
 from tqdm import tqdm
-from stable_baselines3.common.vec_env import SubprocVecEnv
+from stable_baselines3.common.vec_env import SubprocVecEnv, VecEnvWrapper
 from sb3_contrib import MaskablePPO
 
 from core.env import BuckshotRouletteEnv
+from core.vec_env import BuckshotVecEnv
 from agent.config import TrainingConfig, set_global_seed
-from agent.callbacks import GenerationCallback, ProgressCallback
+from agent.callbacks import (
+    GenerationCallback,
+    EpisodeStatsCallback,
+    ProgressCallback,
+    ProfilingCallback,
+    StopCallback,
+)
+from agent.inference import OpponentInferenceServer, OpponentClient
+from agent.profiling import PROFILER, SamplingProfiler, timed
+from agent.league import League
+from agent.numpy_policy import ARTIFACT_SUFFIX, ensure_artifact
+from agent.checkpoint import CheckpointWriter, ModelSnapshot
+from agent.resources import CpuUsage, ResourcePlan, configure_process, plan_resources
 import agent.arena as arena
 
 
-def make_env(opponent_model_path: Optional[str] = None, rank: int = 0, seed: int = 0):
+class ServedSubprocVecEnv(SubprocVecEnv):
+    """SubprocVecEnv whose workers query a shared OpponentInferenceServer."""
+
+    def __init__(self, env_fns, server: OpponentInferenceServer, start_method=None):
+        self.opponent_server = server
+        super().__init__(env_fns, start_method=start_method)
+
+    def close(self) -> None:
+        super().close()
+        self.opponent_server.stop()
+
+
+class OpponentSwapEnv(gym.Wrapper):
+    """
+    Worker-side env wrapper driven through env_method.
+
+    Changes the opponent of a long-lived worker and times env steps into the
+    worker's PROFILER, whose snapshot the main process collects.
+
+    With an opponent mixture every episode draws its opponent from the
+    mixture weights: a local policy, or (with an opponent_client) the
+    server-side opponent the client selects. Episodes and agent losses are
+    counted per opponent for opponent_stats().
+    """
+
+    def __init__(self, env: gym.Env, opponent_client: Optional[OpponentClient] = None, seed: int = 0):
+        super().__init__(env)
+        self.opponent_client = opponent_client
+        self._seed = seed
+        self._mixture_rng = np.random.default_rng(seed)
+        self._policies: List = [env.unwrapped.opponent_policy]
+        self._weights = np.ones(1)
+        self._opponent = 0
+        self._episodes = np.zeros(1, dtype=np.int64)
+        self._losses = np.zeros(1, dtype=np.int64)
+
+    def set_opponent_path(self, opponent_model_path: Optional[str]):
+        self.set_opponent_mixture([opponent_model_path])
+
+    def set_opponent_mixture(
+        self,
+        opponent_model_paths: Sequence[Optional[str]],
+        weights: Optional[Sequence[float]] = None,
+        seed: Optional[int] = None,
+    ):
+        """
+        Local opponents: one policy per path (None = random), applied from the next episode.
+
+        Each samples its moves from a generator seeded by `seed`, this
+        worker's seed and its position in the mixture.
+        """
+        policies = []
+        for i, path in enumerate(opponent_model_paths):
+            policy = None
+            if path is not None:
+                # Artifacts are memory-mapped, so workers share the weight pages
+                policy = arena.load_policy_for_env(
+                    path,
+                    use_cache=False,
+                    deterministic=False,
+                    rng=np.random.default_rng([self._seed, i] + ([] if seed is None else [seed])),
+                )
+            policies.append(timed(PROFILER, "worker/opponent_predict", policy))
+        self._policies = policies
+        self.set_opponent_weights(np.ones(len(policies)) if weights is None else weights)
+
+    def set_opponent_weights(self, weights: Sequence[float]):
+        """Mixture weights over the (local or server-side) opponents."""
+        weights = np.asarray(weights, dtype=float)
+        self._weights = weights / weights.sum()
+        self._episodes = np.zeros(len(weights), dtype=np.int64)
+        self._losses = np.zeros(len(weights), dtype=np.int64)
+
+    def opponent_stats(self):
+        """(episodes, agent losses) per opponent since the last call."""
+        stats = self._episodes.copy(), self._losses.copy()
+        self._episodes[:] = 0
+        self._losses[:] = 0
+        return stats
+
+    def reset(self, **kwargs):
+        n = len(self._weights)
+        self._opponent = int(self._mixture_rng.choice(n, p=self._weights)) if n > 1 else 0
+        if self.opponent_client is not None:
+            self.opponent_client.select(self._opponent)
+        else:
+            self.env.unwrapped.opponent_policy = self._policies[self._opponent]
+        return self.env.reset(**kwargs)
+
+    def action_masks(self):
+        return self.env.unwrapped.action_masks()
+
+    def drain_episode_stats(self) -> np.ndarray:
+        return self.env.unwrapped.drain_episode_stats()
+
+    def step(self, action):
+        with PROFILER.timer("worker/env_step"):
+            result = self.env.step(action)
+        if result[2] or result[3]:
+            env = self.env.unwrapped
+            agent = env.game.player if env._agent_is_player else env.game.dealer
+            self._episodes[self._opponent] += 1
+            self._losses[self._opponent] += agent.hp <= 0
+        return result
+
+    def profiler_snapshot(self) -> dict:
+        return PROFILER.snapshot(reset=True)
+
+
+class ProfiledVecEnv(VecEnvWrapper):
+    """Times reset/step_wait as seen by the learner (game, opponent and IPC)."""
+
+    def reset(self):
+        with PROFILER.timer("env/reset"):
+            return self.venv.reset()
+
+    def step_wait(self):
+        with PROFILER.timer("env/step_wait"):
+            return self.venv.step_wait()
+
+
+def make_env(
+    opponent_model_path: Optional[str] = None,
+    rank: int = 0,
+    seed: int = 0,
+    opponent_client: Optional[OpponentClient] = None,
+    cpus: Optional[Sequence[int]] = None,
+    pin: bool = False,
+):
     """
     Factory function for multiprocessing.
     Notes:
-        - Opponent path is passed as string to avoid pickling the policy object.
+        - Opponent path is passed as string to avoid pickling the policy object;
+          workers memory-map its artifact, so the weights are shared.
+        - With an opponent_client, moves are requested from the central
+          inference server instead of a per-process model copy.
         - CUDNN configuration is disabled inside subprocesses to avoid errors.
+        - Workers run single-threaded, pinned to `cpus` if `pin`.
     """
 
     def _init():
+        configure_process(cpus, 1, pin)
         env_seed = seed + rank
         set_global_seed(env_seed, configure_cudnn=False)
 
-        opponent_policy = None
-        if opponent_model_path is not None:
-            # Each subprocess loads its own copy of the opponent
+        opponent_policy = opponent_client
+        if opponent_policy is None and opponent_model_path is not None:
+            # Memory-mapped artifact written by the parent (ensure_artifact)
             opponent_policy = arena.load_policy_for_env(
                 opponent_model_path,
                 use_cache=False,
                 deterministic=False,
+                rng=np.random.default_rng(env_seed),
             )
 
-        env = BuckshotRouletteEnv(opponent_policy=opponent_policy)
+        opponent_policy = timed(PROFILER, "worker/opponent_predict", opponent_policy)
+        env = OpponentSwapEnv(
+            BuckshotRouletteEnv(opponent_policy=opponent_policy),
+            opponent_client=opponent_client,
+            seed=env_seed,
+        )
         env.reset(seed=env_seed)
         return env
 
@@ -40,44 +195,259 @@ def make_env(opponent_model_path: Optional[str] = None, rank: int = 0, seed: int
 
 
 def create_vec_env(
-    n_envs: int, opponent_model_path: Optional[str] = None, seed: int = 0
+    n_envs: int,
+    opponent_model_path: Optional[str] = None,
+    seed: int = 0,
+    backend: str = "subproc",
+    inference_server: bool = False,
+    plan: Optional[ResourcePlan] = None,
 ):
     """
-    Creates the vectorized environment using 'fork' start method.
-    'fork' is used to avoid pickling errors with PyTorch CUDNN modules.
+    Creates the vectorized environment.
+
+    Backends:
+        - "batched": every env runs in this process on a BatchedBuckshotGame,
+          with the opponent predicting for all pending envs in one call.
+        - "subproc": one BuckshotRouletteEnv per process using the 'fork' start
+          method ('fork' avoids pickling errors with PyTorch CUDNN modules).
+          With `inference_server`, workers send opponent moves to one batched
+          OpponentInferenceServer in the main process.
+
+    A resource `plan` places subprocess workers on their CPU sets.
     """
-    env_fns = [make_env(opponent_model_path, i, seed) for i in range(n_envs)]
+    cpus = plan.env_worker_cpus if plan is not None else lambda rank: None
+    pin = plan is not None and plan.pin
+    if backend == "batched":
+        opponent_policy = None
+        if opponent_model_path is not None:
+            opponent_policy = arena.load_batched_policy_for_env(
+                opponent_model_path,
+                use_cache=False,
+                deterministic=False,
+                rng=np.random.default_rng(seed),
+            )
+        return BuckshotVecEnv(n_envs, opponent_policy=opponent_policy, seed=seed)
+
+    if inference_server:
+        # Started before forking: workers reset (and may query it) during startup.
+        opponent_policy = None
+        if opponent_model_path is not None:
+            opponent_policy = arena.load_batched_policy_for_env(
+                opponent_model_path,
+                use_cache=False,
+                deterministic=False,
+                rng=np.random.default_rng(seed),
+            )
+        server = OpponentInferenceServer(opponent_policy, n_slots=n_envs, seed=seed).start()
+        env_fns = [
+            make_env(None, i, seed, opponent_client=server.client(i), cpus=cpus(i), pin=pin)
+            for i in range(n_envs)
+        ]
+        return ServedSubprocVecEnv(env_fns, server, start_method="fork")  # type: ignore
+
+    if opponent_model_path is not None:
+        # Workers memory-map the artifact instead of loading their own copy
+        ensure_artifact(opponent_model_path)
+    env_fns = [make_env(opponent_model_path, i, seed, cpus=cpus(i), pin=pin) for i in range(n_envs)]
     return SubprocVecEnv(env_fns, start_method="fork")  # type: ignore
 
 
+class EnvPool:
+    """
+    Training environments created once per run.
+
+    Between generations the opponent is swapped and the envs are reseeded in
+    place, so workers are forked and their imports paid only once. The
+    opponent may be a weighted mixture of models drawn per episode; with the
+    batched backend or the inference server each model is loaded once, in
+    this process, and queried once per opponent group.
+    """
+
+    def __init__(self, config: TrainingConfig, seed: int = 0, plan: Optional[ResourcePlan] = None):
+        self.vec_env = create_vec_env(
+            config.n_envs,
+            opponent_model_path=None,
+            seed=seed,
+            backend=config.vec_env_backend,
+            inference_server=config.use_opponent_inference_server,
+            plan=plan,
+        )
+        self.env = ProfiledVecEnv(self.vec_env) if config.profile else self.vec_env
+        self.opponent_model_paths: List[Optional[str]] = [None]
+        self.opponent_weights = np.ones(1)
+
+    def set_opponent(self, opponent_model_path: Optional[str]):
+        self.set_opponents([opponent_model_path])
+
+    def set_opponents(
+        self,
+        opponent_model_paths: Sequence[Optional[str]],
+        weights: Optional[Sequence[float]] = None,
+        seed: Optional[int] = None,
+    ):
+        """
+        Opponent mixture (None = random player) used from the next reset on.
+
+        Newly loaded opponents sample their moves from generators derived
+        from `seed`, so a generation's games are reproducible.
+        """
+        paths = list(opponent_model_paths)
+        weights = np.ones(len(paths)) if weights is None else np.asarray(weights, dtype=float)
+        weights = weights / weights.sum()
+        same_paths = paths == self.opponent_model_paths
+
+        venv = self.vec_env
+        if isinstance(venv, (BuckshotVecEnv, ServedSubprocVecEnv)):
+            # The opponents live in this process: load each once and swap them in
+            policies = []
+            for i, path in enumerate(paths):
+                policy = None
+                if path is not None:
+                    with PROFILER.timer("io/model_load"):
+                        policy = arena.load_batched_policy_for_env(
+                            path,
+                            deterministic=False,
+                            rng=np.random.default_rng([i] + ([] if seed is None else [seed])),
+                        )
+                policies.append(timed(PROFILER, "opponent/predict", policy))
+            if isinstance(venv, BuckshotVecEnv):
+                venv.set_opponents(policies, weights)
+            else:
+                if not same_paths:
+                    venv.opponent_server.set_policies(policies)
+                venv.env_method("set_opponent_weights", weights)
+        elif same_paths:
+            venv.env_method("set_opponent_weights", weights)
+        else:
+            # Every worker memory-maps the same artifact: one copy of the weights
+            for path in paths:
+                if path is not None:
+                    ensure_artifact(path)
+            venv.env_method("set_opponent_mixture", paths, weights, seed)
+
+        self.opponent_model_paths = paths
+        self.opponent_weights = weights
+
+    def opponent_stats(self):
+        """(episodes, agent losses) per opponent of the current mixture since it was set."""
+        venv = self.vec_env
+        if isinstance(venv, BuckshotVecEnv):
+            return venv.opponent_stats()
+        stats = venv.env_method("opponent_stats")
+        episodes = np.sum([e for e, _ in stats], axis=0)
+        losses = np.sum([l for _, l in stats], axis=0)
+        return episodes, losses
+
+    def collect_worker_profiles(self):
+        """Merge the profilers of subprocess workers into this process' PROFILER."""
+        if isinstance(self.vec_env, SubprocVecEnv):
+            for snapshot in self.vec_env.env_method("profiler_snapshot"):
+                PROFILER.merge(snapshot)
+
+    def reseed(self, seed: int):
+        """Seeds applied at the next reset (i.e. the start of the next learn())."""
+        self.env.seed(seed)
+
+    def close(self):
+        self.env.close()
+
+
+def select_opponents(
+    opponent_pool: arena.OpponentPool, config: TrainingConfig, rng: np.random.Generator
+) -> Tuple[List[Optional[str]], np.ndarray]:
+    """
+    Training opponents of a generation: (paths, mixture weights).
+
+    [None] (the random player) while no pool member is on disk. Paths (str)
+    rather than policies, to pass to subprocesses. Only "single" draws from
+    `rng`, so the generator state before this call fixes the choice.
+    """
+    valid_paths = [str(p) for p in opponent_pool.pool if p.exists()]
+    if not valid_paths:
+        return [None], np.ones(1)
+    if config.opponent_mixture == "single":
+        return [str(rng.choice(valid_paths))], np.ones(1)  # type: ignore
+    weights = opponent_pool.mixture_weights(
+        valid_paths, config.opponent_mixture, config.opponent_mixture_floor
+    )
+    return valid_paths, weights
+
+
+def check_replay(
+    env_pool: EnvPool,
+    opponent_pool: arena.OpponentPool,
+    config: TrainingConfig,
+    generation: int,
+    rng: np.random.Generator,
+    rng_state: dict,
+):
+    """
+    Raise if a retrained generation diverged from a sequential run.
+
+    Replays the opponent selection from `rng_state` (the generator state the
+    generation started from) and compares it, and the generator state it
+    leaves, with what the retrain used.
+    """
+    replay = np.random.default_rng()
+    replay.bit_generator.state = rng_state
+    paths, weights = select_opponents(opponent_pool, config, replay)
+    if (
+        paths != env_pool.opponent_model_paths
+        or not np.allclose(weights / weights.sum(), env_pool.opponent_weights)
+        or replay.bit_generator.state != rng.bit_generator.state
+    ):
+        raise RuntimeError(f"Retrained generation {generation} diverged from a sequential run")
+
+
 def train_generation(
     challenger: MaskablePPO,
     opponent_pool: arena.OpponentPool,
     config: TrainingConfig,
     generation: int,
     rng: np.random.Generator,
-):
-    """Executes the training phase for a single generation."""
+    env_pool: Optional[EnvPool] = None,
+    extra_callbacks: Optional[list] = None,
+) -> bool:
+    """
+    Executes the training phase for a single generation.
+
+    Uses `env_pool` if given (swapping its opponent), otherwise creates and
+    closes environments for this generation only. With a mixture
+    (config.opponent_mixture) every episode draws its opponent from the
+    pool, and the challenger's results per opponent are recorded in the
+    pool for the next generation's weights.
+
+    Returns False if one of `extra_callbacks` ended training early.
+    """
     print(f"\n{'=' * 60}\nGENERATION {generation}: Training Challenger\n{'=' * 60}")
 
-    # Select opponent for this generation
-    opponent_model_path = None
-    if opponent_pool.pool:
-        # Sample path from pool (str) to pass to subprocesses
-        valid_paths = [p for p in opponent_pool.pool if p.exists()]
-        if valid_paths:
-            opponent_model_path = str(rng.choice(valid_paths))  # type: ignore
-            print(f"Training against: {Path(opponent_model_path).name}")
-        else:
-            print("No valid champions found - training against random opponent.")
-    else:
+    # Select opponents for this generation
+    opponent_paths, weights = select_opponents(opponent_pool, config, rng)
+    if not opponent_pool.pool:
         print("Empty opponent pool - training against random opponent.")
+    elif opponent_paths == [None]:
+        print("No valid champions found - training against random opponent.")
+    elif config.opponent_mixture == "single":
+        print(f"Training against: {Path(opponent_paths[0]).name}")
+    else:
+        print(f"Training against a {config.opponent_mixture} mixture:")
+        for path, weight in zip(opponent_paths, weights):
+            print(f"  {weight:6.1%}  {Path(path).name}")
 
     train_seed = config.seed + generation * 1000
-    train_env = create_vec_env(config.n_envs, opponent_model_path, train_seed)
+    owns_env = env_pool is None
+    if owns_env:
+        env_pool = EnvPool(config, seed=train_seed)
+    env_pool.set_opponents(opponent_paths, weights, seed=train_seed)
+    env_pool.reseed(train_seed)
+    train_env = env_pool.env
 
     # Setup Training
     gen_callback = GenerationCallback(generation=generation)
+    stats_callback = EpisodeStatsCallback()
+    callbacks = [gen_callback, stats_callback, *(extra_callbacks or [])]
+    if config.profile:
+        callbacks.append(ProfilingCallback(PROFILER))
     challenger.set_env(train_env)
     initial_timesteps = challenger.num_timesteps
 
@@ -90,7 +460,7 @@ def train_generation(
 
         challenger.learn(
             total_timesteps=config.total_timesteps_per_generation,
-            callback=[gen_callback, progress_callback],
+            callback=[*callbacks, progress_callback],
             reset_num_timesteps=False,
         )
 
@@ -101,8 +471,211 @@ def train_generation(
         if remaining > 0:
             pbar.update(remaining)
 
-    train_env.close()
-    print(f"Generation {generation} training complete.")
+    completed = challenger.num_timesteps - initial_timesteps >= config.total_timesteps_per_generation
+    stats = stats_callback.summary
+    if stats["episodes"]:
+        print(
+            f"Training episodes: {stats['episodes']}, win rate {stats['win_rate']:.2%} "
+            f"(as player {stats.get('win_rate_as_player', 0):.2%}, as dealer {stats.get('win_rate_as_dealer', 0):.2%}; "
+            f"first {stats.get('win_rate_going_first', 0):.2%}, second {stats.get('win_rate_going_second', 0):.2%}), "
+            f"mean length {stats['mean_length']:.1f}, invalid actions {stats['invalid_action_rate']:.3%}"
+        )
+    episodes, losses = env_pool.opponent_stats()
+    if completed:
+        opponent_pool.record_results(opponent_paths, episodes, losses)
+    if completed and len(opponent_paths) > 1:
+        for path, n, lost in zip(opponent_paths, episodes, losses):
+            print(f"  lost {lost}/{n} episodes vs {Path(path).name}")
+    if config.profile:
+        env_pool.collect_worker_profiles()
+    if owns_env:
+        env_pool.close()
+    if completed:
+        print(f"Generation {generation} training complete.")
+    else:
+        print(f"Generation {generation} training stopped early.")
+    return completed
+
+
+def report_profile(
+    config: TrainingConfig,
+    generation: int,
+    tb_writer=None,
+    sampler=None,
+    plan: Optional[ResourcePlan] = None,
+    cpu_usage: Optional[CpuUsage] = None,
+):
+    """Print, export and reset the per-generation profile (and CPU utilization per role)."""
+    # Taken in one step: the evaluation thread may still be adding timings
+    profile = PROFILER.detach()
+    print(f"\nProfile (generation {generation}):\n{profile.report()}")
+    extra = {"generation": generation, "time": time.time()}
+    if sampler is not None:
+        extra["samples"] = sampler.top()
+        sampler.reset()
+    utilization = {}
+    if plan is not None and cpu_usage is not None:
+        utilization = plan.utilization(cpu_usage.delta())
+        print("CPU utilization: " + ", ".join(f"{k} {v:.0%}" for k, v in utilization.items()))
+        extra["cpu_utilization"] = utilization
+    profile.export_json(config.profile_log, **extra)
+    if tb_writer is not None:
+        profile.export_tensorboard(tb_writer, generation)
+        for role, busy in utilization.items():
+            tb_writer.add_scalar(f"cpu/{role.replace(' ', '_')}", busy, generation)
+
+
+def init_challenger(config: TrainingConfig, env, model_path: Optional[Path]) -> MaskablePPO:
+    """Challenger for a new generation: `model_path` with a fresh optimizer, or a new model."""
+    if model_path is not None and Path(model_path).exists():
+        print(f"Loading weights from: {Path(model_path).name}")
+        with PROFILER.timer("io/model_load"):
+            challenger = MaskablePPO.load(
+                str(model_path),
+                env=env,
+                custom_objects={"learning_rate": config.learning_rate},
+                device="cpu",  # Training will move to GPU automatically if available
+                seed=config.seed,
+            )
+        # Reset optimizer
+        challenger.policy.optimizer = challenger.policy.optimizer.__class__(
+            challenger.policy.parameters(),
+            lr=config.learning_rate,  # type: ignore
+        )
+        return challenger
+
+    print("No existing champion - creating fresh model.")
+    return MaskablePPO(
+        "MlpPolicy",
+        env,
+        learning_rate=config.learning_rate,
+        n_steps=config.n_steps,
+        batch_size=config.batch_size,
+        n_epochs=config.n_epochs,
+        gamma=config.gamma,
+        gae_lambda=config.gae_lambda,
+        clip_range=config.clip_range,
+        ent_coef=config.ent_coef,
+        vf_coef=config.vf_coef,
+        max_grad_norm=config.max_grad_norm,
+        verbose=0,
+        seed=config.seed,
+    )
+
+
+def promote_challenger(
+    snapshot: ModelSnapshot,
+    generation: int,
+    champion_path: Path,
+    opponent_pool: arena.OpponentPool,
+    writer: CheckpointWriter,
+):
+    """
+    Make a challenger the champion and add it to the pool.
+
+    Args:
+        snapshot: The challenger as it was evaluated.
+        generation: Generation the challenger was trained in.
+        champion_path: Where the current champion lives (hardlinked to
+            the pool copy once written).
+        opponent_pool: Pool the champion joins.
+        writer: Checkpoint thread that persists it.
+    """
+    print(f"\n{'=' * 60}\nPROMOTION: Challenger becomes Champion!\n{'=' * 60}")
+    with PROFILER.timer("io/model_save"):
+        opponent_pool.add_champion_snapshot(snapshot, generation, writer, champion_path)
+
+
+class EvaluationPipeline:
+    """
+    Evaluates generation N on a background thread while N+1 trains.
+
+    submit() snapshots the challenger in memory and starts the arena
+    evaluation of its actor (the arena workers do the work; the thread
+    only waits on them). The next generation trains speculatively from the
+    likelier outcome, judged by the promotion rate so far: from the
+    candidate if promotion is likelier, otherwise from the current
+    champion. A StopCallback ends that training as soon as the evaluation
+    contradicts the guess, and the generation is retrained from the actual
+    champion with the same seeds and opponent draws (the generator state
+    is restored, then checked by check_replay()). Training a generation
+    never waits for the previous evaluation unless the guess was wrong or
+    the evaluation is slower than training.
+
+    A speculative generation trains against the pool as it was before the
+    pending promotion, so it may miss the newest champion as an opponent.
+    """
+
+    def __init__(self, config: TrainingConfig):
+        self.config = config
+        self.champion_path = Path(config.models_dir) / "champion.zip"
+        # Create the arena workers now: forking from the evaluation thread
+        # could copy locks held by other threads into the workers.
+        arena.get_arena_pool()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="evaluation")
+        self.pending: Optional[Future] = None
+        self.pending_generation = 0
+        self.candidate: Optional[ModelSnapshot] = None
+        self._candidate_path: Optional[Path] = None
+        self.promotions = 0
+        self.evaluations = 0
+
+    def submit(self, challenger: MaskablePPO, champion_path: Optional[Path], generation: int):
+        """Evaluate `challenger` against the champion at `champion_path` (which must be on disk)."""
+        with PROFILER.timer("io/model_save"):
+            self.candidate = ModelSnapshot(challenger)
+            # Workers only need the actor's artifact (in RAM where available)
+            directory = Path(arena.SHARED_MEMORY_DIR or self.config.models_dir)
+            self._candidate_path = directory / f"candidate_gen_{generation}{ARTIFACT_SUFFIX}"
+            self.candidate.actor.save_artifact(self._candidate_path)
+        self.pending_generation = generation
+        self.pending = self._executor.submit(
+            self._evaluate, str(self._candidate_path), champion_path, generation
+        )
+
+    def _evaluate(self, candidate_path: str, champion_path: Optional[Path], generation: int) -> bool:
+        with PROFILER.timer("phase/evaluate"):
+            return arena.evaluate_challenger_path(
+                candidate_path, champion_path, self.config, generation
+            )
+
+    def done(self) -> bool:
+        return self.pending is not None and self.pending.done()
+
+    def speculate(self) -> bool:
+        """Guess the pending outcome: promotion if it has been at least as frequent (Laplace prior)."""
+        return (self.promotions + 1) / (self.evaluations + 2) >= 0.5
+
+    def contradicts(self, speculation: bool) -> bool:
+        """True once the pending evaluation has finished with the other outcome (or failed)."""
+        if not self.done():
+            return False
+        return self.pending.exception() is not None or self.pending.result() != speculation
+
+    def wait(self) -> bool:
+        """Block until the pending evaluation ends; True if its challenger is promoted."""
+        return self.pending.result()
+
+    def resolve(
+        self, opponent_pool: arena.OpponentPool, writer: CheckpointWriter
+    ) -> Optional[ModelSnapshot]:
+        """Apply the pending decision; returns the new champion, or None if rejected."""
+        promoted = self.pending.result()
+        self.pending = None
+        self.evaluations += 1
+        self._candidate_path.unlink(missing_ok=True)
+        if not promoted:
+            print(f"\n{'=' * 60}\nChampion retains the title (generation {self.pending_generation}).\n{'=' * 60}")
+            return None
+
+        self.promotions += 1
+        promote_challenger(
+            self.candidate, self.pending_generation, self.champion_path, opponent_pool, writer
+        )
+        return self.candidate
+
+    def close(self):
+        self._executor.shutdown(wait=True)
 
 
 def main():
@@ -126,68 +699,159 @@ def main():
         current_champion_path = champion_path
 
     generation = len(opponent_pool.pool)
-    print(f"\n{'=' * 60}\nStarting training at generation {generation}\n{'=' * 60}")
-
-    while True:
-        generation += 1
-
-        # 1. Initialize Challenger
-        init_seed = config.seed + generation * 100000
-        # Create a temp env just for model initialization
-        init_env = create_vec_env(
-            config.n_envs, opponent_model_path=None, seed=init_seed
+    league = None
+    if config.use_league:
+        league = League(
+            config.league_store,
+            n_games=config.league_games,
+            seed=config.league_seed,
+            use_paired_games=config.use_paired_evaluation,
         )
+    print(f"\n{'=' * 60}\nStarting training at generation {generation}\n{'=' * 60}")
 
-        if current_champion_path is not None and current_champion_path.exists():
-            print(f"Loading weights from: {current_champion_path.name}")
-            challenger = MaskablePPO.load(
-                str(current_champion_path),
-                env=init_env,
-                custom_objects={"learning_rate": config.learning_rate},
-                device="cpu",  # Training will move to GPU automatically if available
-                seed=config.seed,
-            )
-            # Reset optimizer
-            challenger.policy.optimizer = challenger.policy.optimizer.__class__(
-                challenger.policy.parameters(),
-                lr=config.learning_rate,  # type: ignore
-            )
-        else:
-            print("No existing champion - creating fresh model.")
-            challenger = MaskablePPO(
-                "MlpPolicy",
-                init_env,
-                learning_rate=config.learning_rate,
-                n_steps=config.n_steps,
-                batch_size=config.batch_size,
-                n_epochs=config.n_epochs,
-                gamma=config.gamma,
-                gae_lambda=config.gae_lambda,
-                clip_range=config.clip_range,
-                ent_coef=config.ent_coef,
-                vf_coef=config.vf_coef,
-                max_grad_norm=config.max_grad_norm,
-                verbose=0,
-                seed=config.seed,
-            )
-        init_env.close()
-
-        # 2. Train
-        train_generation(challenger, opponent_pool, config, generation, rng)
-
-        # 3. Evaluate
-        promote = arena.evaluate_challenger(
-            challenger, current_champion_path, config, generation
+    # CPU plan: learner threads, env and arena workers on separate cores
+    plan = None
+    if config.plan_resources:
+        plan = plan_resources(
+            config.n_envs,
+            config.vec_env_backend,
+            arena_workers=config.arena_workers,
+            learner_threads=config.learner_threads,
+            overlap_arena=config.pipeline_evaluation,
+            pin=config.pin_cpus,
         )
-
-        # 4. Promote
-        if promote:
-            print(f"\n{'=' * 60}\nPROMOTION: Challenger becomes Champion!\n{'=' * 60}")
-            challenger.save(champion_path)
-            opponent_pool.add_champion(champion_path, generation)
-            current_champion_path = champion_path
-        else:
-            print(f"\n{'=' * 60}\nChampion retains the title.\n{'=' * 60}")
+        print(plan.report())
+        configure_process(plan.learner_cpus, plan.learner_threads, plan.pin)
+        arena.set_resource_plan(plan)
+
+    # Profiling; set before EnvPool forks the env workers, which inherit it
+    PROFILER.enabled = config.profile
+
+    # Environments (and their worker processes) live for the whole run
+    env_pool = EnvPool(config, seed=config.seed, plan=plan)
+    init_env = env_pool.env
+
+    tb_writer = None
+    if config.profile and config.profile_tensorboard_dir:
+        from torch.utils.tensorboard import SummaryWriter
+
+        tb_writer = SummaryWriter(config.profile_tensorboard_dir)
+    sampler = SamplingProfiler().start() if config.profile_sampling else None
+    cpu_usage = CpuUsage() if plan is not None else None
+
+    # Checkpoints are written in the background; generations hand weights over in memory
+    checkpoints = CheckpointWriter()
+    pipeline = EvaluationPipeline(config) if config.pipeline_evaluation else None
+    challenger = None
+    # Where a (non-speculative) generation starts: the champion, or the initial model
+    baseline: Optional[ModelSnapshot] = None
+    league_due = False
+
+    try:
+        while True:
+            generation += 1
+
+            # Pipelined: decide where this generation starts while the last one is evaluated
+            speculation = None
+            if pipeline is not None and pipeline.pending is not None:
+                if pipeline.done():
+                    promoted = pipeline.resolve(opponent_pool, checkpoints)
+                    if promoted is not None:
+                        baseline, current_champion_path, league_due = promoted, champion_path, True
+                else:
+                    speculation = pipeline.speculate()
+                    print(
+                        f"Speculating that generation {generation - 1} is "
+                        f"{'promoted' if speculation else 'rejected'} (evaluation still running)"
+                    )
+
+            # 1. Initialize Challenger
+            with PROFILER.timer("phase/model_init"):
+                if challenger is None:
+                    # Only the first generation loads from disk
+                    challenger = init_challenger(config, init_env, current_champion_path)
+                    baseline = ModelSnapshot(challenger)
+                else:
+                    start = pipeline.candidate if speculation else baseline
+                    start.load_into(challenger, config.learning_rate, config.seed)
+
+            # Opponents are picked from (and loaded by) files the writer may still have queued
+            with PROFILER.timer("io/checkpoint_wait"):
+                checkpoints.wait()
+
+            # 2. Train; a rollback retrains from the generator state this starts from
+            rng_state = rng.bit_generator.state
+            with PROFILER.timer("phase/train"):
+                callbacks = None
+                if speculation is not None:
+                    callbacks = [StopCallback(lambda: pipeline.contradicts(speculation))]
+                train_generation(
+                    challenger,
+                    opponent_pool,
+                    config,
+                    generation,
+                    rng,
+                    env_pool=env_pool,
+                    extra_callbacks=callbacks,
+                )
+
+            if speculation is not None:
+                with PROFILER.timer("phase/evaluate_wait"):
+                    was_promoted = pipeline.wait()
+                promoted = pipeline.resolve(opponent_pool, checkpoints)
+                if promoted is not None:
+                    baseline, current_champion_path, league_due = promoted, champion_path, True
+                if was_promoted != speculation:
+                    # Roll back: retrain this generation from the actual champion
+                    print(f"\nSpeculation failed - retraining generation {generation}.")
+                    PROFILER.count("pipeline/rollbacks")
+                    with PROFILER.timer("io/checkpoint_wait"):
+                        checkpoints.wait()
+                    with PROFILER.timer("phase/model_init"):
+                        baseline.load_into(challenger, config.learning_rate, config.seed)
+                    rng.bit_generator.state = rng_state
+                    with PROFILER.timer("phase/train"):
+                        train_generation(
+                            challenger, opponent_pool, config, generation, rng, env_pool=env_pool
+                        )
+                    check_replay(env_pool, opponent_pool, config, generation, rng, rng_state)
+
+            # Evaluation workers load the champion from disk
+            with PROFILER.timer("io/checkpoint_wait"):
+                checkpoints.wait()
+
+            # Rate the newest champion against the pool (cached pairings are skipped)
+            if league is not None and league_due:
+                with PROFILER.timer("phase/league"):
+                    played = league.run_gauntlet(opponent_pool.pool)
+                print(f"\nLeague ratings ({played} new pairings):\n{league.report(opponent_pool.pool)}")
+                league_due = False
+
+            # 3. Evaluate
+            if pipeline is not None:
+                # Promotion is applied when the next generation resolves it
+                pipeline.submit(challenger, current_champion_path, generation)
+            else:
+                with PROFILER.timer("phase/evaluate"):
+                    promote = arena.evaluate_challenger(
+                        challenger, current_champion_path, config, generation
+                    )
+
+                # 4. Promote
+                if promote:
+                    baseline = ModelSnapshot(challenger)
+                    promote_challenger(baseline, generation, champion_path, opponent_pool, checkpoints)
+                    current_champion_path = champion_path
+                    league_due = True
+                else:
+                    print(f"\n{'=' * 60}\nChampion retains the title.\n{'=' * 60}")
+
+            # 5. Profile
+            if config.profile:
+                report_profile(config, generation, tb_writer, sampler, plan, cpu_usage)
+    finally:
+        # Do not lose a champion that is still being written
+        checkpoints.close()
 
 
 if __name__ == "__main__":
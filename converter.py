@@ -1,3 +1,5 @@
+import sys
+
 import torch
 import torch.nn as nn
 from sb3_contrib import MaskablePPO
@@ -48,3 +50,22 @@ torch.onnx.export(
 )
 
 print(f"Model successfully converted to {onnx_file}")
+
+# 5. Optional quantized variants: `python -m converter int8 float16`
+for precision in sys.argv[1:]:
+    if precision == "int8":
+        # Dynamic quantization: int8 weights, activations quantized at runtime
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        quantize_dynamic(onnx_file, "model.int8.onnx", weight_type=QuantType.QInt8)
+        print("Quantized model written to model.int8.onnx")
+    elif precision == "float16":
+        import onnx
+        from onnxconverter_common import float16
+
+        # Keep float32 inputs/outputs so callers do not change
+        fp16_model = float16.convert_float_to_float16(onnx.load(onnx_file), keep_io_types=True)
+        onnx.save(fp16_model, "model.float16.onnx")
+        print("Half-precision model written to model.float16.onnx")
+    else:
+        raise SystemExit(f"Unknown precision: {precision} (expected int8 or float16)")
@@ -0,0 +1,341 @@
+import numpy as np
+from dataclasses import dataclass
+from typing import Optional
+from core.constants import (
+    ITEMS,
+    GAME_ACTIONS,
+    OBS_SIZE,
+    MAX_HP,
+    MAX_ITEM_COUNT,
+    MAX_CYLINDER,
+    HANDCUFF_MAX,
+    ITEM_ACTION_OFFSET,
+)
+
+# Side indices used along the "player" axis of every per-side array.
+PLAYER = 0
+DEALER = 1
+
+# Action indices (see ACTION_MAP); item actions are ITEM_ACTION_OFFSET + item index.
+SHOOT_SELF = 0
+SHOOT_TARGET = 1
+USE_GLASS = 2
+USE_CIGARETTES = 3
+USE_HANDCUFFS = 4
+USE_SAW = 5
+USE_BEER = 6
+
+# Item indices, in ITEMS order.
+GLASS = 0
+CIGARETTES = 1
+HANDCUFFS = 2
+SAW = 3
+BEER = 4
+
+MAX_BULLETS = 8
+NUM_ITEMS = len(ITEMS)
+NUM_ACTIONS = len(GAME_ACTIONS)
+
+
+@dataclass
+class BatchedStepResult:
+    """Array counterpart of StepResult; every field has one entry per stepped game."""
+
+    indices: np.ndarray
+    valid: np.ndarray
+    actions: np.ndarray
+    prev_bot_hp: np.ndarray
+    prev_target_hp: np.ndarray
+    new_bot_hp: np.ndarray
+    new_target_hp: np.ndarray
+    player_dead: np.ndarray
+    dealer_dead: np.ndarray
+    terminated: np.ndarray
+
+
+class BatchedBuckshotGame:
+    """
+    Struct-of-arrays Buckshot Roulette engine that advances N games per call.
+
+    Rules mirror BuckshotRouletteGame (process_action_result, switch_turns,
+    start_new_subround); the batch shares a single RNG, so individual games
+    do not reproduce the per-seed streams of the scalar engine.
+    """
+
+    def __init__(self, n_games: int, rng_seed: int = 0):
+        self.n_games = n_games
+        self.rng = np.random.default_rng(rng_seed)
+        self.max_hp = 5
+        self.max_bullets = MAX_BULLETS
+        self.max_inventory_capacity = 8
+
+        n = n_games
+        self.round = np.ones(n, dtype=np.int32)
+        self.sub_round = np.ones(n, dtype=np.int32)
+        self.turn = np.zeros(n, dtype=np.int8)
+        self.hp = np.full((n, 2), 4, dtype=np.int8)
+        self.items = np.zeros((n, 2, NUM_ITEMS), dtype=np.int8)
+        self.handcuff_strength = np.zeros((n, 2), dtype=np.int8)
+        self.known_next = np.zeros((n, 2), dtype=bool)
+        self.saw_active = np.zeros(n, dtype=bool)
+
+        # Magazine: bullets[i, :n_bullets[i]] is the sequence, cursor the next shell.
+        self.bullets = np.zeros((n, MAX_BULLETS), dtype=np.int8)
+        self.n_bullets = np.zeros(n, dtype=np.int8)
+        self.cursor = np.zeros(n, dtype=np.int8)
+        self.lives_left = np.zeros(n, dtype=np.int8)
+        self.blanks_left = np.zeros(n, dtype=np.int8)
+
+        self._all = np.arange(n)
+        self.reset()
+
+    def _indices(self, indices: Optional[np.ndarray]) -> np.ndarray:
+        if indices is None:
+            return self._all
+        indices = np.asarray(indices)
+        if indices.dtype == bool:
+            return np.flatnonzero(indices)
+        return indices
+
+    # --- Setup ---
+
+    def reset(self, indices: Optional[np.ndarray] = None) -> None:
+        """Start fresh games (round 1 -> start_new_round) at the given indices."""
+        g = self._indices(indices)
+        if len(g) == 0:
+            return
+        self.round[g] = 1
+        self.sub_round[g] = 1
+        self.saw_active[g] = False
+        self.start_new_round(g)
+
+    def _generate_combo(self, g: np.ndarray):
+        k = len(g)
+        rng = self.rng
+        sub = self.sub_round[g]
+        c1 = sub == 1
+        c2 = sub == 2
+        early = c1 | c2
+
+        hp = np.where(
+            early,
+            rng.integers(4, 6, size=k),
+            rng.integers(3, self.max_hp, size=k),
+        )
+        num_bullets = np.where(
+            c1,
+            rng.integers(2, 5, size=k),
+            np.where(
+                c2,
+                rng.integers(2, 7, size=k),
+                rng.integers(3, self.max_bullets, size=k),
+            ),
+        )
+        lives_percentage = np.where(
+            c1,
+            rng.uniform(0.25, 0.5, size=k),
+            np.where(c2, rng.uniform(0.3, 0.6, size=k), rng.uniform(0.4, 0.8, size=k)),
+        )
+        num_items = np.where(
+            c1,
+            rng.integers(0, 2, size=k),
+            np.where(
+                c2,
+                rng.integers(1, 3, size=k),
+                rng.choice([1, 2, 3], size=k, p=[0.5, 0.35, 0.15]),
+            ),
+        )
+
+        lives = np.floor(num_bullets * lives_percentage).astype(np.int64)
+        lives = np.maximum(1, np.minimum(lives, num_bullets - 1))
+        blanks = num_bullets - lives
+        return num_items, hp, blanks, lives
+
+    def _give_items(self, g: np.ndarray, num_items: np.ndarray) -> None:
+        if len(g) == 0:
+            return
+        for k in range(int(num_items.max())):
+            draws = self.rng.integers(0, NUM_ITEMS, size=(len(g), 2))
+            for side in (PLAYER, DEALER):
+                room = self.items[g, side].sum(axis=1) < self.max_inventory_capacity
+                take = (num_items > k) & room
+                self.items[g[take], side, draws[take, side]] += 1
+
+    def _load_magazine(self, g: np.ndarray, lives: np.ndarray, blanks: np.ndarray):
+        n = lives + blanks
+        slots = np.arange(MAX_BULLETS)
+        in_mag = slots[None, :] < n[:, None]
+        # Random ranks over the loaded slots; the `lives` lowest ranks are live.
+        keys = np.where(in_mag, self.rng.random((len(g), MAX_BULLETS)), np.inf)
+        ranks = np.argsort(np.argsort(keys, axis=1), axis=1)
+        self.bullets[g] = (in_mag & (ranks < lives[:, None])).astype(np.int8)
+        self.n_bullets[g] = n
+        self.cursor[g] = 0
+        self.lives_left[g] = lives
+        self.blanks_left[g] = blanks
+
+    def start_new_subround(self, g: np.ndarray) -> None:
+        if len(g) == 0:
+            return
+        self.sub_round[g] += 1
+        num_items, _, blanks, lives = self._generate_combo(g)
+
+        self.handcuff_strength[g] = 0
+        self._give_items(g, num_items)
+        self.turn[g] = self.rng.integers(0, 2, size=len(g))
+        self._load_magazine(g, lives, blanks)
+        self.known_next[g] = False
+
+    def start_new_round(self, g: np.ndarray) -> None:
+        self.round[g] += 1
+        self.sub_round[g] = 0
+        self.items[g] = 0
+
+        _, hp, _, _ = self._generate_combo(g)
+        self.hp[g] = hp[:, None]
+        self.start_new_subround(g)
+
+    # --- Rules ---
+
+    def _switch_turns(self, g: np.ndarray) -> None:
+        current = self.turn[g]
+        other = 1 - current
+        cuffed = self.handcuff_strength[g, other] >= HANDCUFF_MAX
+        self.turn[g] = np.where(cuffed, current, other)
+        self.handcuff_strength[g, other] = np.where(cuffed, 1, 0)
+
+    def _pop_bullet(self, g: np.ndarray) -> np.ndarray:
+        bullet = self.bullets[g, self.cursor[g]]
+        self.cursor[g] += 1
+        self.lives_left[g] -= bullet
+        self.blanks_left[g] -= 1 - bullet
+        return bullet
+
+    def get_valid_actions_mask(self, indices: Optional[np.ndarray] = None) -> np.ndarray:
+        g = self._indices(indices)
+        actor = self.turn[g]
+        target = 1 - actor
+
+        mask = np.zeros((len(g), NUM_ACTIONS), dtype=np.int8)
+        mask[:, SHOOT_SELF] = 1
+        mask[:, SHOOT_TARGET] = 1
+        mask[:, ITEM_ACTION_OFFSET:] = self.items[g, actor] > 0
+        mask[self.handcuff_strength[g, target] != 0, USE_HANDCUFFS] = 0
+        mask[self.saw_active[g], USE_SAW] = 0
+        return mask
+
+    def step(
+        self, actions: np.ndarray, indices: Optional[np.ndarray] = None
+    ) -> BatchedStepResult:
+        """Apply one action per selected game; invalid actions leave the game untouched."""
+        g = self._indices(indices)
+        actions = np.asarray(actions, dtype=np.int64)
+        actor = self.turn[g].astype(np.int64)
+        target = 1 - actor
+
+        valid = self.get_valid_actions_mask(g)[np.arange(len(g)), actions].astype(bool)
+        prev_bot_hp = self.hp[g, actor]
+        prev_target_hp = self.hp[g, target]
+
+        # Shooting (self or target)
+        sel = valid & (actions <= SHOOT_TARGET)
+        if sel.any():
+            gs, act, tgt = g[sel], actor[sel], target[sel]
+            shoot_self = actions[sel] == SHOOT_SELF
+            victim = np.where(shoot_self, act, tgt)
+            damage = np.where(self.saw_active[gs], 2, 1)
+            hit = self._pop_bullet(gs) == 1
+            self.hp[gs[hit], victim[hit]] = np.maximum(
+                self.hp[gs[hit], victim[hit]] - damage[hit], 0
+            )
+            self._switch_turns(gs[hit | ~shoot_self])
+            self.saw_active[gs] = False
+            self.known_next[gs, act] = False
+
+        # Item use
+        sel = valid & (actions >= ITEM_ACTION_OFFSET)
+        if sel.any():
+            gi, act, tgt, a = g[sel], actor[sel], target[sel], actions[sel]
+            self.items[gi, act, a - ITEM_ACTION_OFFSET] -= 1
+
+            m = a == USE_GLASS
+            self.known_next[gi[m], act[m]] = True
+
+            m = a == USE_CIGARETTES
+            self.hp[gi[m], act[m]] += self.hp[gi[m], act[m]] < self.max_hp
+
+            m = a == USE_HANDCUFFS
+            self.handcuff_strength[gi[m], tgt[m]] = HANDCUFF_MAX
+
+            m = a == USE_SAW
+            self.saw_active[gi[m]] = True
+
+            m = a == USE_BEER
+            self._pop_bullet(gi[m])
+            self.known_next[gi[m]] = False
+
+        # prepare_for_next_turn
+        gv = g[valid]
+        self.start_new_subround(gv[self.cursor[gv] >= self.n_bullets[gv]])
+
+        player_dead = self.hp[g, PLAYER] <= 0
+        dealer_dead = self.hp[g, DEALER] <= 0
+        return BatchedStepResult(
+            indices=g,
+            valid=valid,
+            actions=actions,
+            prev_bot_hp=prev_bot_hp,
+            prev_target_hp=prev_target_hp,
+            new_bot_hp=self.hp[g, actor],
+            new_target_hp=self.hp[g, target],
+            player_dead=player_dead,
+            dealer_dead=dealer_dead,
+            terminated=player_dead | dealer_dead,
+        )
+
+    # --- Observations ---
+
+    def is_terminal(self, indices: Optional[np.ndarray] = None) -> np.ndarray:
+        g = self._indices(indices)
+        return (self.hp[g] <= 0).any(axis=1)
+
+    def get_obs(
+        self,
+        side: np.ndarray,
+        indices: Optional[np.ndarray] = None,
+        out: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """
+        Build BuckshotRouletteEnv observations for the given games.
+
+        Args:
+            side: PLAYER/DEALER index of the observing ("bot") side, per game or scalar.
+            indices: Games to observe (default: all).
+            out: Optional (k, OBS_SIZE) float32 buffer to write into.
+        """
+        g = self._indices(indices)
+        bot = np.broadcast_to(np.asarray(side, dtype=np.int64), g.shape)
+        target = 1 - bot
+        if out is None:
+            out = np.empty((len(g), OBS_SIZE), dtype=np.float32)
+
+        hp_inv = 1.0 / MAX_HP
+        item_inv = 1.0 / MAX_ITEM_COUNT
+        cyl_inv = 1.0 / MAX_CYLINDER
+
+        out[:, 0] = self.hp[g, bot] * hp_inv
+        out[:, 1:6] = self.items[g, bot] * item_inv
+        out[:, 6] = self.hp[g, target] * hp_inv
+        out[:, 7:12] = self.items[g, target] * item_inv
+        out[:, 12] = self.handcuff_strength[g, target] * (1.0 / HANDCUFF_MAX)
+        out[:, 13] = self.blanks_left[g] * cyl_inv
+        out[:, 14] = self.lives_left[g] * cyl_inv
+
+        cursor = np.minimum(self.cursor[g], MAX_BULLETS - 1)
+        next_live = self.bullets[g, cursor] == 1
+        known = self.known_next[g, bot] & (self.cursor[g] < self.n_bullets[g])
+        out[:, 15] = known & next_live
+        out[:, 16] = known & ~next_live
+        out[:, 17] = ~known
+        out[:, 18] = self.saw_active[g]
+        return out
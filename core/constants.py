@@ -15,6 +15,7 @@ class Item(Enum):
     BEER = "Beer"
 
 ITEMS: list[Item] = list(Item)
+ITEM_INDEX = {item: i for i, item in enumerate(Item)}  # enum → inventory slot
 
 class GameAction(Enum):
     SHOOT_SELF = "shoot_self"
@@ -29,6 +30,8 @@ class GameAction(Enum):
 GAME_ACTIONS: list[GameAction] = list(GameAction)   # full action set
 ACTION_MAP = {i: action for i, action in enumerate(GameAction)}  # int → enum
 ACTION_MAP_INV = {action: i for i, action in enumerate(GameAction)}  # enum → int
+# Item actions follow the two shoot actions in ITEMS order (USE_GLASS = 2 + GLASS slot, ...)
+ITEM_ACTION_OFFSET = 2
 
 # --- Env constants ---
 OBS_SIZE = 19
@@ -1,18 +1,38 @@
 import gymnasium as gym
 import numpy as np
 from typing import Optional, Callable, Dict, Any
-from core.game import BuckshotRouletteGame
+from core.game import (
+    BuckshotRouletteGame,
+    DIRTY_ALL,
+    DIRTY_HP,
+    DIRTY_ITEMS,
+    DIRTY_HANDCUFFS,
+    DIRTY_MAGAZINE,
+    DIRTY_SAW,
+)
+from core.records import GameRecorder
+from core.episode_stats import EpisodeStats, WIN, LOSS, DRAW
 from core.constants import (
-    Item,
     Turn,
     ACTION_MAP,
+    ACTION_MAP_INV,
+    GameAction,
     GAME_ACTIONS,
     OBS_SIZE,
     MAX_HP,
     MAX_ITEM_COUNT,
     MAX_CYLINDER,
+    ITEM_ACTION_OFFSET,
 )
 
+AGENT = 0
+OPPONENT = 1
+
+# Mask entries depend on the side's items, the other side's handcuffs and the saw
+_MASK_DIRTY = DIRTY_ITEMS | DIRTY_HANDCUFFS | DIRTY_SAW
+_USE_HANDCUFFS_IDX = ACTION_MAP_INV[GameAction.USE_HANDCUFFS]
+_USE_SAW_IDX = ACTION_MAP_INV[GameAction.USE_SAW]
+
 
 class BuckshotRouletteEnv(gym.Env):
     metadata = {"render_modes": ["human"]}
@@ -21,11 +41,13 @@ class BuckshotRouletteEnv(gym.Env):
         self,
         opponent_policy: Optional[Callable] = None,
         force_agent_as_player: Optional[bool] = None,
+        recorder: Optional[GameRecorder] = None,
     ):
         super().__init__()
 
         self.opponent_policy = opponent_policy
         self.force_agent_as_player = force_agent_as_player
+        self.recorder = recorder  # Optional: logs every episode (core.records)
         self.game = BuckshotRouletteGame()
 
         self.action_space = gym.spaces.Discrete(len(GAME_ACTIONS))
@@ -36,69 +58,109 @@ class BuckshotRouletteEnv(gym.Env):
         self._agent_is_player = True
         self._agent_went_first = False
         self._episode_steps = 0
+        self._invalid_actions = 0
         self._max_episode_steps = 1000
+        # Finished episodes, drained by the training callback (EpisodeStatsCallback)
+        self.episode_stats = EpisodeStats()
 
         # Optimization: Pre-allocation & Caching
-        self._obs_array = np.zeros(OBS_SIZE, dtype=np.float32)
-        self._action_mask = np.zeros(len(GAME_ACTIONS), dtype=np.int8)
+        # One observation and mask buffer per perspective (AGENT, OPPONENT),
+        # refreshed lazily from the game's dirty flags.
+        self._obs = np.zeros((2, OBS_SIZE), dtype=np.float32)
+        self._masks = np.zeros((2, len(GAME_ACTIONS)), dtype=np.int8)
+        self._masks[:, :ITEM_ACTION_OFFSET] = 1  # Shooting is always valid
+        self._obs_dirty = [DIRTY_ALL, DIRTY_ALL]
+        self._mask_dirty = [DIRTY_ALL, DIRTY_ALL]
         self._max_hp_inv = 1.0 / MAX_HP
         self._max_item_inv = 1.0 / MAX_ITEM_COUNT
         self._max_cylinder_inv = 1.0 / MAX_CYLINDER
         self._handcuff_inv = 1.0 / 2.0
 
+    def _sides(self, perspective: int):
+        """(bot, target) Players seen from AGENT or OPPONENT."""
+        if (perspective == AGENT) == self._agent_is_player:
+            return self.game.player, self.game.dealer
+        return self.game.dealer, self.game.player
+
+    def _sync(self):
+        """Propagate state changes since the last call to both perspectives."""
+        dirty = self.game.consume_dirty()
+        if dirty:
+            self._obs_dirty[AGENT] |= dirty
+            self._obs_dirty[OPPONENT] |= dirty
+            self._mask_dirty[AGENT] |= dirty
+            self._mask_dirty[OPPONENT] |= dirty
+
+    def _invalidate(self):
+        """Force a full rebuild, e.g. after replacing or editing the game directly."""
+        self.game.dirty = DIRTY_ALL
+        self._sync()
+
     def _get_obs(self, for_opponent: bool = False) -> np.ndarray:
-        if for_opponent:
-            bot = self.game.dealer if self._agent_is_player else self.game.player
-            target = self.game.player if self._agent_is_player else self.game.dealer
-        else:
-            bot = self.game.player if self._agent_is_player else self.game.dealer
-            target = self.game.dealer if self._agent_is_player else self.game.player
-
-        bot_items = bot.items
-        target_items = target.items
-        obs = self._obs_array
-
-        # Bot stats
-        obs[0] = bot.hp * self._max_hp_inv
-        obs[1] = bot_items.count(Item.GLASS) * self._max_item_inv
-        obs[2] = bot_items.count(Item.CIGARETTES) * self._max_item_inv
-        obs[3] = bot_items.count(Item.HANDCUFFS) * self._max_item_inv
-        obs[4] = bot_items.count(Item.SAW) * self._max_item_inv
-        obs[5] = bot_items.count(Item.BEER) * self._max_item_inv
-
-        # Target stats
-        obs[6] = target.hp * self._max_hp_inv
-        obs[7] = target_items.count(Item.GLASS) * self._max_item_inv
-        obs[8] = target_items.count(Item.CIGARETTES) * self._max_item_inv
-        obs[9] = target_items.count(Item.HANDCUFFS) * self._max_item_inv
-        obs[10] = target_items.count(Item.SAW) * self._max_item_inv
-        obs[11] = target_items.count(Item.BEER) * self._max_item_inv
-        obs[12] = target.handcuff_strength * self._handcuff_inv
-
-        # Bullet info
-        bullet_seq = self.game.bullet_sequence
-        blanks_left = bullet_seq.count(0)
-        lives_left = len(bullet_seq) - blanks_left
-
-        obs[13] = blanks_left * self._max_cylinder_inv
-        obs[14] = lives_left * self._max_cylinder_inv
-
-        # Next bullet knowledge
-        if bot.known_next and len(bullet_seq) > 0:
-            obs[15] = 1.0 if bullet_seq[0] == 1 else 0.0  # Live
-            obs[16] = 1.0 if bullet_seq[0] == 0 else 0.0  # Blank
-            obs[17] = 0.0
-        else:
-            obs[15] = 0.0
-            obs[16] = 0.0
-            obs[17] = 1.0  # Unknown
+        """
+        Observation from the agent's (or opponent's) point of view.
+
+        Only the feature groups whose dirty flag is set are rewritten. The
+        returned array is the perspective's cached buffer: copy it to keep it.
+        """
+        self._sync()
+        perspective = OPPONENT if for_opponent else AGENT
+        obs = self._obs[perspective]
+        dirty = self._obs_dirty[perspective]
+        if not dirty:
+            return obs
+        self._obs_dirty[perspective] = 0
+
+        game = self.game
+        bot, target = self._sides(perspective)
+
+        if dirty & DIRTY_HP:
+            obs[0] = bot.hp * self._max_hp_inv
+            obs[6] = target.hp * self._max_hp_inv
+
+        if dirty & DIRTY_ITEMS:
+            np.multiply(bot.item_counts, self._max_item_inv, out=obs[1:6])
+            np.multiply(target.item_counts, self._max_item_inv, out=obs[7:12])
+
+        if dirty & DIRTY_HANDCUFFS:
+            obs[12] = target.handcuff_strength * self._handcuff_inv
+
+        if dirty & DIRTY_MAGAZINE:
+            obs[13] = game.blanks_left * self._max_cylinder_inv
+            obs[14] = game.lives_left * self._max_cylinder_inv
+
+            # Next bullet knowledge
+            if bot.known_next and game.lives_left + game.blanks_left > 0:
+                next_live = game.next_bullet()
+                obs[15] = 1.0 if next_live else 0.0  # Live
+                obs[16] = 0.0 if next_live else 1.0  # Blank
+                obs[17] = 0.0
+            else:
+                obs[15] = 0.0
+                obs[16] = 0.0
+                obs[17] = 1.0  # Unknown
 
-        obs[18] = 1.0 if self.game.saw_active else 0.0
+        if dirty & DIRTY_SAW:
+            obs[18] = 1.0 if game.saw_active else 0.0
 
         return obs
 
     def action_masks(self) -> np.ndarray:
-        return self.game.get_valid_actions_mask()
+        """
+        Valid-action mask of the side to move (a cached buffer: do not modify).
+        """
+        self._sync()
+        perspective = AGENT if self._is_agent_turn() else OPPONENT
+        mask = self._masks[perspective]
+        if self._mask_dirty[perspective] & _MASK_DIRTY:
+            self._mask_dirty[perspective] = 0
+            bot, target = self._sides(perspective)
+            np.greater(bot.item_counts, 0, out=mask[ITEM_ACTION_OFFSET:])
+            if target.handcuff_strength != 0:
+                mask[_USE_HANDCUFFS_IDX] = 0
+            if self.game.saw_active:
+                mask[_USE_SAW_IDX] = 0
+        return mask
 
     def reset(
         self, seed: Optional[int] = None, options: Optional[Dict[str, Any]] = None
@@ -113,6 +175,7 @@ class BuckshotRouletteEnv(gym.Env):
 
         self.game = BuckshotRouletteGame(rng_seed=seed)
         self.game.start_new_round()
+        self._invalidate()
 
         # Role assignment
         if self.force_agent_as_player is not None:
@@ -123,6 +186,8 @@ class BuckshotRouletteEnv(gym.Env):
         # Turn order
         agent_goes_first = rng.choice([True, False])
         self._agent_went_first = agent_goes_first
+        if self.recorder is not None:
+            self.recorder.begin_episode(seed, self._agent_is_player, agent_goes_first)
 
         if self._agent_is_player:
             if agent_goes_first:
@@ -138,6 +203,7 @@ class BuckshotRouletteEnv(gym.Env):
                 self._opponent_turn()
 
         self._episode_steps = 0
+        self._invalid_actions = 0
         return self._get_obs(), {}
 
     def _opponent_turn(self):
@@ -160,6 +226,8 @@ class BuckshotRouletteEnv(gym.Env):
                     break
                 action_idx = np.random.choice(valid_actions)
 
+            if self.recorder is not None:
+                self.recorder.record_step(self.game, action_idx)
             action = ACTION_MAP[action_idx]
             self.game.step(action)
             opponent_steps += 1
@@ -176,6 +244,8 @@ class BuckshotRouletteEnv(gym.Env):
 
     def step(self, action_idx: int) -> tuple:
         self._episode_steps += 1
+        if self.recorder is not None:
+            self.recorder.record_step(self.game, action_idx)
         action = ACTION_MAP[action_idx]
         step_result = self.game.step(action)
         terminated = step_result.terminated
@@ -185,6 +255,7 @@ class BuckshotRouletteEnv(gym.Env):
         # Calculate Reward
         if not step_result.valid:
             reward = -10.0
+            self._invalid_actions += 1
         else:
             reward = 0.0
             if opponent_hp_change < 0:
@@ -216,6 +287,10 @@ class BuckshotRouletteEnv(gym.Env):
                     reward += 100.0 if player_hp <= 0 else -100.0
 
         truncated = self._episode_steps >= self._max_episode_steps
+        if terminated or truncated:
+            self._record_episode()
+            if self.recorder is not None:
+                self.recorder.end_episode(self.game, finished=terminated)
         info = {
             "invalid_action": not step_result.valid,
             "episode_steps": self._episode_steps,
@@ -223,13 +298,32 @@ class BuckshotRouletteEnv(gym.Env):
 
         return self._get_obs(), reward, terminated, truncated, info
 
+    def _record_episode(self):
+        agent, opponent = self._sides(AGENT)
+        outcome = DRAW
+        if agent.hp <= 0:
+            outcome = LOSS
+        elif opponent.hp <= 0:
+            outcome = WIN
+        self.episode_stats.record(
+            outcome,
+            self._episode_steps,
+            self._invalid_actions,
+            self._agent_is_player,
+            self._agent_went_first,
+        )
+
+    def drain_episode_stats(self) -> np.ndarray:
+        """Episodes finished since the last call (EPISODE_STATS_DTYPE rows)."""
+        return self.episode_stats.drain()
+
     def render(self):
         print(f"\n=== Round {self.game.round}, Subround {self.game.sub_round} ===")
         print(f"Player HP: {self.game.player.hp} | Dealer HP: {self.game.dealer.hp}")
         print(f"Turn: {self.game.turn.name}")
         print(
-            f"Bullets: {len(self.game.bullet_sequence)} "
-            f"({self.game.bullet_sequence.count(1)} live, {self.game.bullet_sequence.count(0)} blank)"
+            f"Bullets: {self.game.bullets_left} "
+            f"({self.game.lives_left} live, {self.game.blanks_left} blank)"
         )
         print(f"Player items: {[item.name for item in self.game.player.items]}")
         print(f"Dealer items: {[item.name for item in self.game.dealer.items]}")
@@ -0,0 +1,108 @@
+import numpy as np
+
+# Episode outcomes from the agent's view
+WIN = 1
+LOSS = -1
+DRAW = 0  # Also truncated episodes
+
+EPISODE_STATS_DTYPE = np.dtype(
+    [
+        ("outcome", "i1"),
+        ("length", "<u4"),  # Agent actions
+        ("invalid", "<u4"),  # Agent actions rejected by the game
+        ("agent_is_player", "?"),
+        ("agent_went_first", "?"),
+    ]
+)
+
+
+class EpisodeStats:
+    """
+    Fixed-size ring buffers of finished episodes, one per env.
+
+    record() writes into preallocated rows; nothing is allocated until
+    drain() copies out the episodes finished since the previous drain. If
+    more than `capacity` episodes finish in between, the oldest are
+    overwritten and counted in `dropped`.
+    """
+
+    def __init__(self, capacity: int = 256, n_envs: int = 1):
+        self.capacity = capacity
+        self._rows = np.zeros((n_envs, capacity), dtype=EPISODE_STATS_DTYPE)
+        self._written = np.zeros(n_envs, dtype=np.int64)
+        self._drained = np.zeros(n_envs, dtype=np.int64)
+        self.dropped = 0
+
+    def record(
+        self,
+        outcome: int,
+        length: int,
+        invalid: int,
+        agent_is_player: bool,
+        agent_went_first: bool,
+        env: int = 0,
+    ):
+        """One finished episode of `env`."""
+        row = self._rows[env, self._written[env] % self.capacity]
+        row["outcome"] = outcome
+        row["length"] = length
+        row["invalid"] = invalid
+        row["agent_is_player"] = agent_is_player
+        row["agent_went_first"] = agent_went_first
+        self._written[env] += 1
+
+    def record_batch(
+        self,
+        envs: np.ndarray,
+        outcome: np.ndarray,
+        length: np.ndarray,
+        invalid: np.ndarray,
+        agent_is_player: np.ndarray,
+        agent_went_first: np.ndarray,
+    ):
+        """Finished episodes of distinct `envs` (vectorized record())."""
+        pos = self._written[envs] % self.capacity
+        rows = self._rows
+        rows["outcome"][envs, pos] = outcome
+        rows["length"][envs, pos] = length
+        rows["invalid"][envs, pos] = invalid
+        rows["agent_is_player"][envs, pos] = agent_is_player
+        rows["agent_went_first"][envs, pos] = agent_went_first
+        self._written[envs] += 1
+
+    def drain(self, env: int = 0) -> np.ndarray:
+        """Episodes of `env` finished since the last drain, oldest first."""
+        n = int(self._written[env] - self._drained[env])
+        if n > self.capacity:
+            self.dropped += n - self.capacity
+            n = self.capacity
+        start = int(self._written[env] - n)
+        pos = (start + np.arange(n)) % self.capacity
+        self._drained[env] = self._written[env]
+        return self._rows[env, pos]
+
+
+def summarize(rows: np.ndarray) -> dict:
+    """Win/loss/draw rates, lengths, invalid-action rate and role/turn-order splits."""
+    n = len(rows)
+    if n == 0:
+        return {"episodes": 0}
+    won = rows["outcome"] == WIN
+    steps = int(rows["length"].sum())
+    summary = {
+        "episodes": n,
+        "win_rate": float(won.mean()),
+        "loss_rate": float((rows["outcome"] == LOSS).mean()),
+        "draw_rate": float((rows["outcome"] == DRAW).mean()),
+        "mean_length": steps / n,
+        "invalid_action_rate": float(rows["invalid"].sum()) / max(steps, 1),
+    }
+    for name, split in (
+        ("as_player", rows["agent_is_player"]),
+        ("as_dealer", ~rows["agent_is_player"]),
+        ("going_first", rows["agent_went_first"]),
+        ("going_second", ~rows["agent_went_first"]),
+    ):
+        if split.any():
+            summary[f"win_rate_{name}"] = float(won[split].mean())
+    return summary
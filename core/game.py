@@ -1,15 +1,57 @@
+import struct
+
 import numpy as np
 from core.constants import (
     Turn,
     SubroundCombo,
     Item,
     ITEMS,
+    ITEM_INDEX,
+    ITEM_ACTION_OFFSET,
     GameAction,
     GAME_ACTIONS,
     ACTION_MAP_INV,
     StepResult,
 )
 
+GLASS = ITEM_INDEX[Item.GLASS]
+CIGARETTES = ITEM_INDEX[Item.CIGARETTES]
+HANDCUFFS = ITEM_INDEX[Item.HANDCUFFS]
+SAW = ITEM_INDEX[Item.SAW]
+BEER = ITEM_INDEX[Item.BEER]
+
+_USE_HANDCUFFS_IDX = ACTION_MAP_INV[GameAction.USE_HANDCUFFS]
+_USE_SAW_IDX = ACTION_MAP_INV[GameAction.USE_SAW]
+
+# Dirty flags: which groups of observable state changed since the last consume_dirty()
+DIRTY_HP = 1
+DIRTY_ITEMS = 2
+DIRTY_HANDCUFFS = 4
+DIRTY_MAGAZINE = 8  # shell counts, next shell and who knows it
+DIRTY_SAW = 16
+DIRTY_ALL = 31
+
+_SHOT_DIRTY = DIRTY_HP | DIRTY_MAGAZINE | DIRTY_SAW | DIRTY_HANDCUFFS
+_ACTION_DIRTY = {
+    GameAction.SHOOT_TARGET: _SHOT_DIRTY,
+    GameAction.SHOOT_SELF: _SHOT_DIRTY,
+    GameAction.USE_GLASS: DIRTY_ITEMS | DIRTY_MAGAZINE,
+    GameAction.USE_CIGARETTES: DIRTY_ITEMS | DIRTY_HP,
+    GameAction.USE_HANDCUFFS: DIRTY_ITEMS | DIRTY_HANDCUFFS,
+    GameAction.USE_SAW: DIRTY_ITEMS | DIRTY_SAW,
+    GameAction.USE_BEER: DIRTY_ITEMS | DIRTY_MAGAZINE,
+}
+
+
+_U64 = (1 << 64) - 1
+
+# snapshot() layout: round, sub_round (32-bit: a game has no sub-round
+# limit), turn, saw; per side hp, handcuffs, known_next, item count, item
+# counts; magazine; PCG64 state and increment (as 64-bit halves),
+# has_uint32, uinteger.
+_SNAPSHOT = struct.Struct(f"<IIBB{'bBBB%ds' % len(ITEMS) * 2}BBBB4QBI")
+SNAPSHOT_SIZE = _SNAPSHOT.size
+
 
 class Player:
     def __init__(self, rng: np.random.Generator):
@@ -17,14 +59,33 @@ class Player:
         self.hp: int = 4
         self.max_inventory_capacity: int = 8
         self.handcuff_strength = 0
-        self.items: list[Item] = []
+        # Inventory as per-item counts (ITEMS order) plus a cached total.
+        self.item_counts = np.zeros(len(ITEMS), dtype=np.int8)
+        self.num_items: int = 0
         self.known_next: bool = False
 
+    @property
+    def items(self) -> list[Item]:
+        """Inventory expanded into a list of Items (for display/debugging)."""
+        return [item for item, n in zip(ITEMS, self.item_counts) for _ in range(n)]
+
+    def has_item(self, slot: int) -> bool:
+        return self.item_counts[slot] > 0
+
+    def use_item(self, slot: int) -> None:
+        self.item_counts[slot] -= 1
+        self.num_items -= 1
+
+    def clear_items(self) -> None:
+        self.item_counts[:] = 0
+        self.num_items = 0
+
     def get_items(self, num_items: int = 2) -> None:
         for _ in range(num_items):
-            if len(self.items) >= self.max_inventory_capacity:
+            if self.num_items >= self.max_inventory_capacity:
                 return
-            self.items.append(self.rng.choice(ITEMS))  # type: ignore
+            self.item_counts[self.rng.integers(0, len(ITEMS))] += 1
+            self.num_items += 1
 
 
 class BuckshotRouletteGame:
@@ -38,17 +99,153 @@ class BuckshotRouletteGame:
         self.saw_active: bool = False
         self.max_hp = 5
         self.max_bullets = 8
-        self.bullet_sequence: list[int] = self.generate_bullet_sequence()
 
-    def generate_bullet_sequence(
-        self, num_lives: int = 1, num_blanks: int = 1
-    ) -> list[int]:
+        # Magazine: bit i of bullet_bits is shell i (1 = live), bullet_cursor the next shell.
+        self.bullet_bits: int = 0
+        self.bullet_cursor: int = 0
+        self.lives_left: int = 0
+        self.blanks_left: int = 0
+        self.load_magazine()
+
+        # Set by every state change made through the game's methods; code that
+        # assigns attributes directly should set DIRTY_ALL.
+        self.dirty: int = DIRTY_ALL
+
+    def snapshot(self, out=None, offset: int = 0):
+        """
+        Pack the full game state, including the RNG, into SNAPSHOT_SIZE bytes.
+
+        Returns bytes, or writes into a writable buffer `out` (e.g. a row of a
+        uint8 state bank) at `offset` and returns None. restore() brings a
+        game back to exactly this state, so the same actions replay the same
+        future. The encoding is portable but not versioned.
+        """
+        player, dealer = self.player, self.dealer
+        rng_state = self.rng.bit_generator.state
+        pcg = rng_state["state"]
+        values = (
+            self.round,
+            self.sub_round,
+            0 if self.turn == Turn.PLAYER else 1,
+            self.saw_active,
+            player.hp,
+            player.handcuff_strength,
+            player.known_next,
+            player.num_items,
+            player.item_counts.tobytes(),
+            dealer.hp,
+            dealer.handcuff_strength,
+            dealer.known_next,
+            dealer.num_items,
+            dealer.item_counts.tobytes(),
+            self.bullet_bits,
+            self.bullet_cursor,
+            self.lives_left,
+            self.blanks_left,
+            pcg["state"] & _U64,
+            pcg["state"] >> 64,
+            pcg["inc"] & _U64,
+            pcg["inc"] >> 64,
+            rng_state["has_uint32"],
+            rng_state["uinteger"],
+        )
+        if out is None:
+            return _SNAPSHOT.pack(*values)
+        _SNAPSHOT.pack_into(out, offset, *values)
+
+    def restore(self, snapshot, offset: int = 0) -> None:
+        """Return to a state captured by snapshot() (from bytes or a buffer)."""
+        (
+            self.round,
+            self.sub_round,
+            turn,
+            saw_active,
+            p_hp,
+            p_cuffs,
+            p_known,
+            p_num,
+            p_items,
+            d_hp,
+            d_cuffs,
+            d_known,
+            d_num,
+            d_items,
+            self.bullet_bits,
+            self.bullet_cursor,
+            self.lives_left,
+            self.blanks_left,
+            state_lo,
+            state_hi,
+            inc_lo,
+            inc_hi,
+            has_uint32,
+            uinteger,
+        ) = _SNAPSHOT.unpack_from(snapshot, offset)
+
+        self.turn = Turn.PLAYER if turn == 0 else Turn.DEALER
+        self.saw_active = bool(saw_active)
+        for side, hp, cuffs, known, num, items in (
+            (self.player, p_hp, p_cuffs, p_known, p_num, p_items),
+            (self.dealer, d_hp, d_cuffs, d_known, d_num, d_items),
+        ):
+            side.hp = hp
+            side.handcuff_strength = cuffs
+            side.known_next = bool(known)
+            side.num_items = num
+            side.item_counts[:] = np.frombuffer(items, dtype=np.int8)
+
+        self.rng.bit_generator.state = {
+            "bit_generator": "PCG64",
+            "state": {"state": state_hi << 64 | state_lo, "inc": inc_hi << 64 | inc_lo},
+            "has_uint32": has_uint32,
+            "uinteger": uinteger,
+        }
+        self.dirty = DIRTY_ALL
+
+    def consume_dirty(self) -> int:
+        """Return and clear the dirty flags accumulated since the last call."""
+        dirty = self.dirty
+        self.dirty = 0
+        return dirty
+
+    def load_magazine(self, num_lives: int = 1, num_blanks: int = 1) -> None:
         seq = [0] * num_blanks + [1] * num_lives
-        return self.rng.permutation(seq).tolist()
+        bits = 0
+        for i, bullet in enumerate(self.rng.permutation(seq)):
+            if bullet:
+                bits |= 1 << i
+        self.bullet_bits = bits
+        self.bullet_cursor = 0
+        self.lives_left = num_lives
+        self.blanks_left = num_blanks
+
+    @property
+    def bullets_left(self) -> int:
+        return self.lives_left + self.blanks_left
+
+    @property
+    def bullet_sequence(self) -> list[int]:
+        """Remaining shells in firing order (1 = live, 0 = blank)."""
+        return [
+            (self.bullet_bits >> i) & 1
+            for i in range(self.bullet_cursor, self.bullet_cursor + self.bullets_left)
+        ]
+
+    def next_bullet(self) -> int:
+        return (self.bullet_bits >> self.bullet_cursor) & 1
+
+    def pop_bullet(self) -> int:
+        bullet = (self.bullet_bits >> self.bullet_cursor) & 1
+        self.bullet_cursor += 1
+        if bullet:
+            self.lives_left -= 1
+        else:
+            self.blanks_left -= 1
+        return bullet
 
     def clear_items(self) -> None:
-        self.player.items = []
-        self.dealer.items = []
+        self.player.clear_items()
+        self.dealer.clear_items()
 
     def give_items(self, num: int) -> None:
         self.player.get_items(num)
@@ -56,14 +253,14 @@ class BuckshotRouletteGame:
 
     def process_shooting_self(self, target: Player):
         damage = 2 if self.saw_active else 1
-        bullet = self.bullet_sequence.pop(0)
+        bullet = self.pop_bullet()
         if bullet:
             target.hp = max(target.hp - damage, 0)
             self.switch_turns()
 
     def process_shooting_target(self, target: Player):
         damage = 2 if self.saw_active else 1
-        bullet = self.bullet_sequence.pop(0)
+        bullet = self.pop_bullet()
         if bullet:
             target.hp = max(target.hp - damage, 0)
         self.switch_turns()
@@ -94,14 +291,13 @@ class BuckshotRouletteGame:
 
     def start_new_subround(self):
         self.sub_round += 1
+        self.dirty = DIRTY_ALL
         sub_config = self._generate_combo()
 
         self.unhandcuff_both()
         self.give_items(sub_config.num_items)
         self.turn = self.rng.choice([Turn.PLAYER, Turn.DEALER])  # type: ignore
-        self.bullet_sequence = self.generate_bullet_sequence(
-            sub_config.lives, sub_config.blanks
-        )
+        self.load_magazine(sub_config.lives, sub_config.blanks)
         self.clear_known_bullets()
 
     def _get_opponent(self, player: Player) -> Player:
@@ -138,6 +334,7 @@ class BuckshotRouletteGame:
     def start_new_round(self):
         self.round += 1
         self.sub_round = 0
+        self.dirty = DIRTY_ALL
         self.clear_items()
 
         self.round_config = self._generate_combo()
@@ -146,11 +343,12 @@ class BuckshotRouletteGame:
         self.start_new_subround()
 
     def prepare_for_next_turn(self):
-        if len(self.bullet_sequence) == 0:
+        if self.lives_left + self.blanks_left == 0:
             self.start_new_subround()
 
     def process_action_result(self, action: GameAction):
         initiator, target = self.get_current_actor()
+        self.dirty |= _ACTION_DIRTY[action]
 
         match action:
             case GameAction.SHOOT_TARGET:
@@ -163,21 +361,21 @@ class BuckshotRouletteGame:
                 initiator.known_next = False
             case GameAction.USE_GLASS:
                 initiator.known_next = True
-                initiator.items.remove(Item.GLASS)
+                initiator.use_item(GLASS)
             case GameAction.USE_CIGARETTES:
                 if initiator.hp < self.max_hp:
                     initiator.hp += 1
-                initiator.items.remove(Item.CIGARETTES)
+                initiator.use_item(CIGARETTES)
             case GameAction.USE_HANDCUFFS:
                 target.handcuff_strength = 2
-                initiator.items.remove(Item.HANDCUFFS)
+                initiator.use_item(HANDCUFFS)
             case GameAction.USE_SAW:
                 self.saw_active = True
-                initiator.items.remove(Item.SAW)
+                initiator.use_item(SAW)
             case GameAction.USE_BEER:
-                self.bullet_sequence.pop(0)
+                self.pop_bullet()
                 self.clear_known_bullets()
-                initiator.items.remove(Item.BEER)
+                initiator.use_item(BEER)
 
         self.prepare_for_next_turn()
 
@@ -189,28 +387,19 @@ class BuckshotRouletteGame:
         return initiator, target
 
     def get_valid_actions_mask(self) -> np.ndarray:
-        mask = np.zeros(len(GAME_ACTIONS), dtype=np.int8)
+        mask = np.empty(len(GAME_ACTIONS), dtype=np.int8)
         actor, target = self.get_current_actor()
-        items = actor.items
 
         # Shoot self and Shoot Target are always valid.
-        mask[ACTION_MAP_INV[GameAction.SHOOT_SELF]] = 1
-        mask[ACTION_MAP_INV[GameAction.SHOOT_TARGET]] = 1
-
-        if Item.BEER in items:
-            mask[ACTION_MAP_INV[GameAction.USE_BEER]] = 1
-
-        if Item.CIGARETTES in items:
-            mask[ACTION_MAP_INV[GameAction.USE_CIGARETTES]] = 1
-
-        if Item.GLASS in items:
-            mask[ACTION_MAP_INV[GameAction.USE_GLASS]] = 1
+        mask[:ITEM_ACTION_OFFSET] = 1
+        # Item actions are valid when the item is held (same order as ITEMS).
+        np.greater(actor.item_counts, 0, out=mask[ITEM_ACTION_OFFSET:])
 
-        if Item.HANDCUFFS in items and target.handcuff_strength == 0:
-            mask[ACTION_MAP_INV[GameAction.USE_HANDCUFFS]] = 1
+        if target.handcuff_strength != 0:
+            mask[_USE_HANDCUFFS_IDX] = 0
 
-        if Item.SAW in items and not self.saw_active:
-            mask[ACTION_MAP_INV[GameAction.USE_SAW]] = 1
+        if self.saw_active:
+            mask[_USE_SAW_IDX] = 0
 
         return mask
 
@@ -219,18 +408,18 @@ class BuckshotRouletteGame:
             case GameAction.SHOOT_SELF | GameAction.SHOOT_TARGET:
                 return True
             case GameAction.USE_BEER:
-                return Item.BEER in player.items
+                return player.has_item(BEER)
             case GameAction.USE_CIGARETTES:
-                return Item.CIGARETTES in player.items
+                return player.has_item(CIGARETTES)
             case GameAction.USE_GLASS:
-                return Item.GLASS in player.items
+                return player.has_item(GLASS)
             case GameAction.USE_HANDCUFFS:
                 return (
-                    Item.HANDCUFFS in player.items
+                    player.has_item(HANDCUFFS)
                     and self._get_opponent(player).handcuff_strength == 0
                 )
             case GameAction.USE_SAW:
-                return Item.SAW in player.items and not self.saw_active
+                return player.has_item(SAW) and not self.saw_active
             case _:
                 return False
 
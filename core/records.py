@@ -0,0 +1,309 @@
+import argparse
+import os
+import struct
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from core.game import BuckshotRouletteGame
+from core.constants import Turn, ACTION_MAP, ITEMS
+
+# Winner codes
+PLAYER_WON = 0
+DEALER_WON = 1
+DRAW = 2
+UNFINISHED = -1
+
+# One row per action, holding the state the actor saw *before* acting.
+STEP_DTYPE = np.dtype(
+    [
+        ("actor", "u1"),  # 0 = PLAYER, 1 = DEALER
+        ("action", "u1"),  # ACTION_MAP index
+        ("hp", "u1", (2,)),  # [player, dealer]
+        ("items", "u1", (2, len(ITEMS))),  # [player, dealer] counts in ITEMS order
+        ("handcuffs", "u1", (2,)),
+        ("lives", "u1"),
+        ("blanks", "u1"),
+        ("next_live", "u1"),  # the shell that will be fired next (ground truth)
+        ("saw", "u1"),
+    ]
+)
+
+# One row per episode; its steps are steps[first_step : first_step + n_steps].
+EPISODE_DTYPE = np.dtype(
+    [
+        ("seed", "<i8"),
+        ("first_step", "<u8"),
+        ("n_steps", "<u4"),
+        ("agent_is_player", "?"),
+        ("agent_went_first", "?"),
+        ("winner", "i1"),
+        ("final_hp", "u1", (2,)),
+    ]
+)
+
+# STEP_DTYPE packed field by field (item counts as raw bytes)
+_STEP_STRUCT = struct.Struct(f"<4B{len(ITEMS)}s{len(ITEMS)}s6B")
+assert _STEP_STRUCT.size == STEP_DTYPE.itemsize
+
+STEPS_SUFFIX = ".steps.bin"
+EPISODES_SUFFIX = ".episodes.bin"
+
+
+class GameRecorder:
+    """
+    Appends episodes to one shard: `<prefix>.episodes.bin` and `<prefix>.steps.bin`.
+
+    Both files are raw arrays of EPISODE_DTYPE / STEP_DTYPE rows, so a shard
+    can be memory-mapped without parsing. Rows are collected in preallocated
+    buffers and written out in blocks; call flush() (or close()) to make
+    them visible to readers. One recorder per process: shards are never
+    shared between writers.
+    """
+
+    def __init__(self, prefix, buffer_size: int = 4096):
+        self.prefix = Path(prefix)
+        self.prefix.parent.mkdir(parents=True, exist_ok=True)
+        self._steps_file = open(f"{self.prefix}{STEPS_SUFFIX}", "ab")
+        self._episodes_file = open(f"{self.prefix}{EPISODES_SUFFIX}", "ab")
+
+        # Global step index continues after whatever the shard already holds
+        self._steps_written = self._steps_file.tell() // STEP_DTYPE.itemsize
+        # Steps are packed straight into bytes: much cheaper than filling
+        # structured-array fields one by one on every action.
+        self._steps = bytearray(buffer_size * STEP_DTYPE.itemsize)
+        self._steps_capacity = buffer_size
+        self._episodes = np.zeros(max(1, buffer_size // 16), dtype=EPISODE_DTYPE)
+        self._n_steps = 0
+        self._n_episodes = 0
+        self._episode = None  # row being filled, or None between episodes
+
+    def begin_episode(self, seed: int, agent_is_player: bool, agent_went_first: bool):
+        if self._episode is not None:
+            self._end(None, UNFINISHED)
+        if self._n_episodes == len(self._episodes):
+            self._flush_episodes()
+        episode = self._episodes[self._n_episodes]
+        episode["seed"] = seed
+        episode["first_step"] = self._steps_written + self._n_steps
+        episode["agent_is_player"] = agent_is_player
+        episode["agent_went_first"] = agent_went_first
+        self._episode = episode
+        self._episode_steps = 0
+
+    def record_step(self, game: BuckshotRouletteGame, action_idx: int):
+        if self._episode is None:
+            return
+        if self._n_steps == self._steps_capacity:
+            self._flush_steps()
+        player, dealer = game.player, game.dealer
+        _STEP_STRUCT.pack_into(
+            self._steps,
+            self._n_steps * _STEP_STRUCT.size,
+            0 if game.turn == Turn.PLAYER else 1,
+            action_idx,
+            player.hp,
+            dealer.hp,
+            player.item_counts.tobytes(),
+            dealer.item_counts.tobytes(),
+            player.handcuff_strength,
+            dealer.handcuff_strength,
+            game.lives_left,
+            game.blanks_left,
+            game.next_bullet(),
+            game.saw_active,
+        )
+        self._n_steps += 1
+        self._episode_steps += 1
+
+    def end_episode(self, game: BuckshotRouletteGame, finished: bool = True):
+        if self._episode is None:
+            return
+        winner = UNFINISHED
+        if finished:
+            player_dead, dealer_dead = game.player.hp <= 0, game.dealer.hp <= 0
+            if player_dead and dealer_dead:
+                winner = DRAW
+            elif dealer_dead:
+                winner = PLAYER_WON
+            elif player_dead:
+                winner = DEALER_WON
+        self._end(game, winner)
+
+    def _end(self, game: Optional[BuckshotRouletteGame], winner: int):
+        episode = self._episode
+        episode["n_steps"] = self._episode_steps
+        episode["winner"] = winner
+        if game is not None:
+            episode["final_hp"] = (max(game.player.hp, 0), max(game.dealer.hp, 0))
+        self._n_episodes += 1
+        self._episode = None
+
+    def _flush_steps(self):
+        self._steps_file.write(memoryview(self._steps)[: self._n_steps * _STEP_STRUCT.size])
+        self._steps_written += self._n_steps
+        self._n_steps = 0
+
+    def _flush_episodes(self):
+        # Steps first, so an episode row never points past the steps on disk
+        self._flush_steps()
+        self._episodes_file.write(self._episodes[: self._n_episodes].tobytes())
+        self._n_episodes = 0
+
+    def flush(self):
+        """Write out everything recorded so far (an episode in progress keeps its row)."""
+        open_row = self._episode.copy() if self._episode is not None else None
+        self._flush_episodes()
+        if open_row is not None:
+            self._episodes[0] = open_row
+            self._episode = self._episodes[0]
+        self._steps_file.flush()
+        self._episodes_file.flush()
+
+    def close(self):
+        if self._episode is not None:
+            self._end(None, UNFINISHED)
+        self._flush_episodes()
+        self._steps_file.close()
+        self._episodes_file.close()
+
+
+def shard_prefix(directory, name: Optional[str] = None) -> Path:
+    """Shard path prefix in `directory`, unique per process by default."""
+    return Path(directory) / (name or f"shard_{os.getpid()}")
+
+
+def _memmap(path: str, dtype: np.dtype) -> np.ndarray:
+    size = os.path.getsize(path) // dtype.itemsize  # ignores a torn trailing row
+    if size == 0:
+        return np.zeros(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r", shape=(size,))
+
+
+class GameRecords:
+    """
+    Read-only view of every shard in a record directory.
+
+    `shards` holds the memory-mapped (episodes, steps) of each shard.
+    `episodes` concatenates the episode tables with `first_step` rebased
+    onto `steps`, the concatenation of all step tables.
+    """
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.shards: List[Tuple[np.ndarray, np.ndarray]] = []
+        for path in sorted(self.directory.glob(f"*{EPISODES_SUFFIX}")):
+            prefix = str(path)[: -len(EPISODES_SUFFIX)]
+            episodes = _memmap(str(path), EPISODE_DTYPE)
+            steps = _memmap(prefix + STEPS_SUFFIX, STEP_DTYPE)
+            self.shards.append((episodes, steps))
+
+        episode_tables, offset = [], 0
+        for episodes, steps in self.shards:
+            table = np.array(episodes)
+            table["first_step"] += offset
+            episode_tables.append(table)
+            offset += len(steps)
+        self.episodes = (
+            np.concatenate(episode_tables) if episode_tables else np.zeros(0, EPISODE_DTYPE)
+        )
+        self._steps = None
+
+    @property
+    def steps(self) -> np.ndarray:
+        if self._steps is None:
+            if len(self.shards) == 1:
+                self._steps = self.shards[0][1]
+            else:
+                self._steps = np.concatenate([s for _, s in self.shards] or [np.zeros(0, STEP_DTYPE)])
+        return self._steps
+
+    def __len__(self) -> int:
+        return len(self.episodes)
+
+    def episode_steps(self, index: int) -> np.ndarray:
+        episode = self.episodes[index]
+        start = int(episode["first_step"])
+        return self.steps[start : start + int(episode["n_steps"])]
+
+    def agent_won(self) -> np.ndarray:
+        """Per-episode bool: the agent (evaluated model) won."""
+        e = self.episodes
+        return np.where(e["agent_is_player"], e["winner"] == PLAYER_WON, e["winner"] == DEALER_WON)
+
+    def replay(self, index: int) -> Iterator[Tuple[BuckshotRouletteGame, np.void]]:
+        """Re-simulate an episode; see replay()."""
+        return replay(int(self.episodes[index]["seed"]), self.episode_steps(index))
+
+
+def _state_matches(game: BuckshotRouletteGame, step: np.void) -> bool:
+    player, dealer = game.player, game.dealer
+    return (
+        (0 if game.turn == Turn.PLAYER else 1) == step["actor"]
+        and (player.hp, dealer.hp) == tuple(step["hp"])
+        and np.array_equal(player.item_counts, step["items"][0])
+        and np.array_equal(dealer.item_counts, step["items"][1])
+        and (player.handcuff_strength, dealer.handcuff_strength) == tuple(step["handcuffs"])
+        and (game.lives_left, game.blanks_left) == (step["lives"], step["blanks"])
+        and game.next_bullet() == step["next_live"]
+        and game.saw_active == bool(step["saw"])
+    )
+
+
+def replay(seed: int, steps: np.ndarray) -> Iterator[Tuple[BuckshotRouletteGame, np.void]]:
+    """
+    Deterministically re-simulate a recorded episode.
+
+    Rebuilds the game from its seed the way BuckshotRouletteEnv.reset does,
+    then yields (game, step) before applying each recorded action. Raises
+    RuntimeError if the simulated state diverges from the recording.
+    """
+    game = BuckshotRouletteGame(rng_seed=seed)
+    game.start_new_round()
+    if len(steps):
+        game.turn = Turn.PLAYER if steps[0]["actor"] == 0 else Turn.DEALER
+
+    for i, step in enumerate(steps):
+        if not _state_matches(game, step):
+            raise RuntimeError(f"Replay of seed {seed} diverged at step {i}")
+        yield game, step
+        game.step(ACTION_MAP[int(step["action"])])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize or replay recorded arena games.")
+    parser.add_argument("directory", help="Record directory (one or more shards)")
+    parser.add_argument("--replay", type=int, help="Episode index to re-simulate step by step")
+    args = parser.parse_args()
+
+    records = GameRecords(args.directory)
+    episodes = records.episodes
+    print(f"{len(episodes)} episodes, {len(records.steps)} steps in {len(records.shards)} shards")
+    if len(episodes) == 0:
+        return
+
+    winners = episodes["winner"]
+    print(
+        f"  agent win rate {records.agent_won().mean():.2%}  "
+        f"player/dealer/draw/unfinished: {(winners == PLAYER_WON).sum()}/"
+        f"{(winners == DEALER_WON).sum()}/{(winners == DRAW).sum()}/{(winners == UNFINISHED).sum()}"
+    )
+    print(f"  mean length {episodes['n_steps'].mean():.2f} actions")
+    counts = np.bincount(records.steps["action"], minlength=len(ACTION_MAP))
+    for idx, n in enumerate(counts):
+        print(f"  {ACTION_MAP[idx].value:<16} {n / counts.sum():.2%}")
+
+    if args.replay is not None:
+        episode = episodes[args.replay]
+        print(f"\nReplaying episode {args.replay} (seed {episode['seed']})")
+        for game, step in records.replay(args.replay):
+            print(
+                f"  {game.turn.name:<6} hp {game.player.hp}/{game.dealer.hp} "
+                f"shells {game.lives_left}L/{game.blanks_left}B -> {ACTION_MAP[int(step['action'])].value}"
+            )
+        print(f"  final hp {tuple(episode['final_hp'])}, winner code {episode['winner']}")
+
+
+if __name__ == "__main__":
+    main()
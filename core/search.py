@@ -0,0 +1,293 @@
+import argparse
+import time
+from typing import Optional, Tuple
+
+import numpy as np
+
+from core.batched import (
+    BatchedBuckshotGame,
+    PLAYER,
+    DEALER,
+    SHOOT_SELF,
+    SHOOT_TARGET,
+    USE_GLASS,
+    USE_CIGARETTES,
+    USE_SAW,
+    NUM_ACTIONS,
+    GLASS,
+)
+from core.tablebase import state_from_obs, KNOWN_LIVE, KNOWN_BLANK, UNKNOWN
+
+ROLLOUT_POLICIES = ("random", "heuristic")
+
+
+class SearchPolicy:
+    """
+    Determinized Monte Carlo search: `policy(obs, action_mask) -> int`.
+
+    The hidden shell order is sampled (consistent with the visible live and
+    blank counts and any known next shell), every legal action is tried in
+    each sample and the game is played out to the end on a
+    BatchedBuckshotGame. The action with the highest win rate for the side
+    to move is chosen.
+
+    Rollouts run in batches of `batch_size` per action until `n_rollouts`
+    per action are done. With a `time_budget`, batches start at
+    `min_batch_size` and double while the previous batch suggests the next
+    one still fits in the remaining time. Rollouts still running at the
+    deadline stop there and are scored by their HP share, so the budget
+    bounds the search time (up to one batch step). Observations carry no
+    subround number, so future deals assume `phase` (1: past the first
+    subround), as in TablebasePolicy.
+
+    Args:
+        n_rollouts: Rollouts per legal action and move.
+        time_budget: Optional per-move time limit in seconds.
+        batch_size: Rollouts per action simulated together.
+        min_batch_size: First batch size under a time budget.
+        rollout_policy: "heuristic" (shell-odds play with exploration) or "random".
+        epsilon: Probability of a random valid move in heuristic rollouts.
+        phase: 0 if the game is in its first subround, 1 otherwise.
+        tail_fraction: Stop stepping once at most this fraction of a batch is
+            still running; those rollouts are scored by their HP share. The
+            longest games otherwise dominate the cost of a batch.
+        max_rollout_steps: Hard cap on rollout length (also scored by HP share).
+        seed: Seed of the search RNG.
+    """
+
+    def __init__(
+        self,
+        n_rollouts: int = 256,
+        time_budget: Optional[float] = None,
+        batch_size: int = 256,
+        min_batch_size: int = 64,
+        rollout_policy: str = "heuristic",
+        epsilon: float = 0.2,
+        phase: int = 1,
+        tail_fraction: float = 0.03,
+        max_rollout_steps: int = 200,
+        seed: Optional[int] = None,
+    ):
+        if rollout_policy not in ROLLOUT_POLICIES:
+            raise ValueError(f"Unknown rollout policy: {rollout_policy}")
+        self.n_rollouts = n_rollouts
+        self.time_budget = time_budget
+        self.batch_size = min(batch_size, n_rollouts)
+        self.min_batch_size = min(min_batch_size, self.batch_size)
+        self.rollout_policy = rollout_policy
+        self.epsilon = epsilon
+        self.phase = phase
+        self.tail_fraction = tail_fraction
+        self.max_rollout_steps = max_rollout_steps
+        self.rng = np.random.default_rng(seed)
+        self._games = {}  # batch size -> BatchedBuckshotGame, reused across moves
+
+        # Search statistics (cumulative)
+        self.moves = 0
+        self.rollouts = 0
+        self.search_time = 0.0
+
+    @property
+    def rollouts_per_second(self) -> float:
+        return self.rollouts / self.search_time if self.search_time > 0 else 0.0
+
+    def __call__(self, obs: np.ndarray, action_mask: np.ndarray) -> int:
+        values, _ = self.action_values(obs, action_mask)
+        return int(np.nanargmax(values))
+
+    def action_values(self, obs: np.ndarray, action_mask: np.ndarray) -> Tuple[np.ndarray, int]:
+        """Estimated win probability of each action (NaN if illegal) and rollouts per action."""
+        t0 = time.perf_counter()
+        legal = np.flatnonzero(action_mask)
+        values = np.full(NUM_ACTIONS, np.nan)
+        if len(legal) == 1:
+            values[legal[0]] = 1.0
+            return values, 0
+
+        state = state_from_obs(obs, self.phase)
+        wins = np.zeros(len(legal))
+        done = 0
+        if self.time_budget is None:
+            while done < self.n_rollouts:
+                b = min(self.batch_size, self.n_rollouts - done)
+                wins += self._rollout_batch(state, legal, b)
+                done += b
+        else:
+            deadline = t0 + self.time_budget
+            b = self.min_batch_size
+            while done < self.n_rollouts:
+                start = time.perf_counter()
+                wins += self._rollout_batch(state, legal, b, deadline)
+                done += b
+                now = time.perf_counter()
+                elapsed, remaining = now - start, deadline - now
+                # Batch cost grows slowly with size: double while it should fit
+                if elapsed * 1.5 < remaining:
+                    b = min(2 * b, self.batch_size, self.n_rollouts - done)
+                elif elapsed >= remaining:
+                    break
+
+        values[legal] = wins / done
+        self.moves += 1
+        self.rollouts += done * len(legal)
+        self.search_time += time.perf_counter() - t0
+        return values, done
+
+    def _batch_game(self, n: int) -> BatchedBuckshotGame:
+        game = self._games.get(n)
+        if game is None:
+            game = BatchedBuckshotGame(n, rng_seed=int(self.rng.integers(2**63)))
+            self._games[n] = game
+        return game
+
+    def _rollout_batch(
+        self, state: tuple, legal: np.ndarray, b: int, deadline: Optional[float] = None
+    ) -> np.ndarray:
+        """Play `b` determinizations per legal action; mover wins per action."""
+        hp, opp_hp, items, opp_items, opp_cuffs, saw, lives, blanks, known, phase = state
+        n = b * len(legal)
+        game = self._batch_game(n)
+
+        # The mover is PLAYER in the simulation
+        game.round[:] = 1
+        game.sub_round[:] = 1 if phase == 0 else 3
+        game.turn[:] = PLAYER
+        game.hp[:, PLAYER] = hp
+        game.hp[:, DEALER] = opp_hp
+        game.items[:, PLAYER] = items
+        game.items[:, DEALER] = opp_items
+        game.handcuff_strength[:, PLAYER] = 0
+        game.handcuff_strength[:, DEALER] = opp_cuffs
+        game.known_next[:, PLAYER] = known != UNKNOWN
+        game.known_next[:, DEALER] = False
+        game.saw_active[:] = bool(saw)
+
+        # Determinize: same sampled magazine for every action (common random numbers)
+        game._load_magazine(np.arange(b), np.full(b, lives), np.full(b, blanks))
+        if known != UNKNOWN:
+            # Swap a shell of the known kind into first position
+            want = 1 if known == KNOWN_LIVE else 0
+            first = np.argmax(game.bullets[:b] == want, axis=1)
+            rows = np.arange(b)
+            game.bullets[rows, first] = game.bullets[rows, 0]
+            game.bullets[rows, 0] = want
+        for k in range(1, len(legal)):
+            game.bullets[k * b : (k + 1) * b] = game.bullets[:b]
+            game.n_bullets[k * b : (k + 1) * b] = game.n_bullets[:b]
+            game.cursor[k * b : (k + 1) * b] = 0
+            game.lives_left[k * b : (k + 1) * b] = lives
+            game.blanks_left[k * b : (k + 1) * b] = blanks
+
+        game.step(np.repeat(legal, b))
+        alive = np.flatnonzero(~game.is_terminal())
+        tail = int(self.tail_fraction * n)
+        for _ in range(self.max_rollout_steps):
+            if len(alive) <= tail:
+                break
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+            game.step(self._rollout_actions(game, alive), alive)
+            alive = alive[~game.is_terminal(alive)]
+
+        won = (game.hp[:, DEALER] <= 0).astype(np.float64)
+        # Unfinished rollouts: the mover's share of the remaining HP
+        hp = game.hp[alive].astype(np.float64)
+        won[alive] = hp[:, PLAYER] / np.maximum(hp.sum(axis=1), 1)
+        return won.reshape(len(legal), b).sum(axis=1)
+
+    def _rollout_actions(self, game: BatchedBuckshotGame, g: np.ndarray) -> np.ndarray:
+        mask = game.get_valid_actions_mask(g)
+        random_actions = (self.rng.random(mask.shape) * mask).argmax(axis=1)
+        if self.rollout_policy == "random":
+            return random_actions
+
+        actor = game.turn[g].astype(np.int64)
+        cursor = np.minimum(game.cursor[g], game.bullets.shape[1] - 1)
+        next_live = game.bullets[g, cursor] == 1
+        known = game.known_next[g, actor]
+        p_live = game.lives_left[g] / np.maximum(game.lives_left[g] + game.blanks_left[g], 1)
+
+        # Shoot by the odds; look first when a glass is at hand; heal when hurt
+        actions = np.where(p_live >= 0.5, SHOOT_TARGET, SHOOT_SELF)
+        actions = np.where(
+            (game.items[g, actor, GLASS] > 0) & (p_live > 0) & (p_live < 1), USE_GLASS, actions
+        )
+        actions = np.where(
+            (mask[:, USE_CIGARETTES] == 1) & (game.hp[g, actor] < game.max_hp - 1),
+            USE_CIGARETTES,
+            actions,
+        )
+        known_live_action = np.where(mask[:, USE_SAW] == 1, USE_SAW, SHOOT_TARGET)
+        actions = np.where(known, np.where(next_live, known_live_action, SHOOT_SELF), actions)
+
+        explore = self.rng.random(len(g)) < self.epsilon
+        return np.where(explore, random_actions, actions)
+
+
+def parse_search_spec(spec: str) -> dict:
+    """
+    Keyword arguments for SearchPolicy from an opponent spec string.
+
+    "search" uses the defaults; options follow a colon, e.g.
+    "search:rollouts=512,time=0.005,policy=random".
+    """
+    name, _, options = spec.partition(":")
+    if name != "search":
+        raise ValueError(f"Not a search opponent spec: {spec}")
+    keys = {
+        "rollouts": ("n_rollouts", int),
+        "time": ("time_budget", float),
+        "batch": ("batch_size", int),
+        "min_batch": ("min_batch_size", int),
+        "policy": ("rollout_policy", str),
+        "epsilon": ("epsilon", float),
+        "phase": ("phase", int),
+        "tail": ("tail_fraction", float),
+    }
+    kwargs = {}
+    for option in filter(None, options.split(",")):
+        key, _, value = option.partition("=")
+        if key not in keys:
+            raise ValueError(f"Unknown search option '{key}' in {spec}")
+        name, cast = keys[key]
+        kwargs[name] = cast(value)
+    return kwargs
+
+
+def is_search_spec(spec: Optional[str]) -> bool:
+    return spec is not None and str(spec).split(":", 1)[0] == "search"
+
+
+def main():
+    from core.env import BuckshotRouletteEnv
+
+    parser = argparse.ArgumentParser(description="Play the search opponent against a random agent.")
+    parser.add_argument("--spec", default="search", help='e.g. "search:rollouts=512,time=0.005"')
+    parser.add_argument("--episodes", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    search = SearchPolicy(seed=args.seed, **parse_search_spec(args.spec))
+    env = BuckshotRouletteEnv(opponent_policy=search)
+    rng = np.random.default_rng(args.seed)
+    search_wins = 0
+    for i in range(args.episodes):
+        env.reset(seed=args.seed + i)
+        done = False
+        while not done:
+            mask = env.action_masks()
+            _, _, terminated, truncated, _ = env.step(int(rng.choice(np.flatnonzero(mask))))
+            done = terminated or truncated
+        agent_hp = env.game.player.hp if env._agent_is_player else env.game.dealer.hp
+        search_wins += agent_hp <= 0
+
+    print(f"Search won {search_wins}/{args.episodes} ({search_wins / args.episodes:.2%}) vs random")
+    print(
+        f"{search.moves} moves, {search.rollouts} rollouts, "
+        f"{search.rollouts_per_second:,.0f} rollouts/s, "
+        f"{search.search_time / max(search.moves, 1) * 1e3:.2f} ms/move"
+    )
+
+
+if __name__ == "__main__":
+    main()
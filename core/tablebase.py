@@ -0,0 +1,506 @@
+import argparse
+import itertools
+import time
+from functools import lru_cache
+from math import factorial
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from core.constants import (
+    ITEMS,
+    GAME_ACTIONS,
+    MAX_HP as OBS_MAX_HP,
+    MAX_ITEM_COUNT,
+    MAX_CYLINDER,
+    HANDCUFF_MAX,
+)
+
+# Rule constants of BuckshotRouletteGame
+MAX_HP = 5
+MAX_BULLETS = 8
+MAX_INVENTORY = 8
+
+SHOOT_SELF, SHOOT_TARGET = 0, 1
+USE_GLASS, USE_CIGARETTES, USE_HANDCUFFS, USE_SAW, USE_BEER = 2, 3, 4, 5, 6
+GLASS, CIGARETTES, HANDCUFFS, SAW, BEER = range(len(ITEMS))
+
+# Next-shell knowledge of the mover (only the mover can hold it: shooting clears it)
+UNKNOWN, KNOWN_LIVE, KNOWN_BLANK = 0, 1, 2
+
+# Phase: 0 while sub_round == 1, 1 afterwards (selects the next subround's combo rules)
+TABLE_DTYPE = np.dtype([("key", "<u8"), ("value", "<f4")])
+_EMPTY = np.uint64(0xFFFFFFFFFFFFFFFF)
+_HASH_MUL = 0x9E3779B97F4A7C15
+_MASK64 = (1 << 64) - 1
+
+NO_ITEMS = (0, 0, 0, 0, 0)
+
+
+def pack_state(
+    a_hp: int,
+    o_hp: int,
+    a_items: Tuple[int, ...],
+    o_items: Tuple[int, ...],
+    o_cuff: int,
+    saw: int,
+    lives: int,
+    blanks: int,
+    known: int,
+    phase: int,
+    horizon: int,
+) -> int:
+    """
+    Pack a mover-relative state into a 60-bit code.
+
+    Layout (low to high): mover hp (3), opponent hp (3), mover items (5 x 4),
+    opponent items (5 x 4), opponent handcuffs (2), saw (1), lives (3),
+    blanks (3), known (2), phase (1), horizon (2). lives == blanks == 0 marks a
+    subround boundary (before the next subround is dealt).
+    """
+    code = a_hp | (o_hp << 3)
+    shift = 6
+    for n in a_items:
+        code |= n << shift
+        shift += 4
+    for n in o_items:
+        code |= n << shift
+        shift += 4
+    return (
+        code
+        | (o_cuff << 46)
+        | (saw << 48)
+        | (lives << 49)
+        | (blanks << 52)
+        | (known << 55)
+        | (phase << 57)
+        | (horizon << 58)
+    )
+
+
+def _hash_slots(keys: np.ndarray, bits: int) -> np.ndarray:
+    with np.errstate(over="ignore"):
+        return (keys * np.uint64(_HASH_MUL)) >> np.uint64(64 - bits)
+
+
+@lru_cache(maxsize=None)
+def subround_distribution(sub_round: int):
+    """
+    Exact distribution of a dealt subround, mirroring BuckshotRouletteGame._generate_combo.
+
+    Returns ({num_items: p}, {(lives, blanks): p}) for the given (already
+    incremented) sub_round. Keep in sync with _generate_combo.
+    """
+    if sub_round == 1:
+        bullet_counts, lo, hi = range(2, 5), 0.25, 0.5
+        items = {0: 0.5, 1: 0.5}
+    elif sub_round == 2:
+        bullet_counts, lo, hi = range(2, 7), 0.3, 0.6
+        items = {1: 0.5, 2: 0.5}
+    else:
+        bullet_counts, lo, hi = range(3, MAX_BULLETS), 0.4, 0.8
+        items = {1: 0.5, 2: 0.35, 3: 0.15}
+
+    bullets: Dict[Tuple[int, int], float] = {}
+    p_count = 1.0 / len(bullet_counts)
+    for n in bullet_counts:
+        # floor(n * u) == m  <=>  u in [m / n, (m + 1) / n)
+        for m in range(n + 1):
+            width = min(hi, (m + 1) / n) - max(lo, m / n)
+            if width <= 0:
+                continue
+            lives = max(1, min(m, n - 1))
+            key = (lives, n - lives)
+            bullets[key] = bullets.get(key, 0.0) + p_count * width / (hi - lo)
+    return items, bullets
+
+
+@lru_cache(maxsize=None)
+def item_draws(n_draws: int):
+    """Multinomial outcomes of n uniform item draws: [(added counts, p)]."""
+    outcomes = []
+    for counts in itertools.product(range(n_draws + 1), repeat=len(ITEMS)):
+        if sum(counts) != n_draws:
+            continue
+        ways = factorial(n_draws)
+        for c in counts:
+            ways //= factorial(c)
+        outcomes.append((counts, ways / len(ITEMS) ** n_draws))
+    return outcomes
+
+
+def _bullet_outcomes(lives: int, blanks: int, known: int):
+    if known == KNOWN_LIVE:
+        return ((True, 1.0),)
+    if known == KNOWN_BLANK:
+        return ((False, 1.0),)
+    p_live = lives / (lives + blanks)
+    if blanks == 0:
+        return ((True, 1.0),)
+    if lives == 0:
+        return ((False, 1.0),)
+    return ((True, p_live), (False, 1.0 - p_live))
+
+
+def _take(items: Tuple[int, ...], slot: int) -> Tuple[int, ...]:
+    return items[:slot] + (items[slot] - 1,) + items[slot + 1 :]
+
+
+class Tablebase:
+    """
+    Exact game-theoretic win probabilities for Buckshot Roulette states.
+
+    Values are P(mover wins) under optimal play by both sides. Within a
+    subround the game is perfect-information up to the shell order (only the
+    mover can know the next shell), so shells, glass and beer are chance
+    nodes. Subround boundaries are chance nodes over the next deal (items,
+    shells, first mover) for `horizon` boundaries; beyond that the game
+    continues item-less (held items are dropped), which keeps the recursion
+    finite.
+
+    Solved values live in a transposition table keyed by pack_state(); save()
+    writes it as an open-addressing hash table that load() memory-maps for
+    O(1) lookups. Misses are solved on demand and kept in memory.
+    """
+
+    def __init__(self, horizon: int = 0):
+        self.horizon = horizon
+        self._memo: Dict[int, float] = {}
+        self._table: Optional[np.ndarray] = None
+        self._table_bits = 0
+
+    def __len__(self) -> int:
+        return len(self._memo) + (0 if self._table is None else self._table_size)
+
+    # --- Persistence ---
+
+    def save(self, path: str) -> None:
+        """Write all known values as a memory-mappable open-addressing table (.npy)."""
+        entries = dict(self._memo)
+        if self._table is not None:
+            used = self._table["key"] != _EMPTY
+            for key, value in zip(self._table["key"][used], self._table["value"][used]):
+                entries.setdefault(int(key), float(value))
+
+        keys = np.fromiter(entries.keys(), dtype=np.uint64, count=len(entries))
+        values = np.fromiter(entries.values(), dtype=np.float32, count=len(entries))
+        bits = max(4, int(np.ceil(np.log2(max(1, 2 * len(keys))))))
+        table = np.empty(1 << bits, dtype=TABLE_DTYPE)
+        table["key"] = _EMPTY
+        table["value"] = np.nan
+
+        # Vectorized linear probing: each round, the first claimant of a free slot wins.
+        slots = _hash_slots(keys, bits).astype(np.int64)
+        pending = np.arange(len(keys))
+        mask = (1 << bits) - 1
+        while len(pending):
+            s = slots[pending]
+            free = table["key"][s] == _EMPTY
+            _, first = np.unique(s, return_index=True)
+            winners = np.zeros(len(pending), dtype=bool)
+            winners[first] = True
+            winners &= free
+            table["key"][s[winners]] = keys[pending[winners]]
+            table["value"][s[winners]] = values[pending[winners]]
+            pending = pending[~winners]
+            slots[pending] = (slots[pending] + 1) & mask
+        np.save(path, table)
+
+    @classmethod
+    def load(cls, path: str, horizon: int = 0) -> "Tablebase":
+        tb = cls(horizon=horizon)
+        tb._table = np.load(path, mmap_mode="r")
+        tb._table_bits = int(np.log2(len(tb._table)))
+        tb._table_size = int((tb._table["key"] != _EMPTY).sum())
+        return tb
+
+    def _lookup(self, key: int) -> Optional[float]:
+        value = self._memo.get(key)
+        if value is not None or self._table is None:
+            return value
+        table = self._table
+        mask = (1 << self._table_bits) - 1
+        slot = ((key * _HASH_MUL) & _MASK64) >> (64 - self._table_bits)
+        while True:
+            stored = int(table[slot]["key"])
+            if stored == key:
+                return float(table[slot]["value"])
+            if stored == int(_EMPTY):
+                return None
+            slot = (slot + 1) & mask
+
+    # --- Solver ---
+
+    def value(
+        self, a_hp, o_hp, a_items, o_items, o_cuff, saw, lives, blanks, known, phase,
+        horizon=None,
+    ) -> float:
+        """P(mover wins) for an in-subround state (lives + blanks > 0)."""
+        if horizon is None:
+            horizon = self.horizon
+        a_items, o_items = tuple(a_items), tuple(o_items)
+        return self._node(
+            a_hp, o_hp, a_items, o_items, o_cuff, saw, lives, blanks, known, phase, horizon
+        )
+
+    def action_values(
+        self, a_hp, o_hp, a_items, o_items, o_cuff, saw, lives, blanks, known, phase,
+        horizon=None,
+    ) -> np.ndarray:
+        """Win probability of each action (NaN where illegal)."""
+        if horizon is None:
+            horizon = self.horizon
+        s = (a_hp, o_hp, tuple(a_items), tuple(o_items), o_cuff, saw, lives, blanks, known, phase, horizon)
+        q = np.full(len(GAME_ACTIONS), np.nan)
+        for action in self._legal(s):
+            q[action] = self._q(s, action)
+        return q
+
+    def _node(self, a_hp, o_hp, a_items, o_items, o_cuff, saw, lives, blanks, known, phase, horizon):
+        if lives + blanks == 0:
+            return self._boundary(a_hp, o_hp, a_items, o_items, saw, phase, horizon)
+        key = pack_state(a_hp, o_hp, a_items, o_items, o_cuff, saw, lives, blanks, known, phase, horizon)
+        value = self._lookup(key)
+        if value is None:
+            s = (a_hp, o_hp, a_items, o_items, o_cuff, saw, lives, blanks, known, phase, horizon)
+            value = max(self._q(s, action) for action in self._legal(s))
+            self._memo[key] = value
+        return value
+
+    def _boundary(self, a_hp, o_hp, a_items, o_items, saw, phase, horizon):
+        if horizon == 0:
+            # Item-less continuation
+            a_items = o_items = NO_ITEMS
+        key = pack_state(a_hp, o_hp, a_items, o_items, 0, saw, 0, 0, 0, phase, horizon)
+        value = self._lookup(key)
+        if value is not None:
+            return value
+
+        item_dist, bullet_dist = subround_distribution(2 if phase == 0 else 3)
+        if horizon == 0:
+            item_dist = {0: 1.0}
+        next_horizon = max(horizon - 1, 0)
+
+        value = 0.0
+        for n_items, p_items in item_dist.items():
+            a_draws = item_draws(min(n_items, MAX_INVENTORY - sum(a_items)))
+            o_draws = item_draws(min(n_items, MAX_INVENTORY - sum(o_items)))
+            for a_add, p_a in a_draws:
+                a_new = tuple(x + y for x, y in zip(a_items, a_add))
+                for o_add, p_o in o_draws:
+                    o_new = tuple(x + y for x, y in zip(o_items, o_add))
+                    p_deal = p_items * p_a * p_o
+                    for (lives, blanks), p_b in bullet_dist.items():
+                        # Handcuffs and knowledge reset; first mover is a coin flip
+                        mover_first = self._node(
+                            a_hp, o_hp, a_new, o_new, 0, saw, lives, blanks, UNKNOWN, 1, next_horizon
+                        )
+                        other_first = self._node(
+                            o_hp, a_hp, o_new, a_new, 0, saw, lives, blanks, UNKNOWN, 1, next_horizon
+                        )
+                        value += p_deal * p_b * 0.5 * (mover_first + 1.0 - other_first)
+
+        self._memo[key] = value
+        return value
+
+    @staticmethod
+    def _legal(s):
+        _, _, a_items, _, o_cuff, saw, _, _, _, _, _ = s
+        actions = [SHOOT_SELF, SHOOT_TARGET]
+        if a_items[GLASS]:
+            actions.append(USE_GLASS)
+        if a_items[CIGARETTES]:
+            actions.append(USE_CIGARETTES)
+        if a_items[HANDCUFFS] and o_cuff == 0:
+            actions.append(USE_HANDCUFFS)
+        if a_items[SAW] and not saw:
+            actions.append(USE_SAW)
+        if a_items[BEER]:
+            actions.append(USE_BEER)
+        return actions
+
+    def _after_switch(self, a_hp, o_hp, a_items, o_items, o_cuff, lives, blanks, phase, horizon):
+        """Value for the shooter after switch_turns (saw and knowledge already cleared)."""
+        if o_cuff >= HANDCUFF_MAX:
+            # Opponent skips this turn; handcuffs weaken to 1
+            return self._node(a_hp, o_hp, a_items, o_items, 1, 0, lives, blanks, UNKNOWN, phase, horizon)
+        if lives + blanks == 0:
+            return self._boundary(a_hp, o_hp, a_items, o_items, 0, phase, horizon)
+        # The shooter's own handcuff strength is always 0 on its turn
+        return 1.0 - self._node(
+            o_hp, a_hp, o_items, a_items, 0, 0, lives, blanks, UNKNOWN, phase, horizon
+        )
+
+    def _q(self, s, action) -> float:
+        a_hp, o_hp, a_items, o_items, o_cuff, saw, lives, blanks, known, phase, horizon = s
+
+        if action == SHOOT_SELF or action == SHOOT_TARGET:
+            damage = 2 if saw else 1
+            q = 0.0
+            for live, p in _bullet_outcomes(lives, blanks, known):
+                nl, nb = (lives - 1, blanks) if live else (lives, blanks - 1)
+                if action == SHOOT_SELF:
+                    if live:
+                        hp = a_hp - damage
+                        if hp > 0:
+                            q += p * self._after_switch(
+                                hp, o_hp, a_items, o_items, o_cuff, nl, nb, phase, horizon
+                            )
+                    else:
+                        # Blank on self: keep the turn
+                        q += p * self._node(
+                            a_hp, o_hp, a_items, o_items, o_cuff, 0, nl, nb, UNKNOWN, phase, horizon
+                        )
+                else:
+                    hp = o_hp - damage if live else o_hp
+                    if hp <= 0:
+                        q += p
+                    else:
+                        q += p * self._after_switch(
+                            a_hp, hp, a_items, o_items, o_cuff, nl, nb, phase, horizon
+                        )
+            return q
+
+        if action == USE_GLASS:
+            a_items = _take(a_items, GLASS)
+            if known != UNKNOWN:
+                return self._node(a_hp, o_hp, a_items, o_items, o_cuff, saw, lives, blanks, known, phase, horizon)
+            return sum(
+                p * self._node(
+                    a_hp, o_hp, a_items, o_items, o_cuff, saw, lives, blanks,
+                    KNOWN_LIVE if live else KNOWN_BLANK, phase, horizon,
+                )
+                for live, p in _bullet_outcomes(lives, blanks, UNKNOWN)
+            )
+
+        if action == USE_CIGARETTES:
+            hp = a_hp + 1 if a_hp < MAX_HP else a_hp
+            return self._node(
+                hp, o_hp, _take(a_items, CIGARETTES), o_items, o_cuff, saw, lives, blanks, known, phase, horizon
+            )
+
+        if action == USE_HANDCUFFS:
+            return self._node(
+                a_hp, o_hp, _take(a_items, HANDCUFFS), o_items, HANDCUFF_MAX, saw, lives, blanks, known, phase, horizon
+            )
+
+        if action == USE_SAW:
+            return self._node(
+                a_hp, o_hp, _take(a_items, SAW), o_items, o_cuff, 1, lives, blanks, known, phase, horizon
+            )
+
+        # USE_BEER: eject the next shell; everyone's knowledge is cleared
+        a_items = _take(a_items, BEER)
+        return sum(
+            p * self._node(
+                a_hp, o_hp, a_items, o_items, o_cuff, saw,
+                lives - 1 if live else lives, blanks if live else blanks - 1,
+                UNKNOWN, phase, horizon,
+            )
+            for live, p in _bullet_outcomes(lives, blanks, known)
+        )
+
+    # --- Generation ---
+
+    def solve_all(self, max_items: int = 1, verbose: bool = True) -> int:
+        """
+        Solve every subround-start state with up to `max_items` items per side.
+
+        Everything reachable from those roots within the subround is solved
+        on the way. Returns the number of table entries.
+        """
+        inventories = [
+            c for c in itertools.product(range(max_items + 1), repeat=len(ITEMS))
+            if sum(c) <= max_items
+        ]
+        t0 = time.time()
+        for phase in (0, 1):
+            for a_hp, o_hp in itertools.product(range(1, MAX_HP + 1), repeat=2):
+                for a_items, o_items in itertools.product(inventories, repeat=2):
+                    for lives in range(1, MAX_BULLETS):
+                        for blanks in range(1, MAX_BULLETS - lives):
+                            self._node(
+                                a_hp, o_hp, a_items, o_items, 0, 0, lives, blanks,
+                                UNKNOWN, phase, self.horizon,
+                            )
+            if verbose:
+                print(f"Phase {phase} solved: {len(self._memo)} states in {time.time() - t0:.1f}s")
+        return len(self._memo)
+
+
+def state_from_game(game, horizon: int = 0) -> tuple:
+    """Mover-relative state arguments for Tablebase.value / action_values."""
+    mover, opponent = game.get_current_actor()
+    known = UNKNOWN
+    if mover.known_next and game.bullets_left > 0:
+        known = KNOWN_LIVE if game.next_bullet() else KNOWN_BLANK
+    return (
+        mover.hp,
+        opponent.hp,
+        tuple(int(n) for n in mover.item_counts),
+        tuple(int(n) for n in opponent.item_counts),
+        opponent.handcuff_strength,
+        int(game.saw_active),
+        game.lives_left,
+        game.blanks_left,
+        known,
+        0 if game.sub_round <= 1 else 1,
+    )
+
+
+def state_from_obs(obs: np.ndarray, phase: int = 1) -> tuple:
+    """Decode a BuckshotRouletteEnv observation into mover-relative state arguments."""
+    counts = np.rint(obs[1:6] * MAX_ITEM_COUNT).astype(int)
+    target_counts = np.rint(obs[7:12] * MAX_ITEM_COUNT).astype(int)
+    known = UNKNOWN
+    if obs[15] > 0.5:
+        known = KNOWN_LIVE
+    elif obs[16] > 0.5:
+        known = KNOWN_BLANK
+    return (
+        int(round(obs[0] * OBS_MAX_HP)),
+        int(round(obs[6] * OBS_MAX_HP)),
+        tuple(int(n) for n in counts),
+        tuple(int(n) for n in target_counts),
+        int(round(obs[12] * HANDCUFF_MAX)),
+        int(obs[18] > 0.5),
+        int(round(obs[14] * MAX_CYLINDER)),
+        int(round(obs[13] * MAX_CYLINDER)),
+        known,
+        phase,
+    )
+
+
+class TablebasePolicy:
+    """
+    Opponent policy `policy(obs, action_mask) -> int` playing tablebase-optimal moves.
+
+    Observations carry no subround number, so `phase` is assumed (1: past
+    the first subround).
+    """
+
+    def __init__(self, tablebase: Tablebase, phase: int = 1):
+        self.tablebase = tablebase
+        self.phase = phase
+
+    def __call__(self, obs: np.ndarray, action_mask: np.ndarray) -> int:
+        q = self.tablebase.action_values(*state_from_obs(obs, self.phase))
+        q = np.where(np.asarray(action_mask, dtype=bool) & ~np.isnan(q), q, -1.0)
+        return int(np.argmax(q))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate the Buckshot Roulette tablebase.")
+    parser.add_argument("--out", default="agent/models/tablebase.npy")
+    parser.add_argument("--max-items", type=int, default=1, help="Items per side at subround start")
+    parser.add_argument("--horizon", type=int, default=0, help="Subround deals expanded exactly")
+    args = parser.parse_args()
+
+    tablebase = Tablebase(horizon=args.horizon)
+    n = tablebase.solve_all(max_items=args.max_items)
+    tablebase.save(args.out)
+    print(f"Saved {n} states to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
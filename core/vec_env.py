@@ -0,0 +1,282 @@
+import gymnasium as gym
+import numpy as np
+from typing import Optional, Callable, Sequence, List, Any
+from stable_baselines3.common.vec_env.base_vec_env import (
+    VecEnv,
+    VecEnvIndices,
+    VecEnvObs,
+    VecEnvStepReturn,
+)
+
+from core.batched import BatchedBuckshotGame, PLAYER, DEALER
+from core.constants import GAME_ACTIONS, OBS_SIZE
+from core.episode_stats import EpisodeStats, WIN, LOSS, DRAW
+
+
+class BuckshotVecEnv(VecEnv):
+    """
+    Single-process VecEnv running all environments over a BatchedBuckshotGame.
+
+    Mirrors BuckshotRouletteEnv (role assignment, opponent turns, rewards,
+    truncation) with auto-reset like DummyVecEnv. The opponent is a batched
+    callable `opponent_policy(obs (k, OBS_SIZE), masks (k, n_actions)) -> actions (k,)`;
+    None plays uniformly random valid moves.
+
+    set_opponents() installs a mixture instead: every episode draws its
+    opponent from the given weights, and pending opponent moves are grouped
+    so each opponent runs one batched call per turn. Episodes and agent
+    losses are counted per opponent (opponent_stats()).
+    """
+
+    # Methods returning one row per env, split per env in env_method().
+    _BATCHED_METHODS = ("action_masks", "drain_episode_stats")
+
+    def __init__(
+        self,
+        n_envs: int,
+        opponent_policy: Optional[Callable] = None,
+        force_agent_as_player: Optional[bool] = None,
+        seed: int = 0,
+        max_episode_steps: int = 1000,
+        max_opponent_steps: int = 500,
+    ):
+        self.render_mode = None
+        self.metadata = {"render_modes": []}
+        super().__init__(
+            n_envs,
+            gym.spaces.Box(low=0.0, high=1.0, shape=(OBS_SIZE,), dtype=np.float32),
+            gym.spaces.Discrete(len(GAME_ACTIONS)),
+        )
+
+        self.opponent_policies: List[Optional[Callable]] = [opponent_policy]
+        self.opponent_weights = np.ones(1)
+        self.force_agent_as_player = force_agent_as_player
+        self._max_episode_steps = max_episode_steps
+        self._max_opponent_steps = max_opponent_steps
+
+        self.game = BatchedBuckshotGame(n_envs, rng_seed=seed)
+        self.rng = np.random.default_rng(seed + 1)
+
+        self._agent_side = np.zeros(n_envs, dtype=np.int64)
+        self._agent_went_first = np.zeros(n_envs, dtype=bool)
+        self._valid_steps = np.zeros(n_envs, dtype=np.int64)
+        self.episode_stats = EpisodeStats(n_envs=n_envs)
+        self._episode_steps = np.zeros(n_envs, dtype=np.int64)
+        self._actions = np.zeros(n_envs, dtype=np.int64)
+        self._all = np.arange(n_envs)
+        self._opponent_ids = np.zeros(n_envs, dtype=np.int64)
+        self._opponent_episodes = np.zeros(1, dtype=np.int64)
+        self._opponent_losses = np.zeros(1, dtype=np.int64)
+
+    # --- Opponents ---
+
+    @property
+    def opponent_policy(self) -> Optional[Callable]:
+        return self.opponent_policies[0]
+
+    @opponent_policy.setter
+    def opponent_policy(self, policy: Optional[Callable]) -> None:
+        self.set_opponents([policy])
+
+    def set_opponents(
+        self, policies: Sequence[Optional[Callable]], weights: Optional[Sequence[float]] = None
+    ) -> None:
+        """Opponent mixture applied from the next episode of each env on."""
+        self.opponent_policies = list(policies)
+        weights = np.ones(len(policies)) if weights is None else np.asarray(weights, dtype=float)
+        self.opponent_weights = weights / weights.sum()
+        self._opponent_ids[self._opponent_ids >= len(policies)] = 0
+        self._opponent_episodes = np.zeros(len(policies), dtype=np.int64)
+        self._opponent_losses = np.zeros(len(policies), dtype=np.int64)
+
+    def opponent_stats(self, reset: bool = True):
+        """(episodes, agent losses) finished against each opponent of the mixture."""
+        stats = self._opponent_episodes.copy(), self._opponent_losses.copy()
+        if reset:
+            self._opponent_episodes[:] = 0
+            self._opponent_losses[:] = 0
+        return stats
+
+    # --- Game flow ---
+
+    def _reseed(self, seed: int) -> None:
+        self.game.rng = np.random.default_rng(seed)
+        self.rng = np.random.default_rng(seed + 1)
+
+    def _reset_envs(self, g: np.ndarray) -> None:
+        if len(g) == 0:
+            return
+        self.game.reset(g)
+
+        # Role assignment
+        if self.force_agent_as_player is not None:
+            self._agent_side[g] = PLAYER if self.force_agent_as_player else DEALER
+        else:
+            self._agent_side[g] = self.rng.integers(0, 2, size=len(g))
+
+        # Turn order
+        agent_goes_first = self.rng.random(len(g)) < 0.5
+        self._agent_went_first[g] = agent_goes_first
+        self.game.turn[g] = np.where(
+            agent_goes_first, self._agent_side[g], 1 - self._agent_side[g]
+        )
+        self._episode_steps[g] = 0
+        self._valid_steps[g] = 0
+        if len(self.opponent_policies) > 1:
+            self._opponent_ids[g] = self.rng.choice(
+                len(self.opponent_policies), size=len(g), p=self.opponent_weights
+            )
+        self._opponent_turns(g)
+
+    def _opponent_turns(self, g: np.ndarray) -> None:
+        for _ in range(self._max_opponent_steps):
+            pending = g[
+                (self.game.turn[g] != self._agent_side[g]) & ~self.game.is_terminal(g)
+            ]
+            if len(pending) == 0:
+                return
+
+            masks = self.game.get_valid_actions_mask(pending)
+            if len(self.opponent_policies) == 1:
+                actions = self._opponent_actions(self.opponent_policies[0], pending, masks)
+            else:
+                # One batched call per opponent present among the pending envs
+                actions = np.empty(len(pending), dtype=np.int64)
+                ids = self._opponent_ids[pending]
+                for k in np.unique(ids):
+                    sel = ids == k
+                    actions[sel] = self._opponent_actions(
+                        self.opponent_policies[k], pending[sel], masks[sel]
+                    )
+            self.game.step(actions, pending)
+
+    def _opponent_actions(
+        self, policy: Optional[Callable], g: np.ndarray, masks: np.ndarray
+    ) -> np.ndarray:
+        if policy is None:
+            # argmax of uniform noise over the valid entries = uniform valid move
+            return (self.rng.random(masks.shape) * masks).argmax(axis=1)
+        obs = self.game.get_obs(1 - self._agent_side[g], g)
+        return np.asarray(policy(obs, masks), dtype=np.int64)
+
+    def _get_obs(self) -> np.ndarray:
+        # Fresh array every call: SB3 keeps the previous observation around.
+        return self.game.get_obs(self._agent_side)
+
+    def action_masks(self) -> np.ndarray:
+        return self.game.get_valid_actions_mask()
+
+    # --- VecEnv API ---
+
+    def reset(self) -> VecEnvObs:
+        # VecEnv.seed() (SB3 >= 2.2) stores seeds in _seeds for the next reset
+        if self._seeds[0] is not None:
+            self._reseed(self._seeds[0])
+        self._reset_seeds()
+        self._reset_envs(self._all)
+        return self._get_obs()
+
+    def step_async(self, actions: np.ndarray) -> None:
+        self._actions = np.asarray(actions, dtype=np.int64).reshape(self.num_envs)
+
+    def step_wait(self) -> VecEnvStepReturn:
+        self._episode_steps += 1
+        agent_is_player = self._agent_side == PLAYER
+
+        result = self.game.step(self._actions)
+        np.add(self._valid_steps, result.valid, out=self._valid_steps)
+        terminated = result.terminated.copy()
+        agent_hp_change = result.new_bot_hp.astype(np.float32) - result.prev_bot_hp
+        opponent_hp_change = (
+            result.new_target_hp.astype(np.float32) - result.prev_target_hp
+        )
+
+        # Calculate Reward
+        rewards = np.minimum(agent_hp_change, 0.0) - np.minimum(opponent_hp_change, 0.0)
+        rewards[~result.valid] = -10.0
+
+        # Agent ended the game: Win = +100, Loss = -100 (from the player's view)
+        outcome = np.where(
+            result.dealer_dead & ~result.player_dead,
+            100.0,
+            np.where(result.player_dead, -100.0, 0.0),
+        )
+        rewards += np.where(terminated, outcome * np.where(agent_is_player, 1.0, -1.0), 0.0)
+
+        # Opponent replies where the game goes on
+        ongoing = self._all[~terminated]
+        self._opponent_turns(ongoing)
+        ended = ongoing[self.game.is_terminal(ongoing)]
+        opponent_dead = self.game.hp[ended, 1 - self._agent_side[ended]] <= 0
+        rewards[ended] += np.where(opponent_dead, 100.0, -100.0)
+        terminated[ended] = True
+
+        truncated = self._episode_steps >= self._max_episode_steps
+        dones = terminated | truncated
+        obs = self._get_obs()
+
+        infos: List[dict] = [
+            {"invalid_action": not v, "episode_steps": int(s)}
+            for v, s in zip(result.valid, self._episode_steps)
+        ]
+        done_idx = np.flatnonzero(dones)
+        if len(done_idx):
+            lost = self.game.hp[done_idx, self._agent_side[done_idx]] <= 0
+            ids = self._opponent_ids[done_idx]
+            np.add.at(self._opponent_episodes, ids, 1)
+            np.add.at(self._opponent_losses, ids, lost)
+            won = self.game.hp[done_idx, 1 - self._agent_side[done_idx]] <= 0
+            self.episode_stats.record_batch(
+                done_idx,
+                np.where(lost, LOSS, np.where(won, WIN, DRAW)),
+                self._episode_steps[done_idx],
+                self._episode_steps[done_idx] - self._valid_steps[done_idx],
+                self._agent_side[done_idx] == PLAYER,
+                self._agent_went_first[done_idx],
+            )
+        for i in done_idx:
+            infos[i]["terminal_observation"] = obs[i].copy()
+            infos[i]["TimeLimit.truncated"] = bool(truncated[i] and not terminated[i])
+
+        if len(done_idx):
+            self._reset_envs(done_idx)
+            obs[done_idx] = self.game.get_obs(self._agent_side[done_idx], done_idx)
+
+        return obs, rewards.astype(np.float32), dones, infos
+
+    def drain_episode_stats(self) -> List[np.ndarray]:
+        """Per env: episodes finished since the last call (EPISODE_STATS_DTYPE rows)."""
+        return [self.episode_stats.drain(i) for i in range(self.num_envs)]
+
+    def close(self) -> None:
+        pass
+
+    def _indices_list(self, indices: VecEnvIndices) -> Sequence[int]:
+        if indices is None:
+            return range(self.num_envs)
+        if isinstance(indices, int):
+            return [indices]
+        return indices
+
+    def get_attr(self, attr_name: str, indices: VecEnvIndices = None) -> List[Any]:
+        value = getattr(self, attr_name)
+        return [value for _ in self._indices_list(indices)]
+
+    def set_attr(self, attr_name: str, value: Any, indices: VecEnvIndices = None) -> None:
+        setattr(self, attr_name, value)
+
+    def env_method(
+        self,
+        method_name: str,
+        *method_args,
+        indices: VecEnvIndices = None,
+        **method_kwargs,
+    ) -> List[Any]:
+        result = getattr(self, method_name)(*method_args, **method_kwargs)
+        idx = self._indices_list(indices)
+        if method_name in self._BATCHED_METHODS:
+            return [result[i] for i in idx]
+        return [result for _ in idx]
+
+    def env_is_wrapped(self, wrapper_class, indices: VecEnvIndices = None) -> List[bool]:
+        return [False for _ in self._indices_list(indices)]